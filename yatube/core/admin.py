@@ -0,0 +1,41 @@
+from django.contrib import admin
+
+from .models import Job, OutgoingEmail
+from .queue import stats
+
+
+def requeue(modeladmin, request, queryset):
+    queryset.exclude(status=Job.RUNNING).update(
+        status=Job.QUEUED, attempts=0, last_error=''
+    )
+
+
+requeue.short_description = 'Вернуть в очередь'
+
+
+class JobAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk', 'name', 'status', 'priority', 'run_at', 'attempts',
+        'claimed_at', 'finished',
+    )
+    list_filter = ('status', 'name')
+    readonly_fields = ('claimed_at', 'finished', 'last_error', 'created')
+    actions = (requeue,)
+    change_list_template = 'admin/core/job/change_list.html'
+
+    def changelist_view(self, request, extra_context=None):
+        extra_context = dict(extra_context or {}, queue_stats=stats())
+        return super().changelist_view(request, extra_context)
+
+
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk', 'subject', 'recipients', 'attempts', 'next_attempt', 'failed',
+    )
+    list_filter = ('failed',)
+    exclude = ('message',)
+    readonly_fields = ('subject', 'recipients', 'last_error', 'created')
+
+
+admin.site.register(Job, JobAdmin)
+admin.site.register(OutgoingEmail, OutgoingEmailAdmin)
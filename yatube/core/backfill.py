@@ -0,0 +1,147 @@
+"""Пакетное заполнение данных в больших таблицах.
+
+Модель обходится кусками по первичному ключу, каждый кусок обрабатывается
+в своей короткой транзакции вместе с сохранением прогресса, а между
+кусками делается пауза, чтобы не держать блокировку записи SQLite.
+"""
+import time
+
+from django.conf import settings
+from django.db import migrations, transaction
+from django.utils.module_loading import autodiscover_modules
+
+from .models import BackfillCheckpoint
+
+registry = {}
+
+
+def register(backfill_class):
+    """Декоратор: делает заполнение доступным команде backfill."""
+    registry[backfill_class.name] = backfill_class
+    return backfill_class
+
+
+def get_backfill(name, **options):
+    autodiscover_modules('backfills')
+    return registry[name](**options)
+
+
+def iter_batches(queryset, batch_size, after=0):
+    while True:
+        batch = list(
+            queryset.filter(pk__gt=after).order_by('pk')[:batch_size]
+        )
+        if not batch:
+            return
+        yield batch
+        after = batch[-1].pk
+
+
+def walk(queryset, process_batch, batch_size, pause=0, checkpoint=None,
+         on_batch=None):
+    """Обрабатывает queryset кусками, продолжая с checkpoint.last_pk."""
+    after = checkpoint.last_pk if checkpoint is not None else 0
+    for batch in iter_batches(queryset, batch_size, after):
+        started = time.monotonic()
+        with transaction.atomic():
+            process_batch(batch)
+            if checkpoint is not None:
+                checkpoint.last_pk = batch[-1].pk
+                checkpoint.processed += len(batch)
+                checkpoint.save()
+        if on_batch is not None:
+            on_batch(batch, time.monotonic() - started)
+        if pause:
+            time.sleep(pause)
+    if checkpoint is not None:
+        checkpoint.finished = True
+        checkpoint.save()
+
+
+class Backfill:
+    """Базовый класс заполнения.
+
+    Наследник задает name, model и process_batch(objects); повторная
+    обработка строки должна быть безопасной.
+    """
+
+    name = None
+    model = None
+
+    def __init__(self, batch_size=None, pause=None):
+        self.batch_size = batch_size or settings.BACKFILL_BATCH_SIZE
+        self.pause = settings.BACKFILL_PAUSE if pause is None else pause
+
+    def get_queryset(self):
+        return self.model._default_manager.all()
+
+    def process_batch(self, objects):
+        raise NotImplementedError
+
+    def get_checkpoint(self, reset=False):
+        checkpoint, _ = BackfillCheckpoint.objects.get_or_create(
+            name=self.name
+        )
+        if reset:
+            checkpoint.last_pk = checkpoint.processed = 0
+            checkpoint.finished = False
+            checkpoint.save()
+        return checkpoint
+
+    def run(self, reset=False, on_batch=None):
+        checkpoint = self.get_checkpoint(reset)
+        walk(
+            self.get_queryset(),
+            self.process_batch,
+            self.batch_size,
+            self.pause,
+            checkpoint,
+            on_batch
+        )
+        return checkpoint
+
+    def estimate(self, reset=False):
+        """Оставшиеся строки и оценка времени в секундах.
+
+        Время одного куска меряется на первом оставшемся куске
+        в транзакции, которая затем откатывается.
+        """
+        checkpoint = BackfillCheckpoint.objects.filter(name=self.name).first()
+        after = 0 if reset or checkpoint is None else checkpoint.last_pk
+        queryset = self.get_queryset().filter(pk__gt=after)
+        remaining = queryset.count()
+        sample = next(iter_batches(queryset, self.batch_size), [])
+        if not sample:
+            return 0, 0.0
+        started = time.monotonic()
+        with transaction.atomic():
+            self.process_batch(sample)
+            transaction.set_rollback(True)
+        per_row = (time.monotonic() - started) / len(sample)
+        batches = -(-remaining // self.batch_size)
+        return remaining, remaining * per_row + batches * self.pause
+
+
+def backfill_operation(model_label, process_batch, name=None,
+                       batch_size=None, pause=None):
+    """RunPython, который заполняет модель кусками.
+
+    Миграция с этой операцией должна объявлять atomic = False, иначе
+    все куски окажутся в одной транзакции. Если задан name, прогресс
+    сохраняется в core.BackfillCheckpoint, и миграция зависит
+    от ('core', '0001_initial').
+    """
+    def forward(apps, schema_editor):
+        checkpoint = None
+        if name is not None:
+            checkpoint_model = apps.get_model('core', 'BackfillCheckpoint')
+            checkpoint, _ = checkpoint_model.objects.get_or_create(name=name)
+        walk(
+            apps.get_model(model_label)._default_manager.all(),
+            process_batch,
+            batch_size or settings.BACKFILL_BATCH_SIZE,
+            settings.BACKFILL_PAUSE if pause is None else pause,
+            checkpoint
+        )
+
+    return migrations.RunPython(forward, migrations.RunPython.noop)
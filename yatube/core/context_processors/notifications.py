@@ -0,0 +1,15 @@
+from django.utils.functional import SimpleLazyObject
+
+from posts.notifications import has_unread
+
+
+def notifications(request):
+    """Признак непрочитанных уведомлений; запрос только если он нужен."""
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return {'has_unread_notifications': False}
+    return {
+        'has_unread_notifications': SimpleLazyObject(
+            lambda: has_unread(user)
+        )
+    }
@@ -0,0 +1,23 @@
+from django.conf import settings
+
+from .mail import drain_step, next_attempt, spool_connection
+from .queue import enqueue, job
+
+
+@job('core.send_mail_spool')
+def send_mail_spool():
+    """Отправляет очередь писем и планирует себя на ближайший повтор.
+
+    За раз отправляет не больше JOBS_DRAIN_BATCHES пачек, остаток
+    достается следующей задаче.
+    """
+    with spool_connection() as connection:
+        for _ in range(settings.JOBS_DRAIN_BATCHES):
+            if not drain_step(connection, settings.MAIL_SPOOL_BATCH_SIZE):
+                break
+        else:
+            enqueue('core.send_mail_spool', priority=-1, unique=True)
+            return
+    retry_at = next_attempt()
+    if retry_at is not None:
+        enqueue('core.send_mail_spool', run_at=retry_at, unique=True)
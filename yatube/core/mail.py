@@ -0,0 +1,136 @@
+"""Очередь исходящей почты в базе.
+
+SpoolBackend только сохраняет письма, поэтому запрос не ждет
+SMTP-сервер, а ставит в очередь задачу core.send_mail_spool.
+Задача и команда send_mail_spool отправляют письма пачками через
+бэкенд SPOOL_EMAIL_BACKEND, держа одно соединение на весь запуск.
+Неудачная попытка откладывается с экспоненциальной задержкой, после
+MAIL_SPOOL_MAX_ATTEMPTS письмо помечается недоставленным. Перед
+отправкой письмо откладывается на MAIL_SPOOL_LEASE секунд условным
+UPDATE, поэтому два отправителя не пошлют его дважды, а письмо
+упавшего отправителя уйдет после истечения этого срока.
+"""
+import logging
+import pickle
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.utils import timezone
+
+from .models import OutgoingEmail
+from .queue import enqueue
+
+logger = logging.getLogger(__name__)
+
+
+def spool(message):
+    connection, message.connection = message.connection, None
+    try:
+        data = pickle.dumps(message)
+    finally:
+        message.connection = connection
+    return OutgoingEmail(
+        subject=str(message.subject)[:255],
+        recipients='\n'.join(message.recipients()),
+        message=data,
+    )
+
+
+class SpoolBackend(BaseEmailBackend):
+    def send_messages(self, email_messages):
+        rows = [
+            spool(message) for message in email_messages
+            if message.recipients()
+        ]
+        OutgoingEmail.objects.bulk_create(rows)
+        if rows:
+            enqueue('core.send_mail_spool', priority=-1, unique=True)
+        return len(rows)
+
+
+def retry_delay(attempts):
+    return min(
+        settings.MAIL_SPOOL_RETRY_DELAY * 2 ** (attempts - 1),
+        settings.MAIL_SPOOL_MAX_DELAY
+    )
+
+
+def due_batch(batch_size):
+    return list(
+        OutgoingEmail.objects.filter(
+            failed=False, next_attempt__lte=timezone.now()
+        ).order_by('next_attempt', 'pk')[:batch_size]
+    )
+
+
+def next_attempt():
+    return OutgoingEmail.objects.filter(failed=False).order_by(
+        'next_attempt'
+    ).values_list('next_attempt', flat=True).first()
+
+
+def deliver(connection, row):
+    """Отправляет одно письмо; при ошибке планирует повтор.
+
+    Возвращает True, если письмо ушло, False при ошибке и None,
+    если письмо уже взял другой отправитель.
+    """
+    lease = timezone.now() + timedelta(seconds=settings.MAIL_SPOOL_LEASE)
+    if not OutgoingEmail.objects.filter(
+        pk=row.pk, next_attempt=row.next_attempt
+    ).update(next_attempt=lease):
+        return None
+    try:
+        connection.send_messages([pickle.loads(row.message)])
+    except Exception as error:
+        row.attempts += 1
+        row.last_error = repr(error)
+        row.failed = row.attempts >= settings.MAIL_SPOOL_MAX_ATTEMPTS
+        row.next_attempt = timezone.now() + timedelta(
+            seconds=retry_delay(row.attempts)
+        )
+        row.save(update_fields=(
+            'attempts', 'last_error', 'failed', 'next_attempt'
+        ))
+        if row.failed:
+            logger.error('Письмо %s не доставлено: %s', row.pk, error)
+        return False
+    OutgoingEmail.objects.filter(pk=row.pk).delete()
+    return True
+
+
+def reopen(connection):
+    """Открывает соединение заново; если не вышло, следующие
+    отправки пробуют открыть его сами."""
+    connection.close()
+    try:
+        connection.open()
+    except Exception:
+        logger.exception('Не удалось заново открыть соединение')
+
+
+def drain_step(connection, batch_size):
+    """Отправляет пачку писем, срок которых наступил.
+
+    После первой ошибки в пачке соединение, которое могло оборваться,
+    открывается заново один раз и остается открытым до конца пачки.
+    Возвращает число отправленных или None, если отправлять нечего.
+    """
+    batch = due_batch(batch_size)
+    if not batch:
+        return None
+    sent, reopened = 0, False
+    for row in batch:
+        delivered = deliver(connection, row)
+        if delivered:
+            sent += 1
+        elif delivered is False and not reopened:
+            reopen(connection)
+            reopened = True
+    return sent
+
+
+def spool_connection():
+    return get_connection(settings.SPOOL_EMAIL_BACKEND)
@@ -0,0 +1,62 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.module_loading import autodiscover_modules
+
+from core.backfill import get_backfill, registry
+
+
+class Command(BaseCommand):
+    help = 'Заполняет данные в большой таблице кусками по первичному ключу.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'name',
+            nargs='?',
+            help='Название зарегистрированного заполнения.'
+        )
+        parser.add_argument('--batch-size', type=int)
+        parser.add_argument(
+            '--pause',
+            type=float,
+            help='Пауза в секундах между кусками.'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Ничего не менять, оценить объем и время.'
+        )
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            help='Начать заново, а не с сохраненного места.'
+        )
+
+    def handle(self, *args, **options):
+        if not options['name']:
+            autodiscover_modules('backfills')
+            for name in sorted(registry):
+                self.stdout.write(name)
+            return
+        try:
+            backfill = get_backfill(
+                options['name'],
+                batch_size=options['batch_size'],
+                pause=options['pause']
+            )
+        except KeyError:
+            raise CommandError(f'Заполнение {options["name"]} не найдено.')
+        if options['dry_run']:
+            remaining, seconds = backfill.estimate(options['reset'])
+            self.stdout.write(
+                f'Осталось строк: {remaining}, '
+                f'оценка времени: {seconds:.1f} с'
+            )
+            return
+
+        def report(batch, elapsed):
+            self.stdout.write(
+                f'id {batch[0].pk}-{batch[-1].pk}: '
+                f'{len(batch)} строк за {elapsed:.3f} с'
+            )
+
+        checkpoint = backfill.run(options['reset'], on_batch=report)
+        self.stdout.write(f'Готово, всего обработано: {checkpoint.processed}')
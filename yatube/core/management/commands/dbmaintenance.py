@@ -0,0 +1,149 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = (
+        'Онлайн-бэкап SQLite через backup API и обслуживание базы: '
+        'PRAGMA optimize, ANALYZE, incremental vacuum, проверка целостности.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database',
+            default='default',
+            help='Алиас базы из settings.DATABASES.'
+        )
+        parser.add_argument(
+            '--backup',
+            metavar='PATH',
+            help='Файл, в который снять копию базы.'
+        )
+        parser.add_argument(
+            '--pages',
+            type=int,
+            default=settings.DB_BACKUP_STEP_PAGES,
+            help='Сколько страниц копировать за один шаг бэкапа.'
+        )
+        parser.add_argument(
+            '--step-sleep',
+            type=float,
+            default=settings.DB_BACKUP_STEP_SLEEP,
+            help='Пауза в секундах между шагами, чтобы пропускать писателей.'
+        )
+        parser.add_argument(
+            '--optimize',
+            action='store_true',
+            help='Выполнить PRAGMA optimize с ограничением analysis_limit.'
+        )
+        parser.add_argument(
+            '--analysis-limit',
+            type=int,
+            default=settings.DB_ANALYSIS_LIMIT,
+            help='Бюджет строк на индекс для optimize и ANALYZE.'
+        )
+        parser.add_argument(
+            '--analyze',
+            action='store_true',
+            help='Выполнить ANALYZE.'
+        )
+        parser.add_argument(
+            '--vacuum-pages',
+            type=int,
+            default=0,
+            help='Вернуть системе до N свободных страниц (0 - не трогать).'
+        )
+        parser.add_argument(
+            '--enable-incremental-vacuum',
+            action='store_true',
+            help='Включить auto_vacuum=INCREMENTAL (один полный VACUUM).'
+        )
+        parser.add_argument(
+            '--integrity',
+            choices=('quick', 'full'),
+            help='Проверить целостность: quick_check или integrity_check.'
+        )
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        if connection.vendor != 'sqlite':
+            raise CommandError('Команда работает только с SQLite.')
+        connection.ensure_connection()
+        self.raw = connection.connection
+        if options['backup']:
+            self.timed('backup', self.backup, options['backup'],
+                       options['pages'], options['step_sleep'])
+        if options['enable_incremental_vacuum']:
+            self.timed('enable incremental vacuum',
+                       self.enable_incremental_vacuum)
+        if options['analysis_limit']:
+            self.pragma(f'analysis_limit={options["analysis_limit"]}')
+        if options['optimize']:
+            self.timed('optimize', self.pragma, 'optimize')
+        if options['analyze']:
+            self.timed('analyze', self.analyze)
+        if options['vacuum_pages']:
+            self.timed('incremental vacuum', self.incremental_vacuum,
+                       options['vacuum_pages'])
+        if options['integrity']:
+            self.timed('integrity check', self.integrity_check,
+                       options['integrity'])
+
+    def timed(self, name, func, *args):
+        started = time.monotonic()
+        result = func(*args)
+        elapsed = time.monotonic() - started
+        message = f'{name}: {elapsed:.3f} с'
+        if result:
+            message = f'{message}, {result}'
+        self.stdout.write(message)
+
+    def pragma(self, statement):
+        return self.raw.execute(f'PRAGMA {statement}').fetchall()
+
+    def backup(self, path, pages, step_sleep):
+        steps = 0
+
+        def progress(status, remaining, total):
+            nonlocal steps
+            steps += 1
+            if remaining and step_sleep:
+                time.sleep(step_sleep)
+
+        target = sqlite3.connect(path)
+        try:
+            self.raw.backup(target, pages=pages, progress=progress)
+        finally:
+            target.close()
+        return f'шагов: {steps}, файл: {path}'
+
+    def analyze(self):
+        self.raw.execute('ANALYZE')
+
+    def enable_incremental_vacuum(self):
+        self.pragma('auto_vacuum=INCREMENTAL')
+        self.raw.execute('VACUUM')
+        return f'auto_vacuum={self.pragma("auto_vacuum")[0][0]}'
+
+    def incremental_vacuum(self, pages):
+        if self.pragma('auto_vacuum')[0][0] != 2:
+            self.stderr.write(
+                'auto_vacuum не INCREMENTAL, запустите команду с '
+                '--enable-incremental-vacuum'
+            )
+            return None
+        before = self.pragma('freelist_count')[0][0]
+        self.pragma(f'incremental_vacuum({pages})')
+        after = self.pragma('freelist_count')[0][0]
+        return f'освобождено страниц: {before - after}'
+
+    def integrity_check(self, mode):
+        pragma = 'quick_check' if mode == 'quick' else 'integrity_check'
+        rows = [row[0] for row in self.pragma(pragma)]
+        if rows != ['ok']:
+            raise CommandError('; '.join(rows))
+        return 'ok'
@@ -0,0 +1,73 @@
+import signal
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core.queue import work
+
+
+class Command(BaseCommand):
+    help = 'Выполняет фоновые задачи из очереди core.Job.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--threads',
+            type=int,
+            default=settings.JOBS_WORKER_THREADS,
+            help='Сколько потоков-воркеров запустить.'
+        )
+        parser.add_argument(
+            '--idle-sleep',
+            type=float,
+            default=settings.JOBS_IDLE_SLEEP,
+            help='Пауза в секундах, когда очередь пуста.'
+        )
+        parser.add_argument(
+            '--burst',
+            action='store_true',
+            help='Выйти, когда очередь опустеет.'
+        )
+
+    def worker(self, stop, options, results):
+        try:
+            results.append(
+                work(stop, options['idle_sleep'], options['burst'])
+            )
+        finally:
+            connections.close_all()
+
+    def handle(self, *args, **options):
+        stop = threading.Event()
+        results = []
+        if options['threads'] <= 1:
+            # Первый Ctrl+C дает доделать текущую задачу, второй прерывает.
+            def interrupt(signum, frame):
+                stop.set()
+                signal.signal(signal.SIGINT, previous)
+
+            previous = signal.signal(signal.SIGINT, interrupt)
+            try:
+                results.append(
+                    work(stop, options['idle_sleep'], options['burst'])
+                )
+            finally:
+                signal.signal(signal.SIGINT, previous)
+        else:
+            threads = [
+                threading.Thread(
+                    target=self.worker, args=(stop, options, results)
+                )
+                for _ in range(options['threads'])
+            ]
+            for thread in threads:
+                thread.start()
+            try:
+                for thread in threads:
+                    thread.join()
+            except KeyboardInterrupt:
+                stop.set()
+                for thread in threads:
+                    thread.join()
+        self.stdout.write(f'Выполнено задач: {sum(results)}')
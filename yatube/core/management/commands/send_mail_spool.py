@@ -0,0 +1,44 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.mail import drain_step, spool_connection
+
+
+class Command(BaseCommand):
+    help = 'Отправляет письма из очереди пачками через одно соединение.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.MAIL_SPOOL_BATCH_SIZE,
+            help='Сколько писем выбирать за раз.'
+        )
+        parser.add_argument(
+            '--pause',
+            type=float,
+            default=0,
+            help='Пауза в секундах между пачками.'
+        )
+        parser.add_argument(
+            '--max-batches',
+            type=int,
+            default=0,
+            help='Остановиться после N пачек (0 - пока есть что отправить).'
+        )
+
+    def handle(self, *args, **options):
+        batches = sent = 0
+        with spool_connection() as connection:
+            while (not options['max_batches']
+                   or batches < options['max_batches']):
+                step = drain_step(connection, options['batch_size'])
+                if step is None:
+                    break
+                batches += 1
+                sent += step
+                if options['pause']:
+                    time.sleep(options['pause'])
+        self.stdout.write(f'Пачек: {batches}, отправлено писем: {sent}')
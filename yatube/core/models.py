@@ -0,0 +1,119 @@
+from django.db import models
+from django.utils import timezone
+
+
+class BackfillCheckpoint(models.Model):
+    name = models.CharField(
+        max_length=100,
+        unique=True,
+        verbose_name='Название заполнения'
+    )
+    last_pk = models.BigIntegerField(
+        default=0,
+        verbose_name='Последний обработанный id'
+    )
+    processed = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Обработано строк'
+    )
+    finished = models.BooleanField(default=False, verbose_name='Завершено')
+    updated = models.DateTimeField(auto_now=True, verbose_name='Обновлено')
+
+    class Meta:
+        verbose_name = 'Прогресс заполнения'
+        verbose_name_plural = 'Прогресс заполнений'
+
+    def __str__(self):
+        return self.name
+
+
+class OutgoingEmail(models.Model):
+    subject = models.CharField(max_length=255, verbose_name='Тема')
+    recipients = models.TextField(verbose_name='Получатели')
+    message = models.BinaryField()
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Попыток'
+    )
+    next_attempt = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Следующая попытка'
+    )
+    last_error = models.TextField(blank=True, verbose_name='Ошибка')
+    failed = models.BooleanField(default=False, verbose_name='Не доставлено')
+    created = models.DateTimeField(auto_now_add=True, verbose_name='Создано')
+
+    class Meta:
+        indexes = (
+            models.Index(fields=('failed', 'next_attempt')),
+        )
+        verbose_name = 'Письмо в очереди'
+        verbose_name_plural = 'Очередь писем'
+
+    def __str__(self):
+        return self.subject
+
+
+class Job(models.Model):
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнено'),
+        (FAILED, 'Ошибка'),
+    )
+    name = models.CharField(max_length=100, verbose_name='Задача')
+    args = models.TextField(default='{}', verbose_name='Аргументы')
+    priority = models.SmallIntegerField(
+        default=0,
+        verbose_name='Приоритет',
+        help_text='Меньше - раньше'
+    )
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=QUEUED,
+        verbose_name='Статус'
+    )
+    run_at = models.DateTimeField(default=timezone.now, verbose_name='Запуск')
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Попыток'
+    )
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    token = models.CharField(max_length=32, blank=True, editable=False)
+    claimed_at = models.DateTimeField(
+        blank=True,
+        null=True,
+        verbose_name='Взята'
+    )
+    finished = models.DateTimeField(
+        blank=True,
+        null=True,
+        verbose_name='Завершена'
+    )
+    last_error = models.TextField(blank=True, verbose_name='Ошибка')
+    created = models.DateTimeField(auto_now_add=True, verbose_name='Создана')
+    # Хеш имени и аргументов уникальной задачи, пока она ждет в очереди.
+    unique_key = models.CharField(
+        max_length=40,
+        unique=True,
+        blank=True,
+        null=True,
+        editable=False
+    )
+
+    class Meta:
+        indexes = (
+            models.Index(fields=('status', 'priority', 'run_at')),
+            models.Index(fields=('status', 'finished')),
+            models.Index(fields=('name', 'status')),
+        )
+        verbose_name = 'Фоновая задача'
+        verbose_name_plural = 'Фоновые задачи'
+
+    def __str__(self):
+        return f'{self.name} #{self.pk}'
@@ -0,0 +1,225 @@
+"""Очередь фоновых задач в таблице core.Job.
+
+Задача - функция, зарегистрированная декоратором job в модуле jobs.py
+приложения; аргументы хранятся в JSON. Задача может выполниться
+повторно, поэтому должна быть идемпотентной. Воркер берет задачу одним
+UPDATE по первичному ключу с условием status = 'queued': SQLite
+выполняет запись под единственной блокировкой, поэтому одну задачу
+не возьмут два воркера, даже если они в разных процессах. Задача
+помечается случайным токеном, по которому сохраняется ее итог.
+
+Упавшая задача возвращается в очередь с экспоненциальной задержкой,
+после max_attempts помечается ошибкой. Задача, которая выполняется
+дольше JOBS_LEASE_TIMEOUT, считается брошенной упавшим воркером
+и возвращается в очередь, поэтому длинная работа делится на задачи
+не больше JOBS_DRAIN_BATCHES пачек. Ошибка базы в цикле воркера,
+например занятая SQLite, не останавливает его: воркер пишет ее в лог
+и повторяет после паузы.
+"""
+import hashlib
+import json
+import logging
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+registry = {}
+
+
+def job(name):
+    """Декоратор: регистрирует функцию как задачу с именем name."""
+    def decorator(func):
+        registry[name] = func
+        return func
+    return decorator
+
+
+def get_task(name):
+    if name not in registry:
+        autodiscover_modules('jobs')
+    return registry[name]
+
+
+def enqueue(name, priority=0, run_at=None, delay=None, unique=False,
+            **kwargs):
+    """Ставит задачу в очередь в текущей транзакции.
+
+    С unique=True задача с тем же именем и аргументами, еще ждущая
+    в очереди, не дублируется, а только переносится на более ранний срок.
+    Уникальность держит индекс по unique_key, поэтому две одновременные
+    постановки не вставят две строки; взятая задача ключ освобождает.
+    """
+    if run_at is None:
+        run_at = timezone.now()
+    if delay:
+        run_at += timedelta(seconds=delay)
+    args = json.dumps(kwargs, sort_keys=True)
+    fields = {
+        'name': name,
+        'args': args,
+        'priority': priority,
+        'run_at': run_at,
+        'max_attempts': settings.JOBS_MAX_ATTEMPTS,
+    }
+    if not unique:
+        return Job.objects.create(**fields)
+    key = hashlib.sha1(f'{name}\n{args}'.encode()).hexdigest()
+    try:
+        with transaction.atomic():
+            return Job.objects.create(unique_key=key, **fields)
+    except IntegrityError:
+        Job.objects.filter(unique_key=key, run_at__gt=run_at).update(
+            run_at=run_at
+        )
+        return None
+
+
+def claim():
+    """Берет самую срочную задачу, срок которой наступил, или None."""
+    now = timezone.now()
+    token = uuid.uuid4().hex
+    pk = Job.objects.filter(
+        status=Job.QUEUED, run_at__lte=now
+    ).order_by('priority', 'run_at', 'pk').values_list(
+        'pk', flat=True
+    ).first()
+    if pk is None:
+        return None
+    claimed = Job.objects.filter(pk=pk, status=Job.QUEUED).update(
+        status=Job.RUNNING,
+        token=token,
+        claimed_at=now,
+        attempts=F('attempts') + 1,
+        unique_key=None
+    )
+    if not claimed:
+        return None
+    return Job.objects.get(pk=pk)
+
+
+def retry_delay(attempts):
+    return min(
+        settings.JOBS_RETRY_DELAY * 2 ** (attempts - 1),
+        settings.JOBS_MAX_DELAY
+    )
+
+
+def finish(job_row, **fields):
+    """Сохраняет итог, если задачу не перехватили как брошенную."""
+    return Job.objects.filter(
+        pk=job_row.pk, token=job_row.token, status=Job.RUNNING
+    ).update(**fields)
+
+
+def run_job(job_row):
+    """Выполняет взятую задачу; возвращает True при успехе."""
+    try:
+        get_task(job_row.name)(**json.loads(job_row.args))
+    except Exception as error:
+        logger.exception('Задача %s упала', job_row)
+        if job_row.attempts >= job_row.max_attempts:
+            finish(
+                job_row,
+                status=Job.FAILED,
+                finished=timezone.now(),
+                last_error=repr(error)
+            )
+        else:
+            finish(
+                job_row,
+                status=Job.QUEUED,
+                run_at=timezone.now() + timedelta(
+                    seconds=retry_delay(job_row.attempts)
+                ),
+                last_error=repr(error)
+            )
+        return False
+    finish(job_row, status=Job.DONE, finished=timezone.now())
+    return True
+
+
+def requeue_stale():
+    """Возвращает в очередь задачи, брошенные упавшими воркерами."""
+    cutoff = timezone.now() - timedelta(seconds=settings.JOBS_LEASE_TIMEOUT)
+    return Job.objects.filter(
+        status=Job.RUNNING, claimed_at__lt=cutoff
+    ).update(status=Job.QUEUED, token='', run_at=timezone.now())
+
+
+def cleanup():
+    """Удаляет выполненные задачи старше JOBS_KEEP_DONE секунд."""
+    cutoff = timezone.now() - timedelta(seconds=settings.JOBS_KEEP_DONE)
+    return Job.objects.filter(status=Job.DONE, finished__lt=cutoff).delete()[0]
+
+
+def pause(stop, seconds):
+    if stop is not None:
+        stop.wait(seconds)
+    else:
+        time.sleep(seconds)
+
+
+def work(stop=None, idle_sleep=None, burst=False):
+    """Цикл воркера: выполняет задачи, пока не выставлен stop.
+
+    В режиме burst выходит, как только очередь опустела.
+    Возвращает число выполненных задач.
+    """
+    idle_sleep = settings.JOBS_IDLE_SLEEP if idle_sleep is None else idle_sleep
+    processed = 0
+    while stop is None or not stop.is_set():
+        try:
+            job_row = claim()
+            if job_row is not None:
+                run_job(job_row)
+                processed += 1
+                continue
+            if requeue_stale():
+                continue
+            if burst:
+                break
+            cleanup()
+        except DatabaseError:
+            logger.exception('Ошибка базы в цикле воркера')
+        pause(stop, idle_sleep)
+    return processed
+
+
+def stats():
+    """Глубина очереди и задержки для админки."""
+    now = timezone.now()
+    due = Job.objects.filter(status=Job.QUEUED, run_at__lte=now)
+    oldest = due.order_by('run_at').values_list('run_at', flat=True).first()
+    recent = list(
+        Job.objects.filter(
+            status=Job.DONE, finished__gte=now - timedelta(hours=1)
+        ).order_by('-finished').values_list(
+            'run_at', 'claimed_at', 'finished'
+        )[:1000]
+    )
+    waits = [(claimed - run_at).total_seconds()
+             for run_at, claimed, _ in recent]
+    runs = [(finished - claimed).total_seconds()
+            for _, claimed, finished in recent]
+    return {
+        'depth': due.count(),
+        'scheduled': Job.objects.filter(
+            status=Job.QUEUED, run_at__gt=now
+        ).count(),
+        'running': Job.objects.filter(status=Job.RUNNING).count(),
+        'failed': Job.objects.filter(status=Job.FAILED).count(),
+        'oldest_wait': oldest and (now - oldest).total_seconds(),
+        'done_last_hour': len(recent),
+        'avg_wait': sum(waits) / len(waits) if waits else None,
+        'avg_run': sum(runs) / len(runs) if runs else None,
+    }
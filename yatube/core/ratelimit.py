@@ -0,0 +1,156 @@
+"""Ограничение частоты запросов по алгоритму token bucket.
+
+Ведро описывается двумя ключами кеша: моментом начала отсчета start
+и числом взятых с тех пор жетонов. В момент now в ведре
+burst + rate * (now - start) - count жетонов; запрос атомарно
+увеличивает count и проходит, если результат не ушел в минус, иначе
+жетон возвращается. Когда ведро переполнилось бы, отсчет начинается
+заново с полным ведром: это делает один запрос под блокировкой
+в кеше, а взятые жетоны вычитаются из count через decr, поэтому
+жетоны, взятые в это время другими запросами, не теряются.
+Новое ведро заводится через add. Обычная проверка стоит одного
+get_many и одного incr.
+
+Лимиты задаются строками вида '10/m' в settings.RATELIMITS по имени
+области. Функции-представления ограничиваются декоратором ratelimit,
+чужие и классовые представления - RateLimitMiddleware по
+settings.RATELIMIT_VIEWS.
+"""
+import math
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.shortcuts import render
+
+START_KEY = 'ratelimit:{}:{}:start'
+COUNT_KEY = 'ratelimit:{}:{}:count'
+REFILL_LOCK_KEY = 'ratelimit:{}:{}:refill-lock'
+REFILL_LOCK_TIMEOUT = 5
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 60 * 60 * 24}
+
+
+def parse_rate(rate):
+    """'10/m' -> (10, 60): число запросов и период в секундах."""
+    count, period = rate.split('/')
+    return int(count), PERIODS[period]
+
+
+def client_key(request):
+    """Пользователь, а для анонимов - IP-адрес."""
+    if request.user.is_authenticated:
+        return f'user{request.user.pk}'
+    return 'ip' + request.META.get('REMOTE_ADDR', '')
+
+
+def refill(scope, ident, now, per_second):
+    """Начинает отсчет ведра заново; возвращает начало отсчета.
+
+    Если ведро уже пополняет другой запрос, ведро и так полное,
+    поэтому отсчет считается начатым в now.
+    """
+    start_key = START_KEY.format(scope, ident)
+    count_key = COUNT_KEY.format(scope, ident)
+    lock_key = REFILL_LOCK_KEY.format(scope, ident)
+    if not cache.add(lock_key, 1, REFILL_LOCK_TIMEOUT):
+        return now
+    try:
+        state = cache.get_many([start_key, count_key])
+        start = state.get(start_key)
+        count = state.get(count_key)
+        if start is None or count is None:
+            return now
+        if count > (now - start) * per_second:
+            # Ведро уже пополнил другой запрос.
+            return start
+        cache.set(start_key, now, settings.RATELIMIT_TIMEOUT)
+        if count:
+            cache.decr(count_key, count)
+    except ValueError:
+        # Ключ вытеснили: incr в hit сочтет ведро полным.
+        pass
+    finally:
+        cache.delete(lock_key)
+    return now
+
+
+def hit(scope, ident, rate):
+    """Берет жетон; возвращает 0 или через сколько секунд повторить."""
+    burst, period = parse_rate(rate)
+    per_second = burst / period
+    start_key = START_KEY.format(scope, ident)
+    count_key = COUNT_KEY.format(scope, ident)
+    now = time.time()
+    state = cache.get_many([start_key, count_key])
+    if len(state) < 2:
+        # add не перезапишет ключи, заведенные параллельным запросом.
+        cache.add(start_key, now, settings.RATELIMIT_TIMEOUT)
+        cache.add(count_key, 0, settings.RATELIMIT_TIMEOUT)
+        state = cache.get_many([start_key, count_key])
+    start = state.get(start_key, now)
+    if state.get(count_key, 0) <= (now - start) * per_second:
+        start = refill(scope, ident, now, per_second)
+    try:
+        count = cache.incr(count_key)
+    except ValueError:
+        # Ключ вытеснили между чтением и incr: считаем ведро полным.
+        return 0
+    overdraft = count - burst - (now - start) * per_second
+    if overdraft <= 0:
+        return 0
+    cache.decr(count_key)
+    return max(1, math.ceil(overdraft / per_second))
+
+
+def limit_exceeded(request, retry_after):
+    response = render(request, 'core/429.html', status=429)
+    response['Retry-After'] = str(retry_after)
+    return response
+
+
+def check(request, scope):
+    rate = settings.RATELIMITS.get(scope)
+    if rate is None:
+        return None
+    retry_after = hit(scope, client_key(request), rate)
+    if retry_after:
+        return limit_exceeded(request, retry_after)
+    return None
+
+
+def ratelimit(scope, methods=None):
+    """Декоратор: ограничивает представление лимитом области scope.
+
+    methods - ограничиваемые HTTP-методы, по умолчанию все.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if methods is None or request.method in methods:
+                response = check(request, scope)
+                if response is not None:
+                    return response
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class RateLimitMiddleware:
+    """Ограничивает POST-запросы к представлениям из RATELIMIT_VIEWS."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.method != 'POST':
+            return None
+        scope = settings.RATELIMIT_VIEWS.get(
+            request.resolver_match.view_name
+        )
+        if scope is None:
+            return None
+        return check(request, scope)
@@ -1,4 +1,26 @@
-from django.test import Client, TestCase
+import os
+import signal
+import sqlite3
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from smtplib import SMTPException
+from unittest import mock
+
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import IntegrityError, OperationalError, transaction
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from core import queue
+from core.backfill import Backfill, register
+from core.mail import drain_step
+from core.ratelimit import hit
+from core.models import BackfillCheckpoint, Job, OutgoingEmail
+from posts.models import Post, User
 
 
 class CorePagesTest(TestCase):
@@ -9,3 +31,358 @@ class CorePagesTest(TestCase):
         """Страница 404 отдает кастомный шаблон."""
         response = self.guest_client.get('/unexisting_page/')
         self.assertTemplateUsed(response, 'core/404.html')
+
+
+class DbMaintenanceCommandTest(TestCase):
+    def test_backup_and_checks(self):
+        """Команда снимает копию базы и выполняет обслуживание."""
+        out = StringIO()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'backup.sqlite3')
+            call_command(
+                'dbmaintenance',
+                backup=path,
+                pages=1,
+                step_sleep=0,
+                optimize=True,
+                analyze=True,
+                integrity='quick',
+                stdout=out
+            )
+            backup = sqlite3.connect(path)
+            tables = backup.execute(
+                "SELECT name FROM sqlite_master WHERE name = 'posts_post'"
+            ).fetchall()
+            backup.close()
+        self.assertEqual(len(tables), 1)
+        for step in ('backup', 'optimize', 'analyze', 'integrity check'):
+            with self.subTest(step=step):
+                self.assertIn(f'{step}:', out.getvalue())
+
+
+@register
+class MarkPostsBackfill(Backfill):
+    name = 'test_mark_posts'
+    model = Post
+
+    def process_batch(self, objects):
+        Post.objects.filter(
+            pk__in=[post.pk for post in objects]
+        ).update(text='обработан')
+
+
+class BackfillCommandTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        user = User.objects.create_user(username='user')
+        Post.objects.bulk_create(
+            Post(author=user, text=f'Пост {i}') for i in range(5)
+        )
+
+    def test_dry_run_changes_nothing(self):
+        """Пробный запуск оценивает объем и ничего не меняет."""
+        out = StringIO()
+        call_command(
+            'backfill', 'test_mark_posts', dry_run=True, stdout=out
+        )
+        self.assertIn('Осталось строк: 5', out.getvalue())
+        self.assertFalse(Post.objects.filter(text='обработан').exists())
+
+    def test_backfill_resumes_from_checkpoint(self):
+        """Заполнение идет кусками и продолжает с сохраненного места."""
+        first, *rest = Post.objects.order_by('pk')
+        BackfillCheckpoint.objects.create(
+            name='test_mark_posts', last_pk=first.pk
+        )
+        call_command(
+            'backfill', 'test_mark_posts',
+            batch_size=2, pause=0, stdout=StringIO()
+        )
+        checkpoint = BackfillCheckpoint.objects.get(name='test_mark_posts')
+        self.assertTrue(checkpoint.finished)
+        self.assertEqual(checkpoint.processed, len(rest))
+        self.assertEqual(
+            Post.objects.filter(text='обработан').count(), len(rest)
+        )
+
+
+@override_settings(
+    EMAIL_BACKEND='core.mail.SpoolBackend',
+    SPOOL_EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    MAIL_SPOOL_MAX_ATTEMPTS=2
+)
+class MailSpoolTest(TestCase):
+    def setUp(self):
+        User.objects.create_user(
+            username='reader', email='reader@example.com', password='pass'
+        )
+
+    def test_password_reset_is_spooled(self):
+        """Сброс пароля только ставит письмо в очередь."""
+        self.client.post(
+            reverse('users:password_reset_form'),
+            {'email': 'reader@example.com'}
+        )
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(OutgoingEmail.objects.count(), 1)
+        out = StringIO()
+        call_command('send_mail_spool', stdout=out)
+        self.assertIn('отправлено писем: 1', out.getvalue())
+        self.assertEqual(mail.outbox[0].to, ['reader@example.com'])
+        self.assertFalse(OutgoingEmail.objects.exists())
+
+    def test_failed_delivery_backs_off(self):
+        """Ошибка откладывает письмо, после лимита попыток оно снимается."""
+        mail.send_mail('Тема', 'Текст', None, ['reader@example.com'])
+        connection = mock.Mock()
+        connection.send_messages.side_effect = SMTPException('down')
+        self.assertEqual(drain_step(connection, 10), 0)
+        connection.close.assert_called_once_with()
+        connection.open.assert_called_once_with()
+        row = OutgoingEmail.objects.get()
+        self.assertEqual(row.attempts, 1)
+        self.assertGreater(row.next_attempt, timezone.now())
+        self.assertIsNone(drain_step(connection, 10))
+        OutgoingEmail.objects.update(next_attempt=timezone.now())
+        with self.assertLogs('core.mail', 'ERROR'):
+            self.assertEqual(drain_step(connection, 10), 0)
+        self.assertTrue(OutgoingEmail.objects.get().failed)
+        self.assertIsNone(drain_step(connection, 10))
+
+    def test_connection_reopened_once_per_batch(self):
+        """После ошибки соединение открывается заново один раз
+        и используется для остальных писем пачки."""
+        for _ in range(3):
+            mail.send_mail('Тема', 'Текст', None, ['reader@example.com'])
+        connection = mock.Mock()
+        connection.send_messages.side_effect = [
+            SMTPException('down'), SMTPException('down'), 1
+        ]
+        self.assertEqual(drain_step(connection, 10), 1)
+        self.assertEqual(connection.send_messages.call_count, 3)
+        connection.close.assert_called_once_with()
+        connection.open.assert_called_once_with()
+        self.assertEqual(OutgoingEmail.objects.count(), 2)
+
+    @override_settings(JOBS_DRAIN_BATCHES=1, MAIL_SPOOL_BATCH_SIZE=1)
+    def test_spool_job_is_bounded(self):
+        """Задача отправляет ограниченное число пачек, остаток - новая."""
+        for _ in range(2):
+            mail.send_mail('Тема', 'Текст', None, ['reader@example.com'])
+        self.assertEqual(queue.work(burst=True), 3)
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(
+            Job.objects.filter(name='core.send_mail_spool').count(), 3
+        )
+
+
+calls = []
+
+
+@queue.job('tests.record')
+def record(value):
+    calls.append(value)
+
+
+@queue.job('tests.fail')
+def fail():
+    raise ValueError('boom')
+
+
+@queue.job('tests.interrupt')
+def interrupt():
+    os.kill(os.getpid(), signal.SIGINT)
+    calls.append('interrupted')
+
+
+@override_settings(JOBS_MAX_ATTEMPTS=2)
+class JobQueueTest(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_claim_order(self):
+        """Сначала берутся срочные по приоритету, отложенные ждут."""
+        queue.enqueue('tests.record', value='late', delay=60)
+        queue.enqueue('tests.record', value='normal')
+        queue.enqueue('tests.record', value='urgent', priority=-1)
+        self.assertEqual(queue.work(burst=True), 2)
+        self.assertEqual(calls, ['urgent', 'normal'])
+        self.assertEqual(
+            Job.objects.get(status=Job.QUEUED).args, '{"value": "late"}'
+        )
+
+    def test_claimed_job_is_not_taken_twice(self):
+        """Взятая задача больше не выдается."""
+        queue.enqueue('tests.record', value=1)
+        job_row = queue.claim()
+        self.assertEqual(job_row.status, Job.RUNNING)
+        self.assertEqual(job_row.attempts, 1)
+        self.assertIsNone(queue.claim())
+
+    def test_unique_enqueue(self):
+        """Уникальная задача не дублируется, а переносится раньше."""
+        queue.enqueue('tests.record', value=1, delay=60, unique=True)
+        queue.enqueue('tests.record', value=1, unique=True)
+        queue.enqueue('tests.record', value=2, unique=True)
+        self.assertEqual(Job.objects.count(), 2)
+        self.assertEqual(queue.work(burst=True), 2)
+
+    def test_unique_enqueue_is_enforced_by_index(self):
+        """Вторую ждущую копию не вставить даже в обход проверки,
+        а взятая задача не мешает поставить новую."""
+        first = queue.enqueue('tests.record', value=1, unique=True)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Job.objects.create(
+                name='tests.record', args=first.args,
+                unique_key=first.unique_key
+            )
+        queue.claim()
+        self.assertIsNotNone(
+            queue.enqueue('tests.record', value=1, unique=True)
+        )
+        self.assertIsNone(
+            queue.enqueue('tests.record', value=1, unique=True)
+        )
+        self.assertEqual(Job.objects.count(), 2)
+
+    def test_failed_job_backs_off(self):
+        """Упавшая задача откладывается, после лимита помечается ошибкой."""
+        queue.enqueue('tests.fail')
+        with self.assertLogs('core.queue', 'ERROR'):
+            self.assertEqual(queue.work(burst=True), 1)
+        job_row = Job.objects.get()
+        self.assertEqual(job_row.status, Job.QUEUED)
+        self.assertGreater(job_row.run_at, timezone.now())
+        Job.objects.update(run_at=timezone.now())
+        with self.assertLogs('core.queue', 'ERROR'):
+            queue.work(burst=True)
+        job_row.refresh_from_db()
+        self.assertEqual(job_row.status, Job.FAILED)
+        self.assertIn('boom', job_row.last_error)
+
+    def test_stale_job_is_requeued(self):
+        """Задача упавшего воркера возвращается в очередь."""
+        queue.enqueue('tests.record', value=1)
+        queue.claim()
+        Job.objects.update(claimed_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(queue.work(burst=True), 1)
+        self.assertEqual(calls, [1])
+        self.assertEqual(Job.objects.get().status, Job.DONE)
+
+    def test_database_error_does_not_stop_worker(self):
+        """Занятая база не останавливает воркер: он повторяет попытку."""
+        queue.enqueue('tests.record', value=1)
+        claim = queue.claim
+        with mock.patch.object(queue, 'claim', side_effect=[
+            OperationalError('database is locked'), claim(), None
+        ]):
+            with self.assertLogs('core.queue', 'ERROR'):
+                self.assertEqual(queue.work(idle_sleep=0, burst=True), 1)
+        self.assertEqual(calls, [1])
+
+    def test_single_thread_worker_stops_on_interrupt(self):
+        """Ctrl+C в однопоточном режиме дает доделать задачу и выйти."""
+        queue.enqueue('tests.interrupt')
+        queue.enqueue('tests.record', value=1, delay=60)
+        out = StringIO()
+        call_command('runworker', threads=1, idle_sleep=0, stdout=out)
+        self.assertIn('Выполнено задач: 1', out.getvalue())
+        self.assertEqual(calls, ['interrupted'])
+        self.assertEqual(
+            Job.objects.get(name='tests.interrupt').status, Job.DONE
+        )
+
+    def test_runworker_and_admin_stats(self):
+        """Команда выполняет очередь, админка показывает ее состояние."""
+        queue.enqueue('tests.record', value=1)
+        out = StringIO()
+        call_command('runworker', threads=1, burst=True, stdout=out)
+        self.assertIn('Выполнено задач: 1', out.getvalue())
+        self.assertEqual(queue.stats()['done_last_hour'], 1)
+        admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'pass'
+        )
+        self.client.force_login(admin)
+        response = self.client.get(reverse('admin:core_job_changelist'))
+        self.assertContains(response, 'За час выполнено: 1')
+
+
+@override_settings(RATELIMITS={
+    'post_create': '2/m', 'follow': '2/m', 'signup': '1/h',
+})
+class RateLimitTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='writer')
+        self.author = User.objects.create_user(username='author')
+        self.client.force_login(self.user)
+
+    def test_bucket_refills(self):
+        """Ведро отдает burst жетонов и пополняется со временем."""
+        with mock.patch('core.ratelimit.time.time', return_value=1000.0):
+            self.assertEqual(hit('scope', 'a', '2/m'), 0)
+            self.assertEqual(hit('scope', 'a', '2/m'), 0)
+            self.assertEqual(hit('scope', 'a', '2/m'), 30)
+            self.assertEqual(hit('scope', 'b', '2/m'), 0)
+        with mock.patch('core.ratelimit.time.time', return_value=1030.0):
+            self.assertEqual(hit('scope', 'a', '2/m'), 0)
+            self.assertEqual(hit('scope', 'a', '2/m'), 30)
+        with mock.patch('core.ratelimit.time.time', return_value=2000.0):
+            self.assertEqual(hit('scope', 'a', '2/m'), 0)
+            self.assertEqual(hit('scope', 'a', '2/m'), 0)
+            self.assertGreater(hit('scope', 'a', '2/m'), 0)
+
+    def test_refill_keeps_concurrent_tokens(self):
+        """Пополнение вычитает взятые жетоны, а не обнуляет счетчик,
+        и одновременно ведро пополняет только один запрос."""
+        cache.set_many({
+            'ratelimit:scope:a:start': 0.0, 'ratelimit:scope:a:count': 1
+        })
+        set_start = cache.set
+
+        def set_during_incr(key, value, timeout):
+            set_start(key, value, timeout)
+            # Другой запрос берет жетон, пока ведро пополняется.
+            cache.incr('ratelimit:scope:a:count')
+
+        with mock.patch('core.ratelimit.time.time', return_value=1000.0):
+            with mock.patch.object(cache, 'set', set_during_incr):
+                self.assertEqual(hit('scope', 'a', '2/m'), 0)
+            self.assertEqual(hit('scope', 'a', '2/m'), 30)
+        cache.set_many({
+            'ratelimit:scope:b:start': 0.0, 'ratelimit:scope:b:count': 0
+        })
+        cache.add('ratelimit:scope:b:refill-lock', 1)
+        with mock.patch('core.ratelimit.time.time', return_value=1000.0):
+            self.assertEqual(hit('scope', 'b', '2/m'), 0)
+            self.assertEqual(hit('scope', 'b', '2/m'), 0)
+            self.assertEqual(hit('scope', 'b', '2/m'), 30)
+
+    def test_decorated_view_returns_429(self):
+        """Сверх лимита представление отвечает 429 с Retry-After."""
+        url = reverse('posts:post_create')
+        for _ in range(2):
+            self.client.post(url, {'text': 'Пост'})
+        self.assertEqual(self.client.get(url).status_code, 200)
+        response = self.client.post(url, {'text': 'Пост'})
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response['Retry-After']), 0)
+        self.assertEqual(Post.objects.count(), 2)
+
+    def test_limit_is_per_user(self):
+        """Лимит считается отдельно для каждого пользователя."""
+        url = reverse('posts:profile_follow', args=(self.author.username,))
+        for _ in range(2):
+            self.assertEqual(self.client.get(url).status_code, 302)
+        self.assertEqual(self.client.get(url).status_code, 429)
+        self.client.force_login(self.author)
+        self.assertEqual(self.client.get(url).status_code, 302)
+
+    def test_middleware_limits_signup(self):
+        """Middleware ограничивает POST регистрации по IP."""
+        self.client.logout()
+        url = reverse('users:signup')
+        self.assertNotEqual(self.client.post(url, {}).status_code, 429)
+        self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertEqual(self.client.post(url, {}).status_code, 429)
@@ -1,15 +1,57 @@
 from django.contrib import admin
 
-from .models import Group, Post
+from .deletion import schedule_post_deletion
+from .models import ContentSignature, Group, Post
+from .search import build_match, matching_ids
+
+
+def delete_in_background(modeladmin, request, queryset):
+    for post in queryset:
+        schedule_post_deletion(post)
+
+
+delete_in_background.short_description = 'Удалить в фоне'
 
 
 class PostAdmin(admin.ModelAdmin):
-    list_display = ('pk', 'text', 'pub_date', 'author', 'group',)
+    list_display = (
+        'pk', 'text', 'pub_date', 'author', 'group', 'view_count',
+    )
     list_editable = ('group',)
     search_fields = ('text',)
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
+    actions = (delete_in_background,)
+
+    def get_actions(self, request):
+        # Синхронное каскадное удаление обошло бы фоновую очистку.
+        actions = super().get_actions(request)
+        actions.pop('delete_selected', None)
+        return actions
+
+    def delete_model(self, request, obj):
+        schedule_post_deletion(obj)
+
+    def delete_queryset(self, request, queryset):
+        delete_in_background(self, request, queryset)
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term.strip():
+            return queryset, False
+        if not build_match(search_term):
+            return queryset.none(), False
+        return queryset.filter(pk__in=matching_ids(search_term)), False
+
+
+class ContentSignatureAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'kind', 'object_id', 'duplicate_of', 'created',)
+    list_filter = ('kind',)
+    exclude = ('signature',)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).filter(duplicate_of__isnull=False)
 
 
 admin.site.register(Post, PostAdmin)
+admin.site.register(ContentSignature, ContentSignatureAdmin)
 admin.site.register(Group)
@@ -1,5 +1,34 @@
 from django.apps import AppConfig
+from django.db.models.signals import (post_delete, post_migrate, post_save,
+                                      pre_delete)
 
 
 class PostsConfig(AppConfig):
     name = 'posts'
+
+    def ready(self):
+        from . import signals
+        from .models import (ArchivedComment, ArchivedPost, Comment, Follow,
+                             Group, Post, User)
+        post_migrate.connect(signals.create_search_index, sender=self)
+        post_save.connect(signals.update_user_autocomplete, sender=User)
+        post_delete.connect(signals.remove_user_autocomplete, sender=User)
+        post_save.connect(signals.update_group_autocomplete, sender=Group)
+        post_delete.connect(signals.remove_group_autocomplete, sender=Group)
+        post_save.connect(signals.update_post_tags, sender=Post)
+        pre_delete.connect(signals.remove_post_tags, sender=Post)
+        post_save.connect(signals.index_post_signature, sender=Post)
+        post_delete.connect(signals.forget_post_signature, sender=Post)
+        post_save.connect(signals.index_comment_signature, sender=Comment)
+        post_delete.connect(signals.forget_comment_signature, sender=Comment)
+        for model in (Post, ArchivedPost):
+            post_save.connect(signals.forget_post_month, sender=model)
+            post_delete.connect(signals.forget_post_month, sender=model)
+        post_save.connect(signals.forget_follow, sender=Follow)
+        post_delete.connect(signals.forget_follow, sender=Follow)
+        post_save.connect(signals.score_comment, sender=Comment)
+        post_save.connect(signals.score_follow, sender=Follow)
+        post_save.connect(signals.notify_followers, sender=Post)
+        for model in (Comment, ArchivedComment):
+            pre_delete.connect(signals.splice_replies, sender=model)
+            post_delete.connect(signals.release_reply, sender=model)
@@ -0,0 +1,132 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import (ArchivedComment, ArchivedPost, Comment, Notification,
+                     NotificationFanout, Post, PostTag, Reaction,
+                     ReactionCounter, RelatedPost, RelatedPosting)
+
+POST_FIELDS = (
+    'id', 'text', 'pub_date', 'author_id', 'group_id', 'image', 'view_count'
+)
+COMMENT_FIELDS = (
+    'id', 'post_id', 'author_id', 'text', 'created', 'parent_id', 'path',
+    'depth', 'reply_count'
+)
+
+
+def archive_cutoff(days=None):
+    if days is None:
+        days = settings.POSTS_ARCHIVE_AFTER_DAYS
+    return timezone.now() - timedelta(days=days)
+
+
+def dropped_querysets(ids):
+    """Строки горячих постов, которые в архив не переносятся.
+
+    Архивный пост показывается без реакций, тегов, похожих постов
+    и уведомлений. Дневные счетчики тегов и сигнатуры текстов
+    остаются: они описывают прошлое и ссылаются на id, а не на строку.
+    """
+    return (
+        Reaction.objects.filter(post_id__in=ids),
+        ReactionCounter.objects.filter(post_id__in=ids),
+        PostTag.objects.filter(post_id__in=ids),
+        RelatedPost.objects.filter(Q(post_id__in=ids) | Q(related_id__in=ids)),
+        RelatedPosting.objects.filter(post_id__in=ids),
+        Notification.objects.filter(post_id__in=ids),
+        NotificationFanout.objects.filter(post_id__in=ids),
+    )
+
+
+def archive_batch(cutoff, batch_size):
+    """Переносит в архив одну пачку постов старше cutoff.
+
+    Посты и комментарии копируются в архивные таблицы, строки из
+    dropped_querysets удаляются. Удаление идет прямыми DELETE без
+    каскада и сигналов: строки уже в архиве, а не удалены.
+    Возвращает количество перенесённых постов.
+    """
+    ids = list(
+        Post.objects.filter(pub_date__lt=cutoff)
+        .order_by('pk')
+        .values_list('pk', flat=True)[:batch_size]
+    )
+    if not ids:
+        return 0
+    with transaction.atomic():
+        ArchivedPost.objects.bulk_create(
+            ArchivedPost(**row) for row in
+            Post.objects.filter(pk__in=ids).values(*POST_FIELDS)
+        )
+        ArchivedComment.objects.bulk_create(
+            ArchivedComment(**row) for row in
+            Comment.objects.filter(post_id__in=ids).values(*COMMENT_FIELDS)
+        )
+        for queryset in (
+            *dropped_querysets(ids),
+            Comment.objects.filter(post_id__in=ids),
+            Post.objects.filter(pk__in=ids),
+        ):
+            queryset._raw_delete(queryset.db)
+    return len(ids)
+
+
+def archive_posts(days=None, batch_size=None):
+    """Переносит посты и их комментарии в архив пачками."""
+    cutoff = archive_cutoff(days)
+    batch_size = batch_size or settings.POSTS_ARCHIVE_BATCH_SIZE
+    total = 0
+    while True:
+        moved = archive_batch(cutoff, batch_size)
+        if not moved:
+            return total
+        total += moved
+
+
+def get_post_or_archived(post_id):
+    post = Post.objects.filter(pk=post_id).first()
+    if post is not None:
+        return post
+    return ArchivedPost.objects.filter(pk=post_id).first()
+
+
+class ArchiveChain:
+    """Горячие и архивные посты одной последовательностью для Paginator.
+
+    Архивные посты всегда старше горячих, поэтому страница берётся
+    сначала из горячей таблицы, а остаток добирается из архива.
+    """
+
+    def __init__(self, hot, cold):
+        self.hot = hot
+        self.cold = cold
+        self._hot_count = None
+
+    def hot_count(self):
+        if self._hot_count is None:
+            self._hot_count = self.hot.count()
+        return self._hot_count
+
+    def count(self):
+        return self.hot_count() + self.cold.count()
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            return self[key:key + 1][0]
+        start, stop = key.start or 0, key.stop
+        hot_count = self.hot_count()
+        items = []
+        if start < hot_count:
+            items.extend(self.hot[start:min(stop, hot_count)])
+        if stop > hot_count:
+            items.extend(
+                self.cold[max(start - hot_count, 0):stop - hot_count]
+            )
+        return items
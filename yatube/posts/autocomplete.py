@@ -0,0 +1,199 @@
+import logging
+import time
+from bisect import bisect_left
+from threading import Lock, Thread
+
+from django.conf import settings
+from django.db import DatabaseError, connection
+from django.urls import reverse
+
+from .models import Group, User
+
+logger = logging.getLogger(__name__)
+
+USER = 'user'
+GROUP = 'group'
+
+
+def user_entry(user):
+    full_name = user.get_full_name()
+    label = f'{full_name} ({user.username})' if full_name else user.username
+    keys = {user.username, full_name, user.first_name, user.last_name}
+    return keys, (label, user.username)
+
+
+def group_entry(group):
+    keys = {group.title, group.slug, *group.title.split()}
+    return keys, (group.title, group.slug)
+
+
+def entry_url(kind, value):
+    if kind == USER:
+        return reverse('posts:profile', kwargs={'username': value})
+    return reverse('posts:group_list', kwargs={'slug': value})
+
+
+class Snapshot:
+    """Отсортированный массив ключей и записи на момент сборки.
+
+    Снимок не меняется после создания: правка собирает новый,
+    поэтому читатели обходят его без блокировок.
+    """
+
+    def __init__(self, keys, entries, built_at):
+        self.keys = keys
+        self.entries = entries
+        self.built_at = built_at
+
+    def changed(self, kind, pk, keys=None, entry=None):
+        """Копия с новыми ключами объекта; без keys - без объекта."""
+        entries = dict(self.entries)
+        old = entries.pop((kind, pk), None)
+        if old is None and keys is None:
+            return self
+        stale = {(kind, key, pk) for key in old[0]} if old else set()
+        new_keys = [key for key in self.keys if key not in stale]
+        if keys is not None:
+            entries[kind, pk] = (keys, entry)
+            new_keys.extend((kind, key, pk) for key in keys)
+            new_keys.sort()
+        return Snapshot(new_keys, entries, self.built_at)
+
+
+class PrefixIndex:
+    """Отсортированный массив ключей для поиска по префиксу через bisect.
+
+    Каждый ключ - кортеж (тип, строка в нижнем регистре, id), поэтому
+    совпадения с префиксом для одного типа лежат подряд, начиная
+    с bisect_left. Индекс собирается в фоне при старте процесса
+    (см. wsgi.py) и раз в AUTOCOMPLETE_REBUILD_INTERVAL секунд: пока
+    идет сборка, поиск отвечает по прежнему снимку, и собирает его
+    только один поток. Сохранение и удаление подменяют снимок копией
+    под блокировкой, а пришедшие во время сборки применяются и к новому
+    снимку, поэтому параллельные правки не теряются.
+    """
+
+    def __init__(self):
+        self.snapshot = None
+        self.pending = None
+        self.lock = Lock()
+        self.build_lock = Lock()
+
+    def build(self):
+        with self.lock:
+            self.pending = []
+        try:
+            snapshot = self.read()
+            with self.lock:
+                for change in self.pending:
+                    snapshot = snapshot.changed(*change)
+                self.snapshot = snapshot
+        finally:
+            with self.lock:
+                self.pending = None
+
+    def read(self):
+        keys, entries = [], {}
+        users = User.objects.filter(is_active=True).only(
+            'username', 'first_name', 'last_name'
+        )
+        for kind, objects, make in ((USER, users, user_entry),
+                                    (GROUP, Group.objects.all(), group_entry)):
+            for obj in objects.iterator():
+                obj_keys, entry = make(obj)
+                obj_keys = self.normalize(obj_keys)
+                entries[kind, obj.pk] = (obj_keys, entry)
+                keys.extend((kind, key, obj.pk) for key in obj_keys)
+        keys.sort()
+        return Snapshot(keys, entries, time.monotonic())
+
+    def build_in_background(self):
+        """Запускает сборку в фоне, если ее уже не ведет другой поток."""
+        if not self.build_lock.acquire(blocking=False):
+            return False
+        Thread(target=self.build_locked, daemon=True).start()
+        return True
+
+    def build_locked(self):
+        try:
+            self.build()
+        except DatabaseError:
+            logger.exception('Не удалось собрать индекс подсказок')
+        finally:
+            self.build_lock.release()
+            connection.close()
+
+    def ensure_built(self):
+        snapshot = self.snapshot
+        if snapshot is None:
+            with self.build_lock:
+                if self.snapshot is None:
+                    self.build()
+            return
+        max_age = settings.AUTOCOMPLETE_REBUILD_INTERVAL
+        if time.monotonic() - snapshot.built_at > max_age:
+            self.build_in_background()
+
+    @staticmethod
+    def normalize(keys):
+        return {key.lower() for key in keys if key}
+
+    def change(self, kind, pk, keys=None, entry=None):
+        with self.lock:
+            if self.pending is not None:
+                self.pending.append((kind, pk, keys, entry))
+            if self.snapshot is not None:
+                self.snapshot = self.snapshot.changed(kind, pk, keys, entry)
+
+    def remove(self, kind, pk):
+        self.change(kind, pk)
+
+    def add(self, kind, pk, keys, entry):
+        self.change(kind, pk, self.normalize(keys), entry)
+
+    def update(self, kind, obj, make):
+        if kind == USER and not obj.is_active:
+            self.remove(kind, obj.pk)
+        else:
+            self.add(kind, obj.pk, *make(obj))
+
+    def scan(self, snapshot, kind, prefix, limit):
+        keys = snapshot.keys
+        position = bisect_left(keys, (kind, prefix))
+        seen, found = set(), []
+        while position < len(keys) and len(found) < limit:
+            key_kind, key, pk = keys[position]
+            position += 1
+            if key_kind != kind or not key.startswith(prefix):
+                break
+            if pk in seen:
+                continue
+            seen.add(pk)
+            entry = snapshot.entries.get((kind, pk))
+            if entry is not None:
+                label, value = entry[1]
+                found.append({
+                    'kind': kind,
+                    'id': pk,
+                    'label': label,
+                    'value': value,
+                    'url': entry_url(kind, value),
+                })
+        return found
+
+    def search(self, prefix, limit, kind=None):
+        """До limit совпадений с префиксом, по алфавиту меток."""
+        self.ensure_built()
+        prefix = prefix.strip().lower()
+        if not prefix:
+            return []
+        snapshot = self.snapshot
+        results = []
+        for key_kind in (kind,) if kind else (USER, GROUP):
+            results.extend(self.scan(snapshot, key_kind, prefix, limit))
+        if not kind:
+            results.sort(key=lambda result: result['label'].lower())
+        return results[:limit]
+
+
+index = PrefixIndex()
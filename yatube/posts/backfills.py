@@ -0,0 +1,44 @@
+from core.backfill import Backfill, register
+
+from .duplicates import index_text
+from .models import Comment, ContentSignature, Post
+from .tags import sync_post_tags
+
+
+@register
+class PostTagsBackfill(Backfill):
+    name = 'post_tags'
+    model = Post
+
+    def get_queryset(self):
+        return Post.all_objects.only('pk', 'text', 'pub_date')
+
+    def process_batch(self, objects):
+        for post in objects:
+            sync_post_tags(post)
+
+
+@register
+class PostSignaturesBackfill(Backfill):
+    name = 'post_signatures'
+    model = Post
+
+    def get_queryset(self):
+        return Post.all_objects.only('pk', 'text')
+
+    def process_batch(self, objects):
+        for post in objects:
+            index_text(ContentSignature.POST, post)
+
+
+@register
+class CommentSignaturesBackfill(Backfill):
+    name = 'comment_signatures'
+    model = Comment
+
+    def get_queryset(self):
+        return Comment.objects.only('pk', 'text')
+
+    def process_batch(self, objects):
+        for comment in objects:
+            index_text(ContentSignature.COMMENT, comment)
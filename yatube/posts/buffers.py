@@ -0,0 +1,84 @@
+"""Буферы событий в памяти процесса, которые сбрасываются задачами.
+
+Первое событие после сброса заводит таймер, поэтому буфер сбрасывается
+не позже чем через интервал, даже если процесс больше не получает
+запросов; переполненный буфер сбрасывается сразу. Сброс только ставит
+накопленное в очередь задачей, а записи делает воркер, поэтому запрос
+не ждет базу. Если поставить задачу не удалось, накопленное
+возвращается в буфер. При остановке или падении процесса теряется
+не больше одного интервала событий.
+"""
+import logging
+from threading import Lock, Timer
+
+from django.conf import settings
+from django.db import DatabaseError, connection
+
+logger = logging.getLogger(__name__)
+
+
+class ProcessBuffer:
+    """Словарь ключ -> значение с отложенным сбросом.
+
+    Наследник задает имена настроек интервала и размера, combine
+    для слияния значений одного ключа и handoff для сброса.
+    """
+
+    interval_setting = None
+    max_size_setting = None
+
+    def __init__(self):
+        self.items = {}
+        self.lock = Lock()
+        self.timer = None
+
+    def combine(self, old, new):
+        raise NotImplementedError
+
+    def handoff(self, items):
+        raise NotImplementedError
+
+    def put(self, key, value):
+        """Добавляет значение под блокировкой и заводит таймер."""
+        if key in self.items:
+            value = self.combine(self.items[key], value)
+        self.items[key] = value
+        if self.timer is None:
+            self.timer = Timer(
+                getattr(settings, self.interval_setting), self.flush_later
+            )
+            self.timer.daemon = True
+            self.timer.start()
+
+    def add(self, key, value):
+        with self.lock:
+            self.put(key, value)
+            due = len(self.items) >= getattr(settings, self.max_size_setting)
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Ставит накопленное в очередь; возвращает число ключей."""
+        with self.lock:
+            items, self.items = self.items, {}
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+        if not items:
+            return 0
+        try:
+            self.handoff(items)
+        except DatabaseError:
+            logger.exception('Не удалось сбросить буфер')
+            with self.lock:
+                for key, value in items.items():
+                    self.put(key, value)
+            return 0
+        return len(items)
+
+    def flush_later(self):
+        try:
+            self.flush()
+        finally:
+            # Таймер работает в своем потоке со своим соединением.
+            connection.close()
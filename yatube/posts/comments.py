@@ -0,0 +1,167 @@
+from django.conf import settings
+from django.db import connection
+from django.db.models import F
+from django.db.models.functions import Concat, Substr
+from django.urls import reverse
+
+from .models import PATH_END, PATH_SEGMENT
+
+MAX_INDENT = 6
+
+THREADS_SQL = """
+SELECT id FROM (
+    SELECT id, path, ROW_NUMBER() OVER (
+        PARTITION BY substr(path, 1, %s) ORDER BY path
+    ) AS position
+    FROM {table}
+    WHERE post_id = %s AND path > %s AND path < %s
+      AND depth BETWEEN 1 AND %s
+)
+WHERE position <= %s
+ORDER BY path
+"""
+
+
+def replies_url(post, comment, after=None):
+    url = reverse(
+        'posts:comment_replies',
+        kwargs={'post_id': post.pk, 'comment_id': comment.pk}
+    )
+    return f'{url}?after={after}' if after else url
+
+
+def prepare(comment):
+    comment.indent = min(comment.depth, MAX_INDENT)
+    comment.more_url = comment.continue_url = None
+    return comment
+
+
+def mark_thread(post, parent, replies):
+    """Готовит к выводу ответы parent, прочитанные с запасом в один.
+
+    Лишний ответ сверх лимита отбрасывается и дает ссылку «Ещё ответы»
+    после последнего показанного, а у комментария на нижнем уровне
+    с ответами появляется ссылка на его собственную ветку.
+    """
+    shown = [prepare(reply) for reply in
+             replies[:settings.COMMENTS_REPLIES_PAGE_SIZE]]
+    max_depth = parent.depth + settings.COMMENTS_REPLY_DEPTH
+    for reply in shown:
+        if reply.depth >= max_depth and reply.reply_count:
+            reply.more_url = replies_url(post, reply)
+    if len(replies) > len(shown):
+        shown[-1].continue_url = replies_url(post, parent, shown[-1].path)
+    return shown
+
+
+def thread_ids(model, post, roots):
+    """id ответов для корней страницы одним запросом по диапазону пути."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            THREADS_SQL.format(table=model._meta.db_table),
+            (
+                PATH_SEGMENT,
+                post.pk,
+                roots[-1].path,
+                roots[0].path + PATH_END,
+                settings.COMMENTS_REPLY_DEPTH,
+                settings.COMMENTS_REPLIES_PAGE_SIZE + 1,
+            )
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def comment_page(post, before=None, limit=None):
+    """Страница веток от новых к старым и курсор следующей.
+
+    Корни страницы идут подряд по пути, поэтому их ответы
+    (не глубже COMMENTS_REPLY_DEPTH и не больше COMMENTS_REPLIES_PAGE_SIZE
+    на ветку) читаются одним запросом по индексу (post, path).
+    """
+    limit = limit or settings.COMMENTS_PAGE_SIZE
+    comments = post.comments.select_related('author')
+    roots = comments.filter(depth=0)
+    if before:
+        roots = roots.filter(path__lt=before)
+    roots = list(roots.order_by('-path')[:limit + 1])
+    next_cursor = None
+    if len(roots) > limit:
+        roots = roots[:limit]
+        next_cursor = roots[-1].path
+    if not roots:
+        return [], next_cursor
+    ids = thread_ids(comments.model, post, roots)
+    replies = comments.in_bulk(ids)
+    threads = {}
+    for pk in ids:
+        reply = replies[pk]
+        threads.setdefault(reply.path[:PATH_SEGMENT], []).append(reply)
+    page = []
+    for root in roots:
+        page.append(prepare(root))
+        page.extend(mark_thread(post, root, threads.get(root.path, [])))
+    return page, next_cursor
+
+
+def reply_page(post, parent, after=None):
+    """Продолжение ветки parent после пути after одним запросом."""
+    replies = post.comments.select_related('author').filter(
+        path__gt=max(after or '', parent.path),
+        path__lt=parent.path + PATH_END,
+        depth__lte=parent.depth + settings.COMMENTS_REPLY_DEPTH
+    ).order_by('path')
+    return mark_thread(
+        post, parent, list(replies[:settings.COMMENTS_REPLIES_PAGE_SIZE + 1])
+    )
+
+
+def splice_out(comments):
+    """Поднимает ответы удаляемых комментариев на уровень выше.
+
+    Из путей потомков вырезается сегмент удаляемого комментария,
+    дети переходят к его родителю, а счетчик ответов родителя
+    увеличивается на число этих детей (сам комментарий из счетчика
+    вычитает сигнал удаления). Комментарии обходятся от глубоких
+    к мелким, поэтому пути предков в пачке не меняются. У скрытых
+    постов ветки удаляются целиком, и детям только обнуляется родитель.
+    Счетчик ответов удаляемого комментария обнуляется, поэтому
+    повторный вызов для него ничего не меняет.
+    """
+    if not comments:
+        return
+    model = type(comments[0])
+    post_model = model._meta.get_field('post').related_model
+    live = set(
+        post_model.objects.filter(
+            pk__in={comment.post_id for comment in comments}
+        ).values_list('pk', flat=True)
+    )
+    rows = model.objects.filter(
+        pk__in=[comment.pk for comment in comments]
+    ).values_list('pk', 'post_id', 'parent_id', 'path', 'reply_count')
+    rows = sorted(rows, key=lambda row: -len(row[3]))
+    reply_counts = {row[0]: row[4] for row in rows}
+    for pk, post_id, parent_id, path, _ in rows:
+        replies = reply_counts[pk]
+        if not replies:
+            continue
+        model.objects.filter(pk=pk).update(reply_count=0)
+        if post_id not in live:
+            model.objects.filter(parent_id=pk).update(parent_id=None)
+            continue
+        model.objects.filter(
+            post_id=post_id, path__gt=path, path__lt=path + PATH_END
+        ).update(
+            path=Concat(
+                Substr('path', 1, len(path) - PATH_SEGMENT),
+                Substr('path', len(path) + 1)
+            ),
+            depth=F('depth') - 1
+        )
+        model.objects.filter(parent_id=pk).update(parent_id=parent_id)
+        if parent_id:
+            model.objects.filter(pk=parent_id).update(
+                reply_count=F('reply_count') + replies
+            )
+            if parent_id in reply_counts:
+                reply_counts[parent_id] += replies
@@ -0,0 +1,111 @@
+import os
+from collections import deque
+from threading import Lock
+
+from django.conf import settings
+
+
+class Automaton:
+    """Автомат Ахо - Корасик: все фразы ищутся за один проход по тексту.
+
+    Переходы хранятся списком словарей по состояниям, у каждого
+    состояния есть ссылка отказа и длины фраз, которые в нем кончаются
+    (с учетом фраз, достижимых по ссылкам отказа).
+    """
+
+    def __init__(self, phrases):
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [()]
+        for phrase in phrases:
+            self.add(phrase)
+        self.link()
+
+    def add(self, phrase):
+        state = 0
+        for char in phrase:
+            next_state = self.goto[state].get(char)
+            if next_state is None:
+                next_state = len(self.goto)
+                self.goto[state][char] = next_state
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append(())
+            state = next_state
+        self.output[state] = (len(phrase),)
+
+    def link(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(char, 0)
+                self.fail[next_state] = target
+                self.output[next_state] += self.output[target]
+
+    def finditer(self, text):
+        """Пары (начало, конец) всех вхождений фраз в text."""
+        goto, fail, output = self.goto, self.fail, self.output
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for length in output[state]:
+                yield position + 1 - length, position + 1
+
+
+def normalize(text):
+    return text.casefold().replace('ё', 'е')
+
+
+def read_phrases(path):
+    with open(path, encoding='utf-8') as words:
+        phrases = {normalize(' '.join(line.split())) for line in words}
+    phrases.discard('')
+    return phrases
+
+
+class ContentFilter:
+    """Общий для всех запросов фильтр по списку CONTENT_FILTER_FILE.
+
+    Файл перечитывается, когда меняется время его изменения, поэтому
+    правка списка действует без перезапуска процесса.
+    """
+
+    def __init__(self):
+        self.automaton = Automaton(())
+        self.loaded = None
+        self.lock = Lock()
+
+    def current(self):
+        path = settings.CONTENT_FILTER_FILE
+        try:
+            version = (path, os.stat(path).st_mtime_ns)
+        except (OSError, TypeError):
+            version = (path, None)
+        if version != self.loaded:
+            with self.lock:
+                if version != self.loaded:
+                    phrases = read_phrases(path) if version[1] else ()
+                    self.automaton = Automaton(phrases)
+                    self.loaded = version
+        return self.automaton
+
+    def matches(self, text):
+        """Найденные фразы; совпадение должно стоять на границах слов."""
+        text = normalize(' '.join(text.split()))
+        found = []
+        for start, end in self.current().finditer(text):
+            before = text[start - 1] if start else ' '
+            after = text[end] if end < len(text) else ' '
+            if not before.isalnum() and not after.isalnum():
+                found.append(text[start:end])
+        return found
+
+
+content_filter = ContentFilter()
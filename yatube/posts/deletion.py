@@ -0,0 +1,123 @@
+from django.db import transaction
+from django.db.models import Q
+from sorl.thumbnail import delete as delete_image
+
+from core.queue import enqueue
+
+from .autocomplete import USER
+from .autocomplete import index as autocomplete_index
+from .comments import splice_out
+from .models import (ArchivedComment, ArchivedPost, Comment, Follow,
+                     FollowSuggestion, GroupFollow, Notification,
+                     NotificationFanout, NotificationState, PendingDeletion,
+                     Post, Reaction, ReactionCounter, User)
+from .months import forget_month, forget_months
+from .reactions import release_reactions
+
+
+def schedule_post_deletion(post):
+    """Сразу скрывает пост, а строки удаляет фоновая команда."""
+    with transaction.atomic():
+        Post.all_objects.filter(pk=post.pk).update(is_deleted=True)
+        forget_month(post.pub_date)
+        PendingDeletion.objects.get_or_create(
+            kind=PendingDeletion.POST, object_id=post.pk
+        )
+        enqueue('posts.purge_deleted', priority=1, unique=True)
+    post.is_deleted = True
+
+
+def schedule_user_deletion(user):
+    """Сразу блокирует пользователя и скрывает все его посты."""
+    with transaction.atomic():
+        User.objects.filter(pk=user.pk).update(is_active=False)
+        Post.all_objects.filter(author=user).update(is_deleted=True)
+        ArchivedPost.all_objects.filter(author=user).update(is_deleted=True)
+        forget_months(Post.all_objects.filter(author=user))
+        forget_months(ArchivedPost.all_objects.filter(author=user))
+        PendingDeletion.objects.get_or_create(
+            kind=PendingDeletion.USER, object_id=user.pk
+        )
+        enqueue('posts.purge_deleted', priority=1, unique=True)
+    user.is_active = False
+    autocomplete_index.remove(USER, user.pk)
+
+
+def dependent_querysets(pending):
+    """Наборы строк, которые удаляются по очереди до самого объекта."""
+    if pending.kind == PendingDeletion.POST:
+        return (
+            Comment.objects.filter(post_id=pending.object_id),
+            Reaction.objects.filter(post_id=pending.object_id),
+            ReactionCounter.objects.filter(post_id=pending.object_id),
+            NotificationFanout.objects.filter(post_id=pending.object_id),
+            Notification.objects.filter(post_id=pending.object_id),
+            Post.all_objects.filter(pk=pending.object_id),
+        )
+    author = pending.object_id
+    return (
+        Follow.objects.filter(Q(user_id=author) | Q(author_id=author)),
+        GroupFollow.objects.filter(user_id=author),
+        FollowSuggestion.objects.filter(
+            Q(user_id=author) | Q(author_id=author)
+        ),
+        Comment.objects.filter(
+            Q(author_id=author) | Q(post__author_id=author)
+        ),
+        ArchivedComment.objects.filter(
+            Q(author_id=author) | Q(post__author_id=author)
+        ),
+        Reaction.objects.filter(
+            Q(user_id=author) | Q(post__author_id=author)
+        ),
+        ReactionCounter.objects.filter(post__author_id=author),
+        NotificationFanout.objects.filter(post__author_id=author),
+        Notification.objects.filter(
+            Q(user_id=author) | Q(post__author_id=author)
+        ),
+        NotificationState.objects.filter(user_id=author),
+        Post.all_objects.filter(author_id=author),
+        ArchivedPost.all_objects.filter(author_id=author),
+        User.objects.filter(pk=author),
+    )
+
+
+# Что сделать со строками пачки до их удаления.
+BEFORE_DELETE = {
+    Comment: splice_out,
+    ArchivedComment: splice_out,
+    Reaction: release_reactions,
+}
+
+
+def delete_batch(queryset, batch_size):
+    batch = list(queryset.order_by('pk')[:batch_size])
+    if not batch:
+        return 0
+    if queryset.model in BEFORE_DELETE:
+        BEFORE_DELETE[queryset.model](batch)
+    images = [obj.image for obj in batch if getattr(obj, 'image', None)]
+    queryset.model._base_manager.filter(
+        pk__in=[obj.pk for obj in batch]
+    ).delete()
+    transaction.on_commit(
+        lambda: [delete_image(image) for image in images]
+    )
+    return len(batch)
+
+
+def purge_step(batch_size):
+    """Удаляет не больше batch_size строк из самой старой очереди.
+
+    Возвращает число удаленных строк или None, если очередь пуста.
+    """
+    with transaction.atomic():
+        pending = PendingDeletion.objects.select_for_update().first()
+        if pending is None:
+            return None
+        for queryset in dependent_querysets(pending):
+            removed = delete_batch(queryset, batch_size)
+            if removed:
+                return removed
+        pending.delete()
+        return 0
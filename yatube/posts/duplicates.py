@@ -0,0 +1,150 @@
+import random
+import re
+from array import array
+from hashlib import blake2b
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import ContentBand, ContentSignature
+
+NUM_HASHES = 64
+BANDS = 16
+ROWS = NUM_HASHES // BANDS
+MERSENNE = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+SHINGLE_WORDS = 3
+SHINGLE_CHARS = 4
+WORD = re.compile(r'\w+')
+
+_random = random.Random(20220328)
+PERMUTATIONS = [
+    (_random.randrange(1, MERSENNE), _random.randrange(0, MERSENNE))
+    for _ in range(NUM_HASHES)
+]
+
+
+def hash64(value):
+    return int.from_bytes(
+        blake2b(value.encode(), digest_size=8).digest(), 'little'
+    )
+
+
+def shingles(text):
+    """Словные триграммы, а для коротких текстов - символьные."""
+    words = WORD.findall(text.lower())
+    if len(words) >= SHINGLE_WORDS:
+        return {
+            ' '.join(words[i:i + SHINGLE_WORDS])
+            for i in range(len(words) - SHINGLE_WORDS + 1)
+        }
+    joined = ' '.join(words)
+    if len(joined) <= SHINGLE_CHARS:
+        return {joined} if joined else set()
+    return {
+        joined[i:i + SHINGLE_CHARS]
+        for i in range(len(joined) - SHINGLE_CHARS + 1)
+    }
+
+
+def signature(text):
+    """MinHash-сигнатура текста: NUM_HASHES минимумов 32-битных хешей."""
+    hashes = [hash64(shingle) for shingle in shingles(text)]
+    if not hashes:
+        return None
+    return array('I', (
+        min(((a * value + b) % MERSENNE) & MAX_HASH for value in hashes)
+        for a, b in PERMUTATIONS
+    ))
+
+
+def band_buckets(sig):
+    """По одному ключу на полосу; номер полосы входит в хеш ключа."""
+    return [
+        int.from_bytes(
+            blake2b(
+                bytes([band]) + sig[band * ROWS:(band + 1) * ROWS].tobytes(),
+                digest_size=8
+            ).digest(),
+            'little',
+            signed=True
+        )
+        for band in range(BANDS)
+    ]
+
+
+def load_signature(data):
+    sig = array('I')
+    sig.frombytes(bytes(data))
+    return sig
+
+
+def similarity(first, second):
+    """Оценка коэффициента Жаккара по доле совпавших минимумов."""
+    return sum(a == b for a, b in zip(first, second)) / NUM_HASHES
+
+
+def find_duplicate(kind, sig, exclude=None):
+    """id самого похожего текста того же типа или None.
+
+    Кандидаты берутся одним запросом по индексу (kind, bucket),
+    затем их сигнатуры сравниваются с порогом DUPLICATE_THRESHOLD.
+    """
+    if sig is None:
+        return None
+    candidates = ContentBand.objects.filter(
+        kind=kind, bucket__in=band_buckets(sig)
+    ).exclude(object_id=exclude).values_list('object_id', flat=True)
+    candidates = set(candidates[:settings.DUPLICATE_MAX_CANDIDATES])
+    best, best_score = None, settings.DUPLICATE_THRESHOLD
+    for object_id, data in ContentSignature.objects.filter(
+        kind=kind, object_id__in=candidates
+    ).values_list('object_id', 'signature'):
+        score = similarity(sig, load_signature(data))
+        if score >= best_score:
+            best, best_score = object_id, score
+    return best
+
+
+def index_signature(kind, object_id, sig, duplicate_of=None):
+    with transaction.atomic():
+        forget_signature(kind, object_id)
+        if sig is None:
+            return
+        ContentSignature.objects.create(
+            kind=kind,
+            object_id=object_id,
+            signature=sig.tobytes(),
+            duplicate_of=duplicate_of
+        )
+        ContentBand.objects.bulk_create(
+            ContentBand(kind=kind, object_id=object_id, bucket=bucket)
+            for bucket in band_buckets(sig)
+        )
+
+
+def forget_signature(kind, object_id):
+    ContentSignature.objects.filter(kind=kind, object_id=object_id).delete()
+    ContentBand.objects.filter(kind=kind, object_id=object_id).delete()
+
+
+def stored_signature(kind, object_id):
+    data = ContentSignature.objects.filter(
+        kind=kind, object_id=object_id
+    ).values_list('signature', flat=True).first()
+    return data and bytes(data)
+
+
+def index_text(kind, obj, sig=None, created=True):
+    """Сохраняет сигнатуру и помечает текст, если он почти дубликат.
+
+    У сохраненного заново объекта сигнатура сначала сверяется
+    с записанной: если текст не менялся, полосы не переписываются.
+    """
+    if sig is None:
+        sig = signature(obj.text)
+    if not created and stored_signature(kind, obj.pk) == (
+        sig and sig.tobytes()
+    ):
+        return
+    index_signature(kind, obj.pk, sig, find_duplicate(kind, sig, obj.pk))
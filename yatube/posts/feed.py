@@ -0,0 +1,91 @@
+import heapq
+
+from django.db import connection
+
+from .follow_cache import get_followees
+from .models import GroupFollow, Post
+from .tags import make_cursor, parse_cursor
+
+# Столько потоков собирается в один запрос UNION ALL.
+STREAMS_PER_QUERY = 100
+
+
+def stream_sql(column, cursor, size):
+    """Подзапрос: size последних постов одного автора или группы.
+
+    Идет по индексу (column, pub_date) и читает не больше size строк.
+    """
+    sql = (
+        f'SELECT * FROM (SELECT id, pub_date FROM {Post._meta.db_table} '
+        f'WHERE {column} = %s AND NOT is_deleted'
+    )
+    params = []
+    if cursor is not None:
+        pub_date, post_id = cursor
+        pub_date = connection.ops.adapt_datetimefield_value(pub_date)
+        sql += ' AND (pub_date < %s OR (pub_date = %s AND id < %s))'
+        params = [pub_date, pub_date, post_id]
+    sql += f' ORDER BY pub_date DESC, id DESC LIMIT {int(size)})'
+    return sql, params
+
+
+def read_streams(streams, cursor, size):
+    """Строки (pub_date, id) всех потоков от новых к старым без повторов.
+
+    Каждый поток ограничен size строками, поэтому запрос читает
+    не больше size строк на подписку и не сортирует их ленты целиком.
+    """
+    parts, params = [], []
+    for column, value in streams:
+        sql, stream_params = stream_sql(column, cursor, size)
+        parts.append(sql)
+        params.extend([value, *stream_params])
+    sql = (
+        'SELECT DISTINCT pub_date, id FROM ('
+        + ' UNION ALL '.join(parts)
+        + f') ORDER BY pub_date DESC, id DESC LIMIT {int(size)}'
+    )
+    with connection.cursor() as db_cursor:
+        db_cursor.execute(sql, params)
+        return db_cursor.fetchall()
+
+
+def personal_feed(user, before=None, limit=10):
+    """Страница ленты подписок на авторов и группы и курсор следующей.
+
+    Из каждой ленты автора и группы берется не больше limit + 1 постов
+    по ключу (pub_date, id), потоки по STREAMS_PER_QUERY сливаются
+    одним запросом, а результаты запросов - кучей. Пост автора
+    из подписанной группы приходит из двух потоков и выводится один раз.
+    """
+    streams = [
+        ('author_id', author_id) for author_id in get_followees(user.pk)
+    ]
+    streams.extend(
+        ('group_id', group_id)
+        for group_id in GroupFollow.objects.filter(user=user).values_list(
+            'group_id', flat=True
+        )
+    )
+    if not streams:
+        return [], None
+    cursor = parse_cursor(before)
+    size = limit + 1
+    merged = heapq.merge(
+        *(read_streams(streams[start:start + STREAMS_PER_QUERY], cursor, size)
+          for start in range(0, len(streams), STREAMS_PER_QUERY)),
+        reverse=True
+    )
+    ids = []
+    for _, post_id in merged:
+        if not ids or ids[-1] != post_id:
+            ids.append(post_id)
+        if len(ids) == size:
+            break
+    posts = Post.objects.select_related('author', 'group').in_bulk(ids)
+    page = [posts[pk] for pk in ids if pk in posts]
+    next_cursor = None
+    if len(page) > limit:
+        page = page[:limit]
+        next_cursor = make_cursor(page[-1].pub_date, page[-1].pk)
+    return page, next_cursor
@@ -0,0 +1,96 @@
+"""Кеш подписок пользователя: отсортированный массив id авторов.
+
+Массив лежит под ключом с версией. Подписка или отписка не правит
+массив, а после фиксации увеличивает версию атомарным incr, поэтому
+параллельные изменения не теряются, а читатель, успевший прочитать
+из базы старые подписки, пишет их под уже неиспользуемую версию.
+Кеш нужен только для чтения: изменения всегда идут в базу.
+"""
+import time
+from array import array
+from bisect import bisect_left
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Follow
+
+VERSION_KEY = 'followees-version:{}'
+KEY = 'followees:{}:{}'
+
+
+def current_version(user_id):
+    key = VERSION_KEY.format(user_id)
+    version = cache.get(key)
+    if version is None:
+        # Вытесненная версия начинается заново с большего числа,
+        # чтобы не попасть на старые массивы.
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def load_followees(user_id, version=None):
+    followees = array('l', sorted(set(
+        Follow.objects.filter(user_id=user_id).values_list(
+            'author_id', flat=True
+        )
+    )))
+    store(user_id, followees, version)
+    return followees
+
+
+def store(user_id, followees, version=None):
+    """Кладет массив в кеш только после фиксации транзакции.
+
+    Иначе после отката в кеше остались бы подписки, которых нет в базе.
+    """
+    if version is None:
+        version = current_version(user_id)
+    data = followees.tobytes()
+    transaction.on_commit(lambda: cache.set(
+        KEY.format(user_id, version), data, settings.FOLLOW_CACHE_TIMEOUT
+    ))
+
+
+def cached_followees(user_id, version=None):
+    if version is None:
+        version = current_version(user_id)
+    data = cache.get(KEY.format(user_id, version))
+    if data is None:
+        return None
+    followees = array('l')
+    followees.frombytes(data)
+    return followees
+
+
+def get_followees(user_id):
+    """Отсортированный массив id авторов, на которых подписан user_id."""
+    version = current_version(user_id)
+    followees = cached_followees(user_id, version)
+    if followees is None:
+        followees = load_followees(user_id, version)
+    return followees
+
+
+def contains(followees, author_id):
+    position = bisect_left(followees, author_id)
+    return position < len(followees) and followees[position] == author_id
+
+
+def is_following(user_id, author_id):
+    return contains(get_followees(user_id), author_id)
+
+
+def bump_version(user_id):
+    key = VERSION_KEY.format(user_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns(), None)
+
+
+def forget_followees(user_id):
+    """Делает закешированный массив недействительным после фиксации."""
+    transaction.on_commit(lambda: bump_version(user_id))
@@ -1,12 +1,55 @@
 from django import forms
+from django.conf import settings
+from django.urls import reverse_lazy
 
-from .models import Comment, Post
+from .content_filter import content_filter
+from .duplicates import find_duplicate, signature
+from .models import Comment, ContentSignature, Post
+from .widgets import LazyGroupSelect
 
 
-class PostForm(forms.ModelForm):
+class ContentCheckMixin:
+    """Проверяет текст по стоп-списку и на почти дубликаты.
+
+    MinHash-сигнатура сохраняется в экземпляре, чтобы сигнал post_save
+    не считал ее повторно.
+    """
+    duplicate_kind = None
+
+    def clean_text(self):
+        text = self.cleaned_data['text']
+        blocked = content_filter.matches(text)
+        if blocked:
+            raise forms.ValidationError(
+                'Текст содержит запрещенные фразы: %(phrases)s',
+                params={'phrases': ', '.join(sorted(set(blocked)))}
+            )
+        sig = signature(text)
+        duplicate = find_duplicate(self.duplicate_kind, sig, self.instance.pk)
+        if duplicate is not None and settings.DUPLICATES_ACTION == 'reject':
+            raise forms.ValidationError(
+                'Почти такой же текст уже опубликован.'
+            )
+        self.instance._content_signature = sig
+        return text
+
+
+class PostForm(ContentCheckMixin, forms.ModelForm):
+    duplicate_kind = ContentSignature.POST
+
+    def __init__(self, *args, recent_groups=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['group'].widget.recent = list(recent_groups)
+
     class Meta:
         model = Post
         fields = ('text', 'group', 'image')
+        widgets = {
+            'group': LazyGroupSelect(attrs={
+                'class': 'form-control',
+                'data-options-url': reverse_lazy('posts:group_options'),
+            }),
+        }
         labels = {
             'text': 'Текст',
             'group': 'Группа',
@@ -19,7 +62,9 @@ class PostForm(forms.ModelForm):
         }
 
 
-class CommentForm(forms.ModelForm):
+class CommentForm(ContentCheckMixin, forms.ModelForm):
+    duplicate_kind = ContentSignature.COMMENT
+
     class Meta:
         model = Comment
         fields = {'text'}
@@ -0,0 +1,61 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+
+from .autocomplete import GROUP
+from .autocomplete import index as autocomplete_index
+from .models import Group
+
+
+def recent_groups_key(user):
+    return f'recent_groups:{user.pk}'
+
+
+def recent_groups(user):
+    """Недавно выбранные пользователем группы: список (id, название)."""
+    return cache.get(recent_groups_key(user), [])
+
+
+def remember_group(user, group):
+    if group is None:
+        return
+    recent = [item for item in recent_groups(user) if item[0] != group.pk]
+    recent.insert(0, (group.pk, group.title))
+    cache.set(
+        recent_groups_key(user),
+        recent[:settings.RECENT_GROUPS_LIMIT],
+        settings.RECENT_GROUPS_TIMEOUT
+    )
+
+
+def parse_cursor(value):
+    try:
+        title, pk = value.rsplit('_', 1)
+        return title, int(pk)
+    except (AttributeError, ValueError):
+        return None
+
+
+def group_options(query='', after=None, limit=None):
+    """Страница вариантов для выбора группы и курсор следующей.
+
+    С запросом варианты берутся из префиксного индекса, без запроса -
+    из таблицы по индексу (title, id) начиная с курсора.
+    """
+    limit = limit or settings.GROUP_OPTIONS_PAGE_SIZE
+    if query:
+        return [
+            {'id': item['id'], 'title': item['label'], 'slug': item['value']}
+            for item in autocomplete_index.search(query, limit, GROUP)
+        ], None
+    groups = Group.objects.order_by('title', 'pk')
+    cursor = parse_cursor(after)
+    if cursor is not None:
+        title, pk = cursor
+        groups = groups.filter(Q(title__gt=title) | Q(title=title, pk__gt=pk))
+    page = list(groups.values('id', 'title', 'slug')[:limit + 1])
+    next_cursor = None
+    if len(page) > limit:
+        page = page[:limit]
+        next_cursor = f'{page[-1]["title"]}_{page[-1]["id"]}'
+    return page, next_cursor
@@ -0,0 +1,69 @@
+import time
+
+from django.conf import settings
+from sorl.thumbnail import get_thumbnail
+
+from core.queue import enqueue, job
+
+from .deletion import purge_step
+from .models import Post
+from .notifications import fanout_step
+from .popular import fold
+from .view_counts import apply_counts
+
+# Миниатюра, которую выводят ленты и страница поста.
+THUMBNAIL_GEOMETRY = '960x339'
+THUMBNAIL_OPTIONS = {'crop': 'center', 'upscale': True}
+
+
+def drain(name, step, batch_size, pause, priority=0):
+    """Выполняет не больше JOBS_DRAIN_BATCHES пачек, остаток ставит
+    в очередь, чтобы задача не пережила срок аренды."""
+    for _ in range(settings.JOBS_DRAIN_BATCHES):
+        done = step(batch_size)
+        if done is None:
+            return
+        if done and pause:
+            time.sleep(pause)
+    enqueue(name, priority=priority, unique=True)
+
+
+@job('posts.thumbnails')
+def make_thumbnails(post_id):
+    """Заранее готовит миниатюру, чтобы ее не резала первая страница."""
+    post = Post.all_objects.filter(pk=post_id).first()
+    if post is not None and post.image:
+        get_thumbnail(post.image, THUMBNAIL_GEOMETRY, **THUMBNAIL_OPTIONS)
+
+
+@job('posts.purge_deleted')
+def purge_deleted():
+    drain(
+        'posts.purge_deleted',
+        purge_step,
+        settings.POSTS_PURGE_BATCH_SIZE,
+        settings.POSTS_PURGE_PAUSE,
+        priority=1
+    )
+
+
+@job('posts.fanout_notifications')
+def fanout_notifications():
+    drain(
+        'posts.fanout_notifications',
+        fanout_step,
+        settings.NOTIFICATIONS_BATCH_SIZE,
+        settings.NOTIFICATIONS_PAUSE
+    )
+
+
+@job('posts.fold_popular')
+def fold_popular(events):
+    """Вливает буфер популярности; занятую пачку откладывает."""
+    if not fold(events):
+        enqueue('posts.fold_popular', delay=1, events=events)
+
+
+@job('posts.flush_view_counts')
+def flush_view_counts(counts):
+    apply_counts(counts)
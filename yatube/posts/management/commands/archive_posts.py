@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.archive import archive_posts
+
+
+class Command(BaseCommand):
+    help = 'Переносит старые посты и их комментарии в архивные таблицы.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=settings.POSTS_ARCHIVE_AFTER_DAYS,
+            help='Возраст поста в днях, после которого он уходит в архив.'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.POSTS_ARCHIVE_BATCH_SIZE,
+            help='Сколько постов переносить за одну транзакцию.'
+        )
+
+    def handle(self, *args, **options):
+        total = archive_posts(options['days'], options['batch_size'])
+        self.stdout.write(f'Перенесено в архив постов: {total}')
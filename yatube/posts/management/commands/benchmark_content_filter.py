@@ -0,0 +1,56 @@
+import random
+import string
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.content_filter import Automaton
+
+
+class Command(BaseCommand):
+    help = 'Измеряет скорость фильтра стоп-фраз в МБ/с.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--phrases', type=int, default=5000)
+        parser.add_argument(
+            '--size',
+            type=float,
+            default=4,
+            help='Объем текста в мегабайтах.'
+        )
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        letters = string.ascii_lowercase
+
+        def word():
+            return ''.join(rng.choices(letters, k=rng.randint(3, 9)))
+
+        phrases = {
+            ' '.join(word() for _ in range(rng.randint(1, 3)))
+            for _ in range(options['phrases'])
+        }
+        started = time.perf_counter()
+        automaton = Automaton(phrases)
+        built = time.perf_counter() - started
+        size = int(options['size'] * 1024 * 1024)
+        words = [word() for _ in range(10000)] + list(phrases)[:100]
+        chunks, length = [], 0
+        while length < size:
+            chunk = rng.choice(words)
+            chunks.append(chunk)
+            length += len(chunk) + 1
+        text = ' '.join(chunks)[:size]
+        started = time.perf_counter()
+        found = sum(1 for _ in automaton.finditer(text))
+        elapsed = time.perf_counter() - started
+        megabytes = len(text.encode()) / 1024 / 1024
+        self.stdout.write(
+            f'Фраз: {len(phrases)}, состояний: {len(automaton.goto)}, '
+            f'построение: {built:.3f} с'
+        )
+        self.stdout.write(
+            f'Текст: {megabytes:.2f} МБ, совпадений: {found}, '
+            f'{megabytes / elapsed:.2f} МБ/с'
+        )
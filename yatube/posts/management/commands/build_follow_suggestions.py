@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from posts.suggestions import rebuild_suggestions
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает подсказки «на кого подписаться» по графу подписок.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, help='Подсказок на одного.')
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            help='Пользователей в одной транзакции записи.'
+        )
+        parser.add_argument(
+            '--max-fanout',
+            type=int,
+            help='Не обходить подписчиков авторов популярнее этого.'
+        )
+
+    def handle(self, *args, **options):
+        users = rebuild_suggestions(
+            limit=options['limit'],
+            chunk_size=options['chunk_size'],
+            max_fanout=options['max_fanout']
+        )
+        self.stdout.write(f'Пересчитано пользователей: {users}')
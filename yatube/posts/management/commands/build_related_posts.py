@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from posts.related import rebuild_related
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает похожие посты по TF-IDF.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Пересчитать все посты, а не только новые.'
+        )
+        parser.add_argument('--limit', type=int, help='Соседей на пост.')
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            help='Постов в одной транзакции записи.'
+        )
+
+    def handle(self, *args, **options):
+        processed = rebuild_related(
+            full=options['full'],
+            limit=options['limit'],
+            chunk_size=options['chunk_size']
+        )
+        self.stdout.write(f'Пересчитано постов: {processed}')
@@ -0,0 +1,104 @@
+from itertools import groupby
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+
+from posts.duplicates import load_signature, similarity
+from posts.models import ContentBand, ContentSignature
+
+
+class UnionFind:
+    def __init__(self):
+        self.parent = {}
+
+    def find(self, item):
+        parent = self.parent.setdefault(item, item)
+        if parent != item:
+            parent = self.parent[item] = self.find(parent)
+        return parent
+
+    def union(self, first, second):
+        first, second = self.find(first), self.find(second)
+        if first != second:
+            self.parent[max(first, second)] = min(first, second)
+
+    def clusters(self):
+        groups = {}
+        for item in self.parent:
+            groups.setdefault(self.find(item), []).append(item)
+        return [sorted(group) for group in groups.values() if len(group) > 1]
+
+
+class Command(BaseCommand):
+    help = 'Группирует уже сохраненные почти дубликаты постов и комментариев.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--kind',
+            choices=[kind for kind, _ in ContentSignature.KIND_CHOICES],
+            default=ContentSignature.POST
+        )
+        parser.add_argument(
+            '--threshold',
+            type=float,
+            default=None,
+            help='Минимальная оценка сходства (по умолчанию из настроек).'
+        )
+        parser.add_argument(
+            '--flag',
+            action='store_true',
+            help='Пометить тексты кластера как дубликаты самого раннего.'
+        )
+
+    def merge_bucket(self, ids, signatures, clusters, threshold):
+        """Сравнивает каждый текст корзины только с представителями
+        уже найденных в ней кластеров, а не со всеми текстами.
+
+        В корзине волны спама почти все тексты попадают в один кластер,
+        поэтому сравнений выходит порядка размера корзины.
+        """
+        representatives = {}
+        for pk in ids:
+            if clusters.find(pk) in representatives:
+                continue
+            for root, member in representatives.items():
+                if similarity(
+                    signatures[pk], signatures[member]
+                ) >= threshold:
+                    clusters.union(pk, root)
+                    del representatives[root]
+                    representatives[clusters.find(pk)] = member
+                    break
+            else:
+                representatives[clusters.find(pk)] = pk
+
+    def handle(self, *args, **options):
+        kind = options['kind']
+        threshold = options['threshold'] or settings.DUPLICATE_THRESHOLD
+        shared = ContentBand.objects.filter(kind=kind).values(
+            'bucket'
+        ).annotate(size=Count('id')).filter(size__gt=1).values('bucket')
+        rows = ContentBand.objects.filter(
+            kind=kind, bucket__in=shared
+        ).order_by('bucket', 'object_id').values_list('bucket', 'object_id')
+        signatures = {}
+        clusters = UnionFind()
+        for _, group in groupby(rows.iterator(), key=lambda row: row[0]):
+            ids = [object_id for _, object_id in group]
+            missing = [pk for pk in ids if pk not in signatures]
+            signatures.update(
+                (pk, load_signature(data))
+                for pk, data in ContentSignature.objects.filter(
+                    kind=kind, object_id__in=missing
+                ).values_list('object_id', 'signature')
+            )
+            self.merge_bucket(ids, signatures, clusters, threshold)
+        found = clusters.clusters()
+        for cluster in found:
+            self.stdout.write(' '.join(map(str, cluster)))
+            if options['flag']:
+                ContentSignature.objects.filter(
+                    kind=kind, object_id__in=cluster[1:]
+                ).update(duplicate_of=cluster[0])
+        self.stdout.write(f'Кластеров: {len(found)}')
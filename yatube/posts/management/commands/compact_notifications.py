@@ -0,0 +1,41 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.notifications import compact_step
+
+
+class Command(BaseCommand):
+    help = 'Удаляет старые уведомления небольшими пачками.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=settings.NOTIFICATIONS_KEEP_DAYS,
+            help='Сколько дней хранить уведомления.'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.NOTIFICATIONS_BATCH_SIZE,
+            help='Сколько строк удалять в одной транзакции.'
+        )
+        parser.add_argument(
+            '--pause',
+            type=float,
+            default=settings.NOTIFICATIONS_PAUSE,
+            help='Пауза в секундах между пачками.'
+        )
+
+    def handle(self, *args, **options):
+        removed = 0
+        while True:
+            step = compact_step(options['days'], options['batch_size'])
+            removed += step
+            if step < options['batch_size']:
+                break
+            if options['pause']:
+                time.sleep(options['pause'])
+        self.stdout.write(f'Удалено уведомлений: {removed}')
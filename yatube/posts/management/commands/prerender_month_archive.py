@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from posts.models import ArchivedPost, Group, Post, User
+from posts.months import is_closed_month, render_month_page, scope_filter
+
+
+def closed_months(**scope):
+    months = set()
+    for model in (Post, ArchivedPost):
+        for day in model.objects.filter(**scope).dates('pub_date', 'month'):
+            if is_closed_month(day.year, day.month):
+                months.add((day.year, day.month))
+    return sorted(months, reverse=True)
+
+
+class Command(BaseCommand):
+    help = 'Заранее кладёт в кэш страницы помесячного архива.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--groups',
+            action='store_true',
+            help='Также отрисовать архивы групп.'
+        )
+        parser.add_argument(
+            '--authors',
+            action='store_true',
+            help='Также отрисовать архивы авторов.'
+        )
+
+    def handle(self, *args, **options):
+        scopes = [{}]
+        if options['groups']:
+            scopes.extend({'group': group} for group in Group.objects.all())
+        if options['authors']:
+            scopes.extend(
+                {'author': author} for author in
+                User.objects.filter(
+                    Q(posts__isnull=False) | Q(archived_posts__isnull=False)
+                ).distinct()
+            )
+        pages = 0
+        for scope in scopes:
+            for year, month in closed_months(**scope_filter(**scope)):
+                number, num_pages = 1, 1
+                while number <= num_pages:
+                    page = render_month_page(year, month, number, **scope)
+                    num_pages = page['num_pages']
+                    number += 1
+                    pages += 1
+        self.stdout.write(f'Отрисовано страниц архива: {pages}')
@@ -0,0 +1,42 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.deletion import purge_step
+
+
+class Command(BaseCommand):
+    help = 'Удаляет помеченных пользователей и посты небольшими пачками.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.POSTS_PURGE_BATCH_SIZE,
+            help='Сколько строк удалять в одной транзакции.'
+        )
+        parser.add_argument(
+            '--pause',
+            type=float,
+            default=settings.POSTS_PURGE_PAUSE,
+            help='Пауза в секундах между пачками.'
+        )
+        parser.add_argument(
+            '--max-batches',
+            type=int,
+            default=0,
+            help='Остановиться после N пачек (0 - пока очередь не пуста).'
+        )
+
+    def handle(self, *args, **options):
+        batches = removed = 0
+        while not options['max_batches'] or batches < options['max_batches']:
+            step = purge_step(options['batch_size'])
+            if step is None:
+                break
+            batches += 1
+            removed += step
+            if step and options['pause']:
+                time.sleep(options['pause'])
+        self.stdout.write(f'Пачек: {batches}, удалено строк: {removed}')
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+
+from posts.digest import PERIODS, Digest
+
+
+class Command(BaseCommand):
+    help = 'Рассылает дайджест новых постов из подписок.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--period',
+            choices=sorted(PERIODS),
+            default='daily',
+            help='За какой период собирать посты.'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            help='Пользователей в одном куске.'
+        )
+        parser.add_argument(
+            '--pause',
+            type=float,
+            default=0,
+            help='Пауза в секундах между кусками.'
+        )
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            help='Начать рассылку за этот период заново.'
+        )
+
+    def handle(self, *args, **options):
+        digest = Digest(
+            options['period'],
+            chunk_size=options['chunk_size'],
+            pause=options['pause']
+        )
+        sent = digest.run(reset=options['reset'])
+        self.stdout.write(f'{digest.name}: отправлено писем {sent}')
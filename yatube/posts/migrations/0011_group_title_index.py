@@ -0,0 +1,17 @@
+# Generated by Django 2.2.16 on 2026-10-19 10:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0010_deletion'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='group',
+            index=models.Index(fields=['title', 'id'], name='posts_group_title_743965_idx'),
+        ),
+    ]
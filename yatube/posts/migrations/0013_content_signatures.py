@@ -0,0 +1,46 @@
+# Generated by Django 2.2.16 on 2026-10-19 10:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0012_tags'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContentBand',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=10)),
+                ('object_id', models.PositiveIntegerField()),
+                ('bucket', models.BigIntegerField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ContentSignature',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('post', 'Пост'), ('comment', 'Комментарий')], max_length=10)),
+                ('object_id', models.PositiveIntegerField()),
+                ('signature', models.BinaryField()),
+                ('duplicate_of', models.PositiveIntegerField(blank=True, null=True, verbose_name='Похож на')),
+                ('created', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Сигнатура текста',
+                'verbose_name_plural': 'Сигнатуры текстов',
+                'unique_together': {('kind', 'object_id')},
+            },
+        ),
+        migrations.AddIndex(
+            model_name='contentband',
+            index=models.Index(fields=['kind', 'bucket'], name='posts_conte_kind_874e56_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contentband',
+            index=models.Index(fields=['kind', 'object_id'], name='posts_conte_kind_951181_idx'),
+        ),
+    ]
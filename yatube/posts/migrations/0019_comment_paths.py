@@ -0,0 +1,35 @@
+from django.db import migrations
+
+from core.backfill import backfill_operation
+
+PATH_DIGITS = '0123456789abcdefghijklmnopqrstuvwxyz'
+PATH_SEGMENT = 8
+
+
+def path_segment(pk):
+    digits = ''
+    while pk:
+        pk, digit = divmod(pk, len(PATH_DIGITS))
+        digits = PATH_DIGITS[digit] + digits
+    return digits.rjust(PATH_SEGMENT, '0')
+
+
+def set_root_paths(comments):
+    """До веток все комментарии корневые: путь - один сегмент id."""
+    for comment in comments:
+        comment.path = path_segment(comment.pk)
+    if comments:
+        type(comments[0]).objects.bulk_update(comments, ('path',))
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('posts', '0018_comment_threads'),
+    ]
+
+    operations = [
+        backfill_operation('posts.Comment', set_root_paths),
+        backfill_operation('posts.ArchivedComment', set_root_paths),
+    ]
@@ -1,14 +1,38 @@
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import models, transaction
 
 User = get_user_model()
 
+PATH_DIGITS = '0123456789abcdefghijklmnopqrstuvwxyz'
+PATH_SEGMENT = 8
+# Символ больше любой цифры пути: path < prefix + PATH_END для поддерева.
+PATH_END = '~'
+
+
+def path_segment(pk):
+    """id комментария в base36 фиксированной ширины для пути."""
+    digits = ''
+    while pk:
+        pk, digit = divmod(pk, len(PATH_DIGITS))
+        digits = PATH_DIGITS[digit] + digits
+    return digits.rjust(PATH_SEGMENT, '0')
+
+
+class VisibleManager(models.Manager):
+    def get_queryset(self):
+        return super().get_queryset().filter(is_deleted=False)
+
 
 class Group(models.Model):
     title = models.CharField(max_length=200)
     slug = models.SlugField(unique=True)
     description = models.TextField()
 
+    class Meta:
+        indexes = (
+            models.Index(fields=('title', 'id')),
+        )
+
     def __str__(self):
         return self.title
 
@@ -42,9 +66,26 @@ class Post(models.Model):
         upload_to='posts/',
         blank=True
     )
+    is_deleted = models.BooleanField(
+        default=False,
+        verbose_name='Удален'
+    )
+    view_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Просмотры'
+    )
+
+    objects = VisibleManager()
+    all_objects = models.Manager()
 
     class Meta:
         ordering = ('-pub_date',)
+        indexes = (
+            models.Index(fields=('pub_date',)),
+            models.Index(fields=('group', 'pub_date')),
+            models.Index(fields=('author', 'pub_date')),
+        )
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
 
@@ -71,6 +112,42 @@ class Comment(models.Model):
         auto_now_add=True,
         verbose_name='Дата публикации'
     )
+    parent = models.ForeignKey(
+        'self',
+        on_delete=models.DO_NOTHING,
+        blank=True,
+        null=True,
+        related_name='replies',
+        verbose_name='Ответ на'
+    )
+    path = models.TextField(default='', editable=False)
+    depth = models.PositiveSmallIntegerField(default=0, editable=False)
+    reply_count = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = (
+            models.Index(fields=('post', 'path')),
+            models.Index(fields=('post', 'depth', 'path')),
+        )
+
+    def save(self, *args, **kwargs):
+        """Путь строится из id, поэтому записывается после вставки
+        в той же транзакции."""
+        if self.pk is not None:
+            return super().save(*args, **kwargs)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if self.parent_id:
+                self.path = self.parent.path + path_segment(self.pk)
+                self.depth = self.parent.depth + 1
+                Comment.objects.filter(pk=self.parent_id).update(
+                    reply_count=models.F('reply_count') + 1
+                )
+            else:
+                self.path = path_segment(self.pk)
+            Comment.objects.filter(pk=self.pk).update(
+                path=self.path, depth=self.depth
+            )
 
 
 class Follow(models.Model):
@@ -84,3 +161,353 @@ class Follow(models.Model):
         on_delete=models.CASCADE,
         related_name='following',
     )
+
+    class Meta:
+        indexes = (
+            models.Index(fields=('author', 'user')),
+        )
+
+
+class GroupFollow(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='group_follows',
+    )
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.CASCADE,
+        related_name='followers',
+    )
+
+    class Meta:
+        unique_together = ('user', 'group')
+
+
+class ArchivedPost(models.Model):
+    text = models.TextField(verbose_name='Текст поста')
+    pub_date = models.DateTimeField(verbose_name='Дата публикации')
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_posts',
+        verbose_name='Автор'
+    )
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name='archived_posts',
+        verbose_name='Группа'
+    )
+    image = models.ImageField(
+        'Картинка',
+        upload_to='posts/',
+        blank=True
+    )
+    is_deleted = models.BooleanField(
+        default=False,
+        verbose_name='Удален'
+    )
+    view_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Просмотры'
+    )
+
+    objects = VisibleManager()
+    all_objects = models.Manager()
+
+    class Meta:
+        ordering = ('-pub_date',)
+        indexes = (
+            models.Index(fields=('pub_date',)),
+            models.Index(fields=('group', 'pub_date')),
+            models.Index(fields=('author', 'pub_date')),
+        )
+        verbose_name = 'Архивный пост'
+        verbose_name_plural = 'Архивные посты'
+
+    def __str__(self):
+        return self.text[:15]
+
+
+class ArchivedComment(models.Model):
+    post = models.ForeignKey(
+        ArchivedPost,
+        on_delete=models.CASCADE,
+        related_name='comments',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_comments',
+    )
+    text = models.TextField(verbose_name='Текст комментария')
+    created = models.DateTimeField(verbose_name='Дата публикации')
+    parent = models.ForeignKey(
+        'self',
+        on_delete=models.DO_NOTHING,
+        blank=True,
+        null=True,
+        related_name='replies'
+    )
+    path = models.TextField(default='')
+    depth = models.PositiveSmallIntegerField(default=0)
+    reply_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = (
+            models.Index(fields=('post', 'path')),
+            models.Index(fields=('post', 'depth', 'path')),
+        )
+
+
+class PendingDeletion(models.Model):
+    USER = 'user'
+    POST = 'post'
+    KIND_CHOICES = (
+        (USER, 'Пользователь'),
+        (POST, 'Пост'),
+    )
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.PositiveIntegerField()
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ('pk',)
+        unique_together = ('kind', 'object_id')
+        verbose_name = 'Отложенное удаление'
+        verbose_name_plural = 'Отложенные удаления'
+
+
+class Tag(models.Model):
+    name = models.CharField(
+        max_length=64,
+        unique=True,
+        verbose_name='Тег'
+    )
+
+    class Meta:
+        verbose_name = 'Тег'
+        verbose_name_plural = 'Теги'
+
+    def __str__(self):
+        return self.name
+
+
+class PostTag(models.Model):
+    tag = models.ForeignKey(
+        Tag,
+        on_delete=models.CASCADE,
+        related_name='post_tags',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='post_tags',
+    )
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('post', 'tag')
+        indexes = (
+            models.Index(fields=('tag', 'pub_date', 'post')),
+        )
+
+
+class TagDayCount(models.Model):
+    tag = models.ForeignKey(
+        Tag,
+        on_delete=models.CASCADE,
+        related_name='day_counts',
+    )
+    day = models.DateField()
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('day', 'tag')
+
+
+class ContentSignature(models.Model):
+    POST = 'post'
+    COMMENT = 'comment'
+    KIND_CHOICES = (
+        (POST, 'Пост'),
+        (COMMENT, 'Комментарий'),
+    )
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.PositiveIntegerField()
+    signature = models.BinaryField()
+    duplicate_of = models.PositiveIntegerField(
+        blank=True,
+        null=True,
+        verbose_name='Похож на'
+    )
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('kind', 'object_id')
+        verbose_name = 'Сигнатура текста'
+        verbose_name_plural = 'Сигнатуры текстов'
+
+
+class ContentBand(models.Model):
+    kind = models.CharField(max_length=10)
+    object_id = models.PositiveIntegerField()
+    bucket = models.BigIntegerField()
+
+    class Meta:
+        indexes = (
+            models.Index(fields=('kind', 'bucket')),
+            models.Index(fields=('kind', 'object_id')),
+        )
+
+
+class RelatedPost(models.Model):
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='related_links'
+    )
+    related = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    score = models.FloatField()
+
+    class Meta:
+        unique_together = ('post', 'related')
+        indexes = (
+            models.Index(fields=('post', '-score')),
+        )
+
+
+class RelatedTerm(models.Model):
+    """Сколько постов содержит терм на момент последнего пересчета."""
+    term = models.CharField(max_length=200, unique=True)
+    document_frequency = models.PositiveIntegerField(default=0)
+
+
+class RelatedPosting(models.Model):
+    """Вес терма в векторе поста; по терму хранятся только самые новые."""
+    term = models.CharField(max_length=200)
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    weight = models.FloatField()
+
+    class Meta:
+        unique_together = ('term', 'post')
+
+
+class RelatedCheckpoint(models.Model):
+    """Докуда пересчитаны похожие посты и сколько постов в корпусе."""
+    last_pk = models.BigIntegerField(default=0)
+    post_count = models.PositiveIntegerField(default=0)
+    updated = models.DateTimeField(auto_now=True)
+
+
+class FollowSuggestion(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='follow_suggestions'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    score = models.FloatField()
+
+    class Meta:
+        unique_together = ('user', 'author')
+        indexes = (
+            models.Index(fields=('user', '-score')),
+        )
+
+
+class Reaction(models.Model):
+    LIKE = 'like'
+    LOVE = 'love'
+    LAUGH = 'laugh'
+    KIND_CHOICES = (
+        (LIKE, '👍'),
+        (LOVE, '❤'),
+        (LAUGH, '😂'),
+    )
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='reactions'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='reactions'
+    )
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('user', 'post', 'kind')
+
+
+class ReactionCounter(models.Model):
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='reaction_counters'
+    )
+    kind = models.CharField(max_length=10)
+    shard = models.PositiveSmallIntegerField()
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('post', 'kind', 'shard')
+
+
+class Notification(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='notifications'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    created = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        unique_together = ('user', 'post')
+
+
+class NotificationState(models.Model):
+    """Отметки непрочитанного: новые есть, если latest > seen."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='notification_state'
+    )
+    latest = models.BigIntegerField(default=0)
+    seen = models.BigIntegerField(default=0)
+
+
+class NotificationFanout(models.Model):
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    last_user_id = models.BigIntegerField(default=0)
+
+    class Meta:
+        ordering = ('pk',)
@@ -0,0 +1,195 @@
+import time
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
+from django.db import transaction
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils import timezone
+
+from .archive import ArchiveChain
+from .models import ArchivedPost, Post
+
+MONTH_POSTS_PER_PAGE = 10
+VERSION_KEY = 'month_archive:version:{}:{}'
+
+
+def month_bounds(year, month):
+    """Начало месяца и начало следующего месяца в текущей зоне."""
+    start = timezone.make_aware(datetime(year, month, 1))
+    if month == 12:
+        end = timezone.make_aware(datetime(year + 1, 1, 1))
+    else:
+        end = timezone.make_aware(datetime(year, month + 1, 1))
+    return start, end
+
+
+def is_closed_month(year, month):
+    return month_bounds(year, month)[1] <= timezone.now()
+
+
+def scope_filter(group=None, author=None):
+    if group is not None:
+        return {'group': group}
+    if author is not None:
+        return {'author': author}
+    return {}
+
+
+def month_posts(year, month, **scope):
+    start, end = month_bounds(year, month)
+    dates = {'pub_date__gte': start, 'pub_date__lt': end}
+    return ArchiveChain(
+        Post.objects.filter(**dates, **scope).order_by('-pub_date'),
+        ArchivedPost.objects.filter(**dates, **scope).order_by('-pub_date')
+    )
+
+
+def older_month(before, **scope):
+    """Ближайший месяц с постами раньше before или None."""
+    for model in (Post, ArchivedPost):
+        pub_date = (
+            model.objects.filter(pub_date__lt=before, **scope)
+            .order_by('-pub_date')
+            .values_list('pub_date', flat=True)
+            .first()
+        )
+        if pub_date is not None:
+            pub_date = timezone.localtime(pub_date)
+            return pub_date.year, pub_date.month
+    return None
+
+
+def month_url(year, month, group=None, author=None):
+    kwargs = {'year': year, 'month': month}
+    if group is not None:
+        return reverse(
+            'posts:group_month_archive', kwargs={'slug': group.slug, **kwargs}
+        )
+    if author is not None:
+        return reverse(
+            'posts:profile_month_archive',
+            kwargs={'username': author.username, **kwargs}
+        )
+    return reverse('posts:month_archive', kwargs=kwargs)
+
+
+def older_posts_url(page_obj, group=None, author=None):
+    """Ссылка на помесячный архив для последней страницы ленты."""
+    if page_obj.has_next() or not len(page_obj):
+        return None
+    last = timezone.localtime(page_obj[len(page_obj) - 1].pub_date)
+    return month_url(last.year, last.month, group, author)
+
+
+def month_version(year, month):
+    key = VERSION_KEY.format(year, month)
+    version = cache.get(key)
+    if version is None:
+        # Вытесненная версия начинается заново с большего числа,
+        # чтобы не попасть на старые страницы.
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_month_version(year, month):
+    key = VERSION_KEY.format(year, month)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns(), None)
+
+
+def forget_month(pub_date):
+    """Делает недействительными закешированные страницы месяца поста.
+
+    Версия растет сразу и еще раз после фиксации: страница, которую
+    успели отрисовать по незафиксированным данным, не переживет ее.
+    """
+    pub_date = timezone.localtime(pub_date)
+    year, month = pub_date.year, pub_date.month
+    bump_month_version(year, month)
+    transaction.on_commit(lambda: bump_month_version(year, month))
+
+
+def forget_months(posts):
+    """Сбрасывает кеш всех месяцев, в которых есть посты из posts."""
+    for moment in posts.datetimes('pub_date', 'month'):
+        forget_month(moment)
+
+
+def parse_page_number(page_number):
+    if not page_number:
+        return 1
+    try:
+        number = int(page_number)
+    except (TypeError, ValueError):
+        raise PageNotAnInteger(page_number)
+    if number < 1:
+        raise EmptyPage(page_number)
+    return number
+
+
+def month_cache_key(year, month, page_number, group=None, author=None,
+                    version=None):
+    """Ключ страницы в версии месяца; page_number - номер страницы
+    или 'pages' для числа страниц."""
+    if group is not None:
+        scope = f'group:{group.pk}'
+    elif author is not None:
+        scope = f'author:{author.pk}'
+    else:
+        scope = 'all'
+    if version is None:
+        version = month_version(year, month)
+    return f'month_archive:{scope}:{year}:{month}:{version}:{page_number}'
+
+
+def render_month_page(year, month, page_number, group=None, author=None):
+    """Возвращает номер страницы, число страниц и html постов за месяц.
+
+    Закрытые месяцы берутся из кэша целиком, поэтому страница не требует
+    запросов к базе; правка и удаление поста меняют версию его месяца.
+    Несуществующий номер страницы вызывает InvalidPage и не попадает
+    в кэш, поэтому произвольные номера не засоряют его.
+    """
+    number = parse_page_number(page_number)
+    closed = is_closed_month(year, month)
+    page = None
+    if closed:
+        version = month_version(year, month)
+        pages_key = month_cache_key(
+            year, month, 'pages', group, author, version
+        )
+        key = month_cache_key(year, month, number, group, author, version)
+        cached = cache.get_many([pages_key, key])
+        num_pages = cached.get(pages_key)
+        if num_pages is not None and number > num_pages:
+            raise EmptyPage(number)
+        page = cached.get(key)
+    if page is None:
+        paginator = Paginator(
+            month_posts(year, month, **scope_filter(group, author)),
+            MONTH_POSTS_PER_PAGE
+        )
+        page_obj = paginator.page(number)
+        older = older_month(
+            month_bounds(year, month)[0], **scope_filter(group, author)
+        )
+        page = {
+            'older_url': older and month_url(*older, group, author),
+            'number': page_obj.number,
+            'num_pages': paginator.num_pages,
+            'html': render_to_string(
+                'posts/includes/month_posts.html', {'page_obj': page_obj}
+            ),
+        }
+        if closed:
+            cache.set_many(
+                {key: page, pages_key: paginator.num_pages},
+                settings.POSTS_MONTH_ARCHIVE_CACHE_TIMEOUT
+            )
+    return page
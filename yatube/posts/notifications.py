@@ -0,0 +1,102 @@
+"""Уведомления о новых постах авторов из подписок.
+
+Пост ставит в очередь строку NotificationFanout, а фоновая задача
+или команда fanout_notifications раздает уведомления подписчикам
+пачками по возрастанию user_id.
+Непрочитанное определяется сравнением двух чисел в NotificationState:
+id последнего доставленного поста и id последнего просмотренного.
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from core.queue import enqueue
+
+from .models import (Follow, Notification, NotificationFanout,
+                     NotificationState)
+
+
+def schedule_fanout(post):
+    NotificationFanout.objects.get_or_create(post=post)
+    enqueue('posts.fanout_notifications', unique=True)
+
+
+def fanout_step(batch_size):
+    """Раздает одну пачку уведомлений первого поста в очереди.
+
+    Возвращает число подписчиков в пачке или None, если очередь пуста.
+    Прерванная пачка повторяется целиком: вставки идемпотентны.
+    """
+    with transaction.atomic():
+        job = NotificationFanout.objects.select_related('post').first()
+        if job is None:
+            return None
+        post = job.post
+        followers = [] if post.is_deleted else list(
+            Follow.objects.filter(
+                author_id=post.author_id, user_id__gt=job.last_user_id
+            ).order_by('user_id').values_list(
+                'user_id', flat=True
+            ).distinct()[:batch_size]
+        )
+        if not followers:
+            job.delete()
+            return 0
+        Notification.objects.bulk_create(
+            [Notification(user_id=user_id, post=post)
+             for user_id in followers],
+            ignore_conflicts=True
+        )
+        NotificationState.objects.bulk_create(
+            [NotificationState(user_id=user_id) for user_id in followers],
+            ignore_conflicts=True
+        )
+        NotificationState.objects.filter(
+            user_id__in=followers, latest__lt=post.pk
+        ).update(latest=post.pk)
+        job.last_user_id = followers[-1]
+        job.save(update_fields=['last_user_id'])
+    return len(followers)
+
+
+def has_unread(user):
+    state = NotificationState.objects.filter(user=user).values_list(
+        'latest', 'seen'
+    ).first()
+    return state is not None and state[0] > state[1]
+
+
+def mark_seen(user):
+    NotificationState.objects.filter(user=user).exclude(
+        seen__gte=F('latest')
+    ).update(seen=F('latest'))
+
+
+def inbox(user, before=None, limit=10):
+    """Страница уведомлений от новых к старым и курсор следующей.
+
+    Курсор - id поста: индекс (user, post) отдает строки без сортировки.
+    """
+    rows = Notification.objects.filter(
+        user=user, post__is_deleted=False
+    ).select_related('post__author', 'post__group')
+    if before is not None:
+        rows = rows.filter(post_id__lt=before)
+    rows = list(rows.order_by('-post_id')[:limit + 1])
+    next_cursor = rows[limit - 1].post_id if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+
+def compact_step(days, batch_size):
+    """Удаляет пачку уведомлений старше days дней; возвращает их число."""
+    cutoff = timezone.now() - timedelta(days=days)
+    ids = list(
+        Notification.objects.filter(created__lt=cutoff).order_by(
+            'created'
+        ).values_list('pk', flat=True)[:batch_size]
+    )
+    if ids:
+        Notification.objects.filter(pk__in=ids).delete()
+    return len(ids)
@@ -0,0 +1,156 @@
+"""Популярные посты и группы с экспоненциальным затуханием.
+
+Счет хранится в логарифмической шкале относительно фиксированной
+эпохи: событие в момент t добавляет log(вес) + t * ln2 / период
+полураспада. Все счета затухают одинаково, поэтому сравнивать их можно
+без пересчета.
+
+Запрос не трогает кеш: события копятся в буфере процесса
+(см. buffers.ProcessBuffer) и раз в POPULAR_FLUSH_INTERVAL секунд
+уходят задачей posts.fold_popular.
+Задача под блокировкой в кеше вливает пачку в счета и списки лучших
+несколькими get_many и set_many, поэтому конкурентные запросы
+не затирают друг другу списки.
+"""
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from core.queue import enqueue
+
+from .buffers import ProcessBuffer
+from .models import Group, Post
+
+POST_SCORE_KEY = 'popular:post:{}'
+GROUP_SCORE_KEY = 'popular:group:{}'
+TOP_POSTS_KEY = 'popular:top:{}'
+TOP_GROUPS_KEY = 'popular:top-groups'
+FOLD_LOCK_KEY = 'popular:fold-lock'
+FOLD_LOCK_TIMEOUT = 60
+ALL = 'all'
+
+VIEW = 'view'
+COMMENT = 'comment'
+FOLLOW = 'follow'
+
+
+def log_add(first, second):
+    if first is None:
+        return second
+    high, low = max(first, second), min(first, second)
+    return high + math.log1p(math.exp(low - high))
+
+
+def event_score(event, now=None):
+    now = time.time() if now is None else now
+    return (
+        math.log(settings.POPULAR_WEIGHTS[event])
+        + now * math.log(2) / settings.POPULAR_HALF_LIFE
+    )
+
+
+def offer(top, member, score, size):
+    """Обновляет список лучших size элементов: O(size) на событие."""
+    if member in top or len(top) < size or score > min(top.values()):
+        top[member] = score
+        if len(top) > size:
+            del top[min(top, key=top.get)]
+
+
+class EventBuffer(ProcessBuffer):
+    """Прирост счетов постов: post_id -> (group_id, прирост)."""
+
+    interval_setting = 'POPULAR_FLUSH_INTERVAL'
+    max_size_setting = 'POPULAR_MAX_POSTS'
+
+    def combine(self, old, new):
+        return new[0], log_add(old[1], new[1])
+
+    def handoff(self, items):
+        enqueue('posts.fold_popular', events=[
+            [post_id, group_id, amount]
+            for post_id, (group_id, amount) in items.items()
+        ])
+
+
+buffer = EventBuffer()
+
+
+def record_event(post_id, group_id, event, now=None):
+    """Учитывает событие для поста и его группы при следующем сбросе."""
+    buffer.add(post_id, (group_id, event_score(event, now)))
+
+
+def add_scores(amounts):
+    """Прибавляет приросты {ключ: прирост} и возвращает новые счета."""
+    scores = cache.get_many(list(amounts))
+    for key, amount in amounts.items():
+        scores[key] = log_add(scores.get(key), amount)
+    cache.set_many(scores, settings.POPULAR_TIMEOUT)
+    return scores
+
+
+def fold(events):
+    """Вливает пачку событий [post_id, group_id, прирост] в кеш.
+
+    Возвращает False, если пачку уже вливает другой процесс.
+    """
+    if not cache.add(FOLD_LOCK_KEY, 1, FOLD_LOCK_TIMEOUT):
+        return False
+    try:
+        post_amounts = {}
+        group_amounts = {}
+        for post_id, group_id, amount in events:
+            post_amounts[POST_SCORE_KEY.format(post_id)] = amount
+            if group_id:
+                key = GROUP_SCORE_KEY.format(group_id)
+                group_amounts[key] = log_add(group_amounts.get(key), amount)
+        post_scores = add_scores(post_amounts)
+        group_scores = add_scores(group_amounts)
+        top_keys = {TOP_POSTS_KEY.format(ALL), TOP_GROUPS_KEY}
+        top_keys.update(
+            TOP_POSTS_KEY.format(group_id)
+            for _, group_id, _ in events if group_id
+        )
+        tops = cache.get_many(list(top_keys))
+        size = settings.POPULAR_TOP_K
+        for post_id, group_id, _ in events:
+            score = post_scores[POST_SCORE_KEY.format(post_id)]
+            offer(
+                tops.setdefault(TOP_POSTS_KEY.format(ALL), {}),
+                post_id, score, size
+            )
+            if group_id:
+                offer(
+                    tops.setdefault(TOP_POSTS_KEY.format(group_id), {}),
+                    post_id, score, size
+                )
+                offer(
+                    tops.setdefault(TOP_GROUPS_KEY, {}), group_id,
+                    group_scores[GROUP_SCORE_KEY.format(group_id)], size
+                )
+        cache.set_many(tops, settings.POPULAR_TIMEOUT)
+    finally:
+        cache.delete(FOLD_LOCK_KEY)
+    return True
+
+
+def ranked(top, limit):
+    return sorted(top, key=top.get, reverse=True)[:limit]
+
+
+def popular_posts(group=None, limit=None):
+    """Лучшие посты по счету: запрос только по первичным ключам."""
+    top = cache.get(TOP_POSTS_KEY.format(group.pk if group else ALL)) or {}
+    ids = ranked(top, limit or settings.POPULAR_TOP_K)
+    posts = Post.objects.select_related('author', 'group').in_bulk(ids)
+    return [posts[pk] for pk in ids if pk in posts]
+
+
+def popular_groups(limit=None):
+    top = cache.get(TOP_GROUPS_KEY) or {}
+    ids = ranked(top, limit or settings.POPULAR_GROUPS_LIMIT)
+    groups = Group.objects.in_bulk(ids)
+    return [groups[pk] for pk in ids if pk in groups]
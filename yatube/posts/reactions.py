@@ -0,0 +1,120 @@
+import random
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+
+from .models import Post, Reaction, ReactionCounter
+
+KEY = 'reactions:{}'
+KINDS = [kind for kind, _ in Reaction.KIND_CHOICES]
+
+
+def bump_counter(post_id, kind, delta):
+    """Меняет случайный шард счетчика, а не одну горячую строку."""
+    shard = random.randrange(settings.REACTION_SHARDS)
+    ReactionCounter.objects.bulk_create(
+        [ReactionCounter(post_id=post_id, kind=kind, shard=shard)],
+        ignore_conflicts=True
+    )
+    ReactionCounter.objects.filter(
+        post_id=post_id, kind=kind, shard=shard
+    ).update(count=F('count') + delta)
+
+
+def forget_counts(post_id):
+    key = KEY.format(post_id)
+    cache.delete(key)
+    # Чтение из другой транзакции могло успеть положить старое значение.
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+def set_reaction(user, post_id, kind, active):
+    """Ставит или снимает реакцию; повтор того же запроса ничего
+    не меняет. Возвращает True, если состояние изменилось."""
+    if kind not in KINDS:
+        raise ValueError(kind)
+    with transaction.atomic():
+        if active:
+            try:
+                with transaction.atomic():
+                    Reaction.objects.create(
+                        user=user, post_id=post_id, kind=kind
+                    )
+            except IntegrityError:
+                return False
+        elif not Reaction.objects.filter(
+            user=user, post_id=post_id, kind=kind
+        ).delete()[0]:
+            return False
+        bump_counter(post_id, kind, 1 if active else -1)
+    forget_counts(post_id)
+    return True
+
+
+def release_reactions(reactions):
+    """Вычитает удаляемые реакции из счетчиков их постов."""
+    removed = Counter(
+        (reaction.post_id, reaction.kind) for reaction in reactions
+    )
+    for (post_id, kind), count in removed.items():
+        bump_counter(post_id, kind, -count)
+    for post_id in {post_id for post_id, _ in removed}:
+        forget_counts(post_id)
+
+
+def reaction_counts(post_ids):
+    """Счетчики {post_id: {kind: count}}: один get_many по кешу
+    и один запрос с суммой шардов для промахов."""
+    post_ids = list(post_ids)
+    keys = {KEY.format(post_id): post_id for post_id in post_ids}
+    cached = cache.get_many(keys)
+    counts = {keys[key]: value for key, value in cached.items()}
+    missing = [post_id for post_id in post_ids if post_id not in counts]
+    if missing:
+        loaded = {post_id: {} for post_id in missing}
+        for post_id, kind, total in (
+            ReactionCounter.objects.filter(post_id__in=missing)
+            .values_list('post_id', 'kind')
+            .annotate(total=Sum('count'))
+            .values_list('post_id', 'kind', 'total')
+        ):
+            if total:
+                loaded[post_id][kind] = total
+        cache.set_many(
+            {KEY.format(post_id): value for post_id, value in loaded.items()},
+            settings.REACTION_COUNTS_TIMEOUT
+        )
+        counts.update(loaded)
+    return counts
+
+
+def user_reactions(user, post_ids):
+    """Реакции пользователя {post_id: {kind}} одним запросом."""
+    post_ids = list(post_ids)
+    reactions = {post_id: set() for post_id in post_ids}
+    if not user.is_authenticated or not post_ids:
+        return reactions
+    for post_id, kind in Reaction.objects.filter(
+        user=user, post_id__in=post_ids
+    ).values_list('post_id', 'kind'):
+        reactions[post_id].add(kind)
+    return reactions
+
+
+def attach_counts(posts, user=None):
+    """Раскладывает по постам страницы счетчики и реакции user;
+    архивные пропускает."""
+    posts = [post for post in posts if isinstance(post, Post)]
+    counts = reaction_counts(post.pk for post in posts)
+    mine = {}
+    if user is not None:
+        mine = user_reactions(user, [post.pk for post in posts])
+    for post in posts:
+        post.reaction_counts = [
+            (kind, label, counts[post.pk].get(kind, 0))
+            for kind, label in Reaction.KIND_CHOICES
+        ]
+        post.my_reactions = mine.get(post.pk, set())
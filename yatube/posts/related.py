@@ -0,0 +1,312 @@
+import heapq
+import math
+from collections import Counter, defaultdict
+from operator import itemgetter
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+
+from core.backfill import iter_batches
+
+from .models import (Post, RelatedCheckpoint, RelatedPost, RelatedPosting,
+                     RelatedTerm)
+from .search import WORD, stem
+
+
+def post_terms(post):
+    """Частоты основ слов поста плюс признак группы."""
+    counts = Counter(stem(word.lower()) for word in WORD.findall(post.text))
+    if post.group_id:
+        counts[f'group:{post.group_id}'] = 1
+    return counts
+
+
+def idf(total, frequency):
+    return math.log((1 + total) / (1 + frequency)) + 1
+
+
+def weigh(counts, document_frequency, total):
+    """Нормированный TF-IDF вектор поста по частотам его термов."""
+    vector = {
+        term: (1 + math.log(count)) * idf(total, document_frequency[term])
+        for term, count in counts.items()
+    }
+    norm = math.sqrt(sum(weight ** 2 for weight in vector.values()))
+    if not norm:
+        return {}
+    return {term: weight / norm for term, weight in vector.items()}
+
+
+def nearest(pk, vector, postings, limit, max_candidates):
+    """Соседи вектора обходом списков постов от самых редких термов.
+
+    Кандидатами становятся первые max_candidates постов этих списков,
+    остальные посты только добирают вес к уже найденным.
+    """
+    terms = sorted(
+        (term for term in vector if term in postings),
+        key=lambda term: len(postings[term])
+    )
+    scores = {}
+    for term in terms:
+        weight = vector[term]
+        for other, other_weight in postings[term]:
+            if other in scores:
+                scores[other] += weight * other_weight
+            elif other != pk and len(scores) < max_candidates:
+                scores[other] = weight * other_weight
+    return heapq.nlargest(limit, scores.items(), key=itemgetter(1))
+
+
+class Corpus:
+    """Разреженные TF-IDF векторы постов и обратный индекс по термам.
+
+    Сходство двух постов - скалярное произведение нормированных
+    векторов; соседи поста считаются обходом списков постов для его
+    термов, то есть строка произведения матрицы на транспонированную.
+    Слишком частые термы в списки не попадают: они почти не влияют
+    на порядок. Списки идут от новых постов к старым и обрезаются
+    до max_postings самых новых, а кандидатами становятся первые
+    max_candidates постов со списков самых редких термов, поэтому
+    поиск соседей не зависит от размера корпуса.
+    """
+
+    def __init__(self, max_df=None, max_postings=None, max_candidates=None):
+        if max_df is None:
+            max_df = settings.RELATED_POSTS_MAX_DF
+        if max_postings is None:
+            max_postings = settings.RELATED_POSTS_MAX_POSTINGS
+        if max_candidates is None:
+            max_candidates = settings.RELATED_POSTS_MAX_CANDIDATES
+        self.max_df = max_df
+        self.max_postings = max_postings
+        self.max_candidates = max_candidates
+        self.counts = {}
+        self.vectors = {}
+        self.document_frequency = Counter()
+        self.postings = defaultdict(list)
+
+    def load(self, batch_size):
+        queryset = Post.objects.only('pk', 'text', 'group_id')
+        for batch in iter_batches(queryset, batch_size):
+            for post in batch:
+                self.counts[post.pk] = post_terms(post)
+        self.index()
+        return self
+
+    def max_frequency(self, total):
+        return max(2, self.max_df * total)
+
+    def index(self):
+        total = len(self.counts)
+        for counts in self.counts.values():
+            self.document_frequency.update(counts.keys())
+        max_frequency = self.max_frequency(total)
+        for pk in sorted(self.counts, reverse=True):
+            vector = weigh(self.counts[pk], self.document_frequency, total)
+            if not vector:
+                continue
+            for term, weight in vector.items():
+                postings = self.postings[term]
+                if (self.document_frequency[term] <= max_frequency
+                        and len(postings) < self.max_postings):
+                    postings.append((pk, weight))
+            self.vectors[pk] = vector
+        for term in [term for term, postings in self.postings.items()
+                     if not postings]:
+            del self.postings[term]
+
+    def neighbours(self, pk, limit):
+        return nearest(
+            pk, self.vectors.get(pk, {}), self.postings, limit,
+            self.max_candidates
+        )
+
+    def save(self):
+        """Сохраняет частоты термов и списки постов для пересчета
+        новых постов без загрузки корпуса."""
+        with transaction.atomic():
+            RelatedTerm.objects.all().delete()
+            RelatedPosting.objects.all().delete()
+            RelatedTerm.objects.bulk_create(
+                (RelatedTerm(term=term, document_frequency=frequency)
+                 for term, frequency in self.document_frequency.items()),
+                batch_size=settings.RELATED_POSTS_CHUNK_SIZE
+            )
+            RelatedPosting.objects.bulk_create(
+                (RelatedPosting(term=term, post_id=pk, weight=weight)
+                 for term, postings in self.postings.items()
+                 for pk, weight in postings),
+                batch_size=settings.RELATED_POSTS_CHUNK_SIZE
+            )
+
+
+def store(results):
+    """Заменяет соседей для постов из results одной транзакцией."""
+    with transaction.atomic():
+        RelatedPost.objects.filter(post_id__in=list(results)).delete()
+        RelatedPost.objects.bulk_create(
+            RelatedPost(post_id=pk, related_id=other, score=score)
+            for pk, neighbours in results.items()
+            for other, score in neighbours
+        )
+
+
+def store_in_chunks(results, chunk_size):
+    pks = sorted(results)
+    for start in range(0, len(pks), chunk_size):
+        store({pk: results[pk] for pk in pks[start:start + chunk_size]})
+
+
+def rebuild_all(checkpoint, limit, chunk_size):
+    corpus = Corpus().load(chunk_size)
+    store_in_chunks(
+        {pk: corpus.neighbours(pk, limit) for pk in corpus.vectors},
+        chunk_size
+    )
+    corpus.save()
+    checkpoint.last_pk = max(corpus.counts, default=0)
+    checkpoint.post_count = len(corpus.counts)
+    checkpoint.save()
+    return len(corpus.vectors)
+
+
+def index_new_posts(corpus, checkpoint):
+    """Векторы новых постов по сохраненным частотам термов.
+
+    Возвращает прирост частот, размер корпуса и списки постов
+    по термам новых постов, еще не обрезанные до max_postings.
+    """
+    terms = set().union(*corpus.counts.values())
+    added = Counter()
+    for counts in corpus.counts.values():
+        added.update(counts.keys())
+    frequency = Counter(dict(
+        RelatedTerm.objects.filter(term__in=terms).values_list(
+            'term', 'document_frequency'
+        )
+    ))
+    frequency.update(added)
+    total = checkpoint.post_count + len(corpus.counts)
+    max_frequency = corpus.max_frequency(total)
+    postings = defaultdict(list)
+    for pk in sorted(corpus.counts, reverse=True):
+        vector = weigh(corpus.counts[pk], frequency, total)
+        if not vector:
+            continue
+        corpus.vectors[pk] = vector
+        for term, weight in vector.items():
+            if frequency[term] <= max_frequency:
+                postings[term].append((pk, weight))
+    for term, pk, weight in RelatedPosting.objects.filter(
+        term__in=list(postings)
+    ).order_by('term', '-post_id').values_list('term', 'post_id', 'weight'):
+        postings[term].append((pk, weight))
+    return added, total, postings
+
+
+def extend_neighbours(results, new_posts, limit):
+    """Добавляет новые посты в списки соседей старых постов, если
+    они обходят кого-то из текущих соседей; сходство симметрично."""
+    candidates = defaultdict(list)
+    for pk, neighbours in results.items():
+        for other, score in neighbours:
+            if other not in new_posts:
+                candidates[other].append((pk, score))
+    current = defaultdict(list)
+    for pk, other, score in RelatedPost.objects.filter(
+        post_id__in=list(candidates)
+    ).values_list('post_id', 'related_id', 'score'):
+        current[pk].append((other, score))
+    for pk, new in candidates.items():
+        neighbours = heapq.nlargest(
+            limit, current[pk] + new, key=itemgetter(1)
+        )
+        if set(neighbours) != set(current[pk]):
+            results[pk] = neighbours
+
+
+def save_new_posts(corpus, added, postings):
+    """Дописывает частоты и списки постов и обрезает переполненные."""
+    for term, count in added.items():
+        updated = RelatedTerm.objects.filter(term=term).update(
+            document_frequency=F('document_frequency') + count
+        )
+        if not updated:
+            RelatedTerm.objects.create(term=term, document_frequency=count)
+    RelatedPosting.objects.bulk_create(
+        (RelatedPosting(term=term, post_id=pk, weight=weight)
+         for term, term_postings in postings.items()
+         for pk, weight in term_postings[:corpus.max_postings]
+         if pk in corpus.counts),
+        batch_size=settings.RELATED_POSTS_CHUNK_SIZE
+    )
+    for term, term_postings in postings.items():
+        if len(term_postings) > corpus.max_postings:
+            RelatedPosting.objects.filter(
+                term=term,
+                post_id__lte=term_postings[corpus.max_postings][0]
+            ).delete()
+
+
+def add_new_posts(checkpoint, limit, chunk_size):
+    """Считает соседей постов после checkpoint.last_pk по сохраненным
+    частотам термов и спискам постов, не загружая корпус.
+
+    Веса старых постов в списках остаются посчитанными по IDF своего
+    пересчета.
+    """
+    corpus = Corpus()
+    queryset = Post.objects.filter(pk__gt=checkpoint.last_pk).only(
+        'pk', 'text', 'group_id'
+    )
+    for batch in iter_batches(queryset, chunk_size):
+        for post in batch:
+            corpus.counts[post.pk] = post_terms(post)
+    if not corpus.counts:
+        return 0
+    added, total, postings = index_new_posts(corpus, checkpoint)
+    truncated = {
+        term: term_postings[:corpus.max_postings]
+        for term, term_postings in postings.items()
+    }
+    results = {
+        pk: nearest(pk, vector, truncated, limit, corpus.max_candidates)
+        for pk, vector in corpus.vectors.items()
+    }
+    extend_neighbours(results, corpus.counts, limit)
+    store_in_chunks(results, chunk_size)
+    with transaction.atomic():
+        save_new_posts(corpus, added, postings)
+        checkpoint.last_pk = max(corpus.counts)
+        checkpoint.post_count = total
+        checkpoint.save()
+    return len(results)
+
+
+def rebuild_related(full=False, limit=None, chunk_size=None):
+    """Пересчитывает соседей и возвращает число обработанных постов.
+
+    Без full загружаются только посты, появившиеся после прошлого
+    запуска: их соседи ищутся по сохраненному индексу, а к старым
+    постам новые добавляются, если попадают в их списки. Первый
+    запуск всегда полный; полный пересчет также обновляет IDF
+    и убирает из индекса удаленные посты.
+    """
+    limit = limit or settings.RELATED_POSTS_LIMIT
+    chunk_size = chunk_size or settings.RELATED_POSTS_CHUNK_SIZE
+    checkpoint, _ = RelatedCheckpoint.objects.get_or_create(pk=1)
+    if full or not checkpoint.last_pk:
+        return rebuild_all(checkpoint, limit, chunk_size)
+    return add_new_posts(checkpoint, limit, chunk_size)
+
+
+def related_posts(post, limit=None):
+    """Похожие посты из предрасчитанной таблицы одним запросом."""
+    links = (
+        RelatedPost.objects.filter(post=post, related__is_deleted=False)
+        .select_related('related__author', 'related__group')
+        .order_by('-score')[:limit or settings.RELATED_POSTS_LIMIT]
+    )
+    return [link.related for link in links]
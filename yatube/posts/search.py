@@ -0,0 +1,155 @@
+import re
+
+from django.db import connection
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape
+
+from .models import Post
+
+FTS_TABLE = 'posts_post_fts'
+
+CREATE_TABLE = f"""
+CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+    text,
+    content='posts_post',
+    content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2',
+    prefix='2 3 4'
+)
+"""
+
+TRIGGERS = {
+    f'{FTS_TABLE}_insert': f"""
+        CREATE TRIGGER {FTS_TABLE}_insert AFTER INSERT ON posts_post BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text);
+        END
+    """,
+    f'{FTS_TABLE}_delete': f"""
+        CREATE TRIGGER {FTS_TABLE}_delete AFTER DELETE ON posts_post BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text)
+            VALUES ('delete', old.id, old.text);
+        END
+    """,
+    f'{FTS_TABLE}_update': f"""
+        CREATE TRIGGER {FTS_TABLE}_update AFTER UPDATE OF text ON posts_post
+        BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text)
+            VALUES ('delete', old.id, old.text);
+            INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text);
+        END
+    """,
+}
+
+# Окончания для грубого стемминга русских слов в запросе: слово
+# обрезается до основы и ищется по префиксу, поэтому «котами» находит
+# «кот», «кота» и «коту».
+RUSSIAN_ENDINGS = sorted((
+    'ами', 'ями', 'ого', 'его', 'ому', 'ему', 'ыми', 'ими', 'иях', 'ием',
+    'ией', 'ах', 'ях', 'ов', 'ев', 'ей', 'ой', 'ий', 'ый', 'ая', 'яя',
+    'ое', 'ее', 'ые', 'ие', 'ом', 'ем', 'ам', 'ям', 'ую', 'юю', 'ию',
+    'ия', 'ть', 'ся', 'а', 'я', 'о', 'е', 'ы', 'и', 'у', 'ю', 'ь',
+), key=len, reverse=True)
+MIN_STEM = 3
+SNIPPET_START, SNIPPET_END = '\x02', '\x03'
+WORD = re.compile(r'\w+')
+
+
+def ensure_search_index(using=connection):
+    """Создает FTS5-таблицу и триггеры, если их нет.
+
+    SQLite теряет триггеры, когда Django пересоздает posts_post при
+    изменении схемы, поэтому проверка выполняется после каждой миграции,
+    а индекс при потере триггеров перестраивается.
+    """
+    if using.vendor != 'sqlite':
+        return
+    with using.cursor() as cursor:
+        cursor.execute(CREATE_TABLE)
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger'"
+        )
+        existing = {row[0] for row in cursor.fetchall()}
+        missing = [name for name in TRIGGERS if name not in existing]
+        for name in missing:
+            cursor.execute(TRIGGERS[name])
+        if missing:
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"
+            )
+
+
+def stem(word):
+    for ending in RUSSIAN_ENDINGS:
+        if word.endswith(ending) and len(word) - len(ending) >= MIN_STEM:
+            return word[:-len(ending)]
+    return word
+
+
+def build_match(query):
+    """Превращает пользовательский запрос в выражение MATCH."""
+    terms = [stem(word.lower()) for word in WORD.findall(query)]
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def matching_ids(query):
+    """Подзапрос с id постов, подходящих под запрос."""
+    return RawSQL(
+        f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+        (build_match(query),)
+    )
+
+
+def highlight(snippet):
+    return (
+        escape(snippet)
+        .replace(SNIPPET_START, '<mark>')
+        .replace(SNIPPET_END, '</mark>')
+    )
+
+
+def search_posts(query, limit, after=None):
+    """Возвращает страницу результатов и курсор следующей страницы.
+
+    Результаты упорядочены по (bm25, id), а курсор хранит эту пару
+    для последнего результата, поэтому страницы не зависят от OFFSET.
+    """
+    match = build_match(query)
+    if not match:
+        return [], None
+    params = [SNIPPET_START, SNIPPET_END, match]
+    keyset = ''
+    if after is not None:
+        keyset = (
+            f'AND (bm25({FTS_TABLE}) > %s '
+            f'OR (bm25({FTS_TABLE}) = %s AND p.id > %s))'
+        )
+        params.extend((after[0], after[0], after[1]))
+    params.append(limit + 1)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            SELECT p.id, bm25({FTS_TABLE}),
+                   snippet({FTS_TABLE}, 0, %s, %s, '…', 16)
+            FROM {FTS_TABLE}
+            JOIN posts_post p ON p.id = {FTS_TABLE}.rowid
+            WHERE {FTS_TABLE} MATCH %s AND NOT p.is_deleted {keyset}
+            ORDER BY bm25({FTS_TABLE}), p.id
+            LIMIT %s
+            """,
+            params
+        )
+        rows = cursor.fetchall()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = (rows[-1][1], rows[-1][0])
+    posts = Post.objects.select_related('author', 'group').in_bulk(
+        [row[0] for row in rows]
+    )
+    results = []
+    for post_id, _, snippet in rows:
+        if post_id in posts:
+            post = posts[post_id]
+            post.snippet = highlight(snippet)
+            results.append(post)
+    return results, next_cursor
@@ -0,0 +1,114 @@
+from django.db import connections
+from django.db.models import F
+
+from .autocomplete import GROUP, USER, group_entry, index, user_entry
+from .comments import splice_out
+from .duplicates import forget_signature, index_text
+from .follow_cache import forget_followees
+from .models import ContentSignature, Post
+from .months import forget_month
+from .notifications import schedule_fanout
+from .popular import COMMENT, FOLLOW, record_event
+from .search import ensure_search_index
+from .tags import forget_post_tags, sync_post_tags
+
+
+def create_search_index(sender, using, **kwargs):
+    ensure_search_index(connections[using])
+
+
+def update_user_autocomplete(sender, instance, update_fields=None,
+                             **kwargs):
+    if update_fields == {'last_login'}:
+        return
+    index.update(USER, instance, user_entry)
+
+
+def remove_user_autocomplete(sender, instance, **kwargs):
+    index.remove(USER, instance.pk)
+
+
+def update_group_autocomplete(sender, instance, **kwargs):
+    index.update(GROUP, instance, group_entry)
+
+
+def remove_group_autocomplete(sender, instance, **kwargs):
+    index.remove(GROUP, instance.pk)
+
+
+def update_post_tags(sender, instance, created, update_fields=None,
+                     **kwargs):
+    if update_fields is not None and 'text' not in update_fields:
+        return
+    sync_post_tags(instance, created)
+
+
+def remove_post_tags(sender, instance, **kwargs):
+    forget_post_tags(instance)
+
+
+def index_content(kind):
+    def handler(sender, instance, created, update_fields=None, **kwargs):
+        if update_fields is not None and 'text' not in update_fields:
+            return
+        index_text(
+            kind,
+            instance,
+            getattr(instance, '_content_signature', None),
+            created
+        )
+    return handler
+
+
+def forget_content(kind):
+    def handler(sender, instance, **kwargs):
+        forget_signature(kind, instance.pk)
+    return handler
+
+
+index_post_signature = index_content(ContentSignature.POST)
+index_comment_signature = index_content(ContentSignature.COMMENT)
+forget_post_signature = forget_content(ContentSignature.POST)
+forget_comment_signature = forget_content(ContentSignature.COMMENT)
+
+
+def forget_post_month(sender, instance, **kwargs):
+    forget_month(instance.pub_date)
+
+
+def forget_follow(sender, instance, **kwargs):
+    forget_followees(instance.user_id)
+
+
+def score_comment(sender, instance, created, **kwargs):
+    if created:
+        record_event(instance.post_id, instance.post.group_id, COMMENT)
+
+
+def score_follow(sender, instance, created, **kwargs):
+    """Подписка засчитывается последнему посту автора."""
+    if not created:
+        return
+    latest = Post.objects.filter(author_id=instance.author_id).values_list(
+        'pk', 'group_id'
+    ).first()
+    if latest is not None:
+        record_event(*latest, FOLLOW)
+
+
+def notify_followers(sender, instance, created, **kwargs):
+    if created:
+        schedule_fanout(instance)
+
+
+def release_reply(sender, instance, **kwargs):
+    if instance.parent_id:
+        sender.objects.filter(
+            pk=instance.parent_id, reply_count__gt=0
+        ).update(reply_count=F('reply_count') - 1)
+
+
+def splice_replies(sender, instance, **kwargs):
+    """Удаление комментария в обход очистки тоже поднимает его ответы."""
+    if instance.reply_count:
+        splice_out([instance])
@@ -0,0 +1,138 @@
+import heapq
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+from operator import itemgetter
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import Follow, FollowSuggestion, User
+
+FRIEND_OF_FRIEND_WEIGHT = 1.0
+CO_FOLLOW_WEIGHT = 0.5
+
+
+class Graph:
+    """Граф подписок в формате CSR.
+
+    Пользователи пронумерованы подряд; соседи вершины i лежат
+    в targets[offsets[i]:offsets[i + 1]] по возрастанию номеров.
+    """
+
+    def __init__(self, edges, ids):
+        self.ids = ids
+        self.offsets = array('l', [0] * (len(ids) + 1))
+        for source, _ in edges:
+            self.offsets[source + 1] += 1
+        for position in range(len(ids)):
+            self.offsets[position + 1] += self.offsets[position]
+        self.targets = array('l', [0] * len(edges))
+        filled = array('l', self.offsets[:-1])
+        for source, target in sorted(edges):
+            self.targets[filled[source]] = target
+            filled[source] += 1
+
+    def neighbours(self, node):
+        return self.targets[self.offsets[node]:self.offsets[node + 1]]
+
+    def has_edge(self, source, target):
+        start, end = self.offsets[source], self.offsets[source + 1]
+        position = bisect_left(self.targets, target, start, end)
+        return position < end and self.targets[position] == target
+
+
+def load_graph():
+    """Подписки в прямом и обратном CSR и список id по номерам."""
+    rows = list(Follow.objects.values_list('user_id', 'author_id'))
+    ids = sorted({pk for row in rows for pk in row})
+    number = {pk: position for position, pk in enumerate(ids)}
+    edges = [(number[user], number[author]) for user, author in rows]
+    return (
+        Graph(edges, ids),
+        Graph([(author, user) for user, author in edges], ids)
+    )
+
+
+def score_user(node, following, followers, max_fanout):
+    """Баллы кандидатов для вершины node.
+
+    Друзья друзей получают FRIEND_OF_FRIEND_WEIGHT за каждый путь,
+    подписки пользователей с общими подписками - CO_FOLLOW_WEIGHT.
+    Авторы с числом подписчиков больше max_fanout при обходе
+    пропускаются, чтобы один популярный автор не тянул весь граф.
+    """
+    scores = defaultdict(float)
+    for friend in following.neighbours(node):
+        for candidate in following.neighbours(friend):
+            scores[candidate] += FRIEND_OF_FRIEND_WEIGHT
+        fans = followers.neighbours(friend)
+        if len(fans) > max_fanout:
+            continue
+        for fan in fans:
+            if fan == node:
+                continue
+            for candidate in following.neighbours(fan):
+                scores[candidate] += CO_FOLLOW_WEIGHT
+    scores.pop(node, None)
+    return {
+        candidate: score for candidate, score in scores.items()
+        if not following.has_edge(node, candidate)
+    }
+
+
+def rebuild_suggestions(limit=None, chunk_size=None, max_fanout=None):
+    """Пересчитывает подсказки «на кого подписаться» для всех
+    пользователей с подписками и возвращает их число."""
+    limit = limit or settings.FOLLOW_SUGGESTIONS_LIMIT
+    chunk_size = chunk_size or settings.FOLLOW_SUGGESTIONS_CHUNK_SIZE
+    max_fanout = max_fanout or settings.FOLLOW_SUGGESTIONS_MAX_FANOUT
+    following, followers = load_graph()
+    ids = following.ids
+    inactive = set(
+        User.objects.filter(is_active=False, pk__in=ids).values_list(
+            'pk', flat=True
+        )
+    )
+    users = [
+        node for node in range(len(ids))
+        if following.offsets[node] < following.offsets[node + 1]
+        and ids[node] not in inactive
+    ]
+    for start in range(0, len(users), chunk_size):
+        chunk = users[start:start + chunk_size]
+        rows = []
+        for node in chunk:
+            scores = score_user(node, following, followers, max_fanout)
+            top = heapq.nlargest(
+                limit,
+                ((candidate, score) for candidate, score in scores.items()
+                 if ids[candidate] not in inactive),
+                key=itemgetter(1)
+            )
+            rows.extend(
+                FollowSuggestion(
+                    user_id=ids[node], author_id=ids[candidate], score=score
+                )
+                for candidate, score in top
+            )
+        with transaction.atomic():
+            FollowSuggestion.objects.filter(
+                user_id__in=[ids[node] for node in chunk]
+            ).delete()
+            FollowSuggestion.objects.bulk_create(rows)
+    FollowSuggestion.objects.exclude(
+        user_id__in=Follow.objects.values('user_id')
+    ).delete()
+    return len(users)
+
+
+def suggested_authors(user, limit=None):
+    """Подсказки для user одним запросом без уже выбранных авторов."""
+    suggestions = (
+        FollowSuggestion.objects.filter(user=user, author__is_active=True)
+        .exclude(author__following__user=user)
+        .select_related('author')
+        .order_by('-score')[:limit or settings.FOLLOW_SUGGESTIONS_LIMIT]
+    )
+    return [suggestion.author for suggestion in suggestions]
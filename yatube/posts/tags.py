@@ -0,0 +1,127 @@
+import re
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F, Q, Sum
+from django.utils import timezone
+
+from .models import PostTag, Tag, TagDayCount
+
+TAG = re.compile(r'(?<!\w)#(\w{1,64})')
+TRENDING_CACHE_KEY = 'trending_tags'
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+
+
+def extract_tags(text):
+    return {name.lower() for name in TAG.findall(text)}
+
+
+def get_tags(names):
+    """Теги по именам; недостающие создаются одним bulk_create."""
+    tags = {tag.name: tag for tag in Tag.objects.filter(name__in=names)}
+    missing = [Tag(name=name) for name in names if name not in tags]
+    if missing:
+        Tag.objects.bulk_create(missing, ignore_conflicts=True)
+        tags = {tag.name: tag for tag in Tag.objects.filter(name__in=names)}
+    return tags
+
+
+def adjust_day_counts(tag_ids, day, delta):
+    TagDayCount.objects.bulk_create(
+        (TagDayCount(tag_id=tag_id, day=day) for tag_id in tag_ids),
+        ignore_conflicts=True
+    )
+    TagDayCount.objects.filter(day=day, tag_id__in=tag_ids).update(
+        count=F('count') + delta
+    )
+
+
+def sync_post_tags(post, created=False):
+    """Приводит теги поста к тегам в тексте, меняя только разницу."""
+    names = extract_tags(post.text)
+    if created and not names:
+        return
+    current = {} if created else dict(
+        PostTag.objects.filter(post=post).values_list('tag__name', 'tag_id')
+    )
+    removed = [current[name] for name in current if name not in names]
+    added = [name for name in names if name not in current]
+    day = timezone.localdate(post.pub_date)
+    if removed:
+        PostTag.objects.filter(post=post, tag_id__in=removed).delete()
+        adjust_day_counts(removed, day, -1)
+    if added:
+        tags = get_tags(added)
+        PostTag.objects.bulk_create(
+            PostTag(tag=tags[name], post=post, pub_date=post.pub_date)
+            for name in added
+        )
+        adjust_day_counts([tags[name].pk for name in added], day, 1)
+
+
+def forget_post_tags(post):
+    tag_ids = list(
+        PostTag.objects.filter(post=post).values_list('tag_id', flat=True)
+    )
+    if tag_ids:
+        adjust_day_counts(tag_ids, timezone.localdate(post.pub_date), -1)
+
+
+def make_cursor(pub_date, post_id):
+    return f'{(pub_date - EPOCH) // MICROSECOND}_{post_id}'
+
+
+def parse_cursor(value):
+    try:
+        micros, post_id = value.split('_')
+        return EPOCH + int(micros) * MICROSECOND, int(post_id)
+    except (AttributeError, OverflowError, ValueError):
+        return None
+
+
+def tag_feed(tag, before=None, limit=10):
+    """Страница постов с тегом и курсор следующей страницы.
+
+    Посты идут по индексу (tag, pub_date, post) от новых к старым,
+    курсор - пара (pub_date, post_id) последнего поста страницы.
+    """
+    rows = PostTag.objects.filter(tag=tag, post__is_deleted=False)
+    cursor = parse_cursor(before)
+    if cursor is not None:
+        pub_date, post_id = cursor
+        rows = rows.filter(
+            Q(pub_date__lt=pub_date)
+            | Q(pub_date=pub_date, post_id__lt=post_id)
+        )
+    rows = list(
+        rows.select_related('post__author', 'post__group')
+        .order_by('-pub_date', '-post_id')[:limit + 1]
+    )
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = make_cursor(rows[-1].pub_date, rows[-1].post_id)
+    return [row.post for row in rows], next_cursor
+
+
+def trending_tags(limit=None):
+    """Самые частые теги за последние TRENDING_TAGS_DAYS дней."""
+    trending = cache.get(TRENDING_CACHE_KEY)
+    if trending is None:
+        since = timezone.localdate() - timedelta(
+            days=settings.TRENDING_TAGS_DAYS
+        )
+        trending = list(
+            TagDayCount.objects.filter(day__gte=since)
+            .values('tag__name')
+            .annotate(total=Sum('count'))
+            .filter(total__gt=0)
+            .order_by('-total', 'tag__name')
+            .values_list('tag__name', 'total')
+        )[:settings.TRENDING_TAGS_LIMIT]
+        cache.set(
+            TRENDING_CACHE_KEY, trending, settings.TRENDING_TAGS_TIMEOUT
+        )
+    return trending[:limit]
@@ -0,0 +1,83 @@
+import re
+
+from django import template
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from posts.models import Post
+from posts.reactions import attach_counts
+
+register = template.Library()
+
+SLOT = '<!--reactions:{}-->'
+SLOT_PATTERN = re.compile(r'<!--reactions:(\d+)-->')
+
+
+@register.simple_tag(takes_context=True)
+def load_reactions(context, posts):
+    """Счетчики реакций для всех постов страницы одним get_many
+    и реакции текущего пользователя одним запросом."""
+    attach_counts(posts, context['request'].user)
+    return ''
+
+
+@register.simple_tag
+def reactions_slot(post):
+    """Метка места панели реакций внутри общего для всех кеша."""
+    if not isinstance(post, Post):
+        return ''
+    return mark_safe(SLOT.format(post.pk))
+
+
+class FillReactionsNode(template.Node):
+    def __init__(self, nodelist, timeout):
+        self.nodelist = nodelist
+        self.timeout = timeout
+
+    def render(self, context):
+        html = self.nodelist.render(context)
+        pks = [int(pk) for pk in SLOT_PATTERN.findall(html)]
+        if not pks:
+            return html
+        request = context['request']
+        key = make_template_fragment_key(
+            'reactions', [request.user.pk, *pks]
+        )
+        bars = cache.get(key)
+        if bars is None:
+            posts = [Post(pk=pk) for pk in pks]
+            attach_counts(posts, request.user)
+            bars = {
+                post.pk: render_to_string(
+                    'posts/includes/reactions.html', {'post': post}, request
+                )
+                for post in posts
+            }
+            cache.set(key, bars, self.timeout.resolve(context))
+        return mark_safe(SLOT_PATTERN.sub(
+            lambda match: bars[int(match.group(1))], html
+        ))
+
+
+@register.tag
+def fill_reactions(parser, token):
+    """Подставляет в метки reactions_slot панели реакций пользователя.
+
+    {% fill_reactions 20 %}{% cache 20 page %}...{% endcache %}
+    {% endfill_reactions %}
+
+    Список постов кешируется один на всех, а реакции пользователя
+    и формы с его CSRF-токеном кешируются отдельно под его id на timeout
+    секунд, поэтому страница одного пользователя не меняется, пока
+    жив кеш списка.
+    """
+    bits = token.split_contents()
+    if len(bits) != 2:
+        raise template.TemplateSyntaxError(
+            f"'{bits[0]}' принимает время жизни кеша."
+        )
+    nodelist = parser.parse(('endfill_reactions',))
+    parser.delete_first_token()
+    return FillReactionsNode(nodelist, parser.compile_filter(bits[1]))
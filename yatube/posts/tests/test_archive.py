@@ -0,0 +1,126 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.models import (ArchivedComment, ArchivedPost, Comment, Group, Post,
+                          PostTag, Reaction, ReactionCounter, TagDayCount,
+                          User)
+from posts.reactions import set_reaction
+
+
+class ArchiveTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='user')
+        cls.group = Group.objects.create(
+            title='Название группы',
+            slug='test-slug',
+        )
+        cls.old_post = Post.objects.create(
+            author=cls.user,
+            text='Старая запись',
+            group=cls.group
+        )
+        Comment.objects.create(
+            post=cls.old_post,
+            author=cls.user,
+            text='Старый комментарий'
+        )
+        cls.new_post = Post.objects.create(
+            author=cls.user,
+            text='Новая запись',
+            group=cls.group
+        )
+        Post.objects.filter(pk=cls.old_post.pk).update(
+            pub_date=timezone.now() - timedelta(days=400)
+        )
+
+    def setUp(self):
+        self.guest_client = Client()
+        call_command(
+            'archive_posts', days=365, batch_size=1, stdout=StringIO()
+        )
+
+    def test_old_posts_moved_to_archive(self):
+        """Старые посты и комментарии переносятся в архив."""
+        self.assertFalse(Post.objects.filter(pk=self.old_post.pk).exists())
+        self.assertTrue(Post.objects.filter(pk=self.new_post.pk).exists())
+        archived = ArchivedPost.objects.get(pk=self.old_post.pk)
+        self.assertEqual(archived.text, self.old_post.text)
+        self.assertEqual(ArchivedComment.objects.filter(
+            post=archived).count(), 1
+        )
+        self.assertFalse(Comment.objects.filter(
+            post_id=self.old_post.pk).exists()
+        )
+
+    def test_newest_post_is_archived(self):
+        """Пост с максимальным id тоже уходит в архив, а id не
+        переиспользуются."""
+        Post.objects.filter(pk=self.new_post.pk).update(
+            pub_date=timezone.now() - timedelta(days=400)
+        )
+        call_command('archive_posts', days=365, stdout=StringIO())
+        self.assertTrue(
+            ArchivedPost.objects.filter(pk=self.new_post.pk).exists()
+        )
+        post = Post.objects.create(author=self.user, text='Свежая запись')
+        self.assertGreater(post.pk, self.new_post.pk)
+
+    def test_reactions_and_tags_are_dropped(self):
+        """Реакции и теги архивного поста удаляются без каскада,
+        ответы и дневные счетчики тегов сохраняются."""
+        post = Post.objects.create(author=self.user, text='Старый #сад')
+        parent = Comment.objects.create(
+            post=post, author=self.user, text='Вопрос'
+        )
+        Comment.objects.create(
+            post=post, author=self.user, text='Ответ', parent=parent
+        )
+        set_reaction(self.user, post.pk, Reaction.LIKE, True)
+        day_counts = list(TagDayCount.objects.values_list('count', flat=True))
+        Post.objects.filter(pk=post.pk).update(
+            pub_date=timezone.now() - timedelta(days=400)
+        )
+        call_command('archive_posts', days=365, stdout=StringIO())
+        self.assertFalse(Reaction.objects.filter(post_id=post.pk).exists())
+        self.assertFalse(
+            ReactionCounter.objects.filter(post_id=post.pk).exists()
+        )
+        self.assertFalse(PostTag.objects.filter(post_id=post.pk).exists())
+        self.assertEqual(
+            list(TagDayCount.objects.values_list('count', flat=True)),
+            day_counts
+        )
+        self.assertEqual(
+            ArchivedComment.objects.get(pk=parent.pk).reply_count, 1
+        )
+
+    def test_post_detail_falls_through_to_archive(self):
+        """Страница поста открывает пост из архива."""
+        response = self.guest_client.get(reverse(
+            'posts:post_detail',
+            kwargs={'post_id': self.old_post.pk}
+        ))
+        self.assertEqual(response.context['post'].text, self.old_post.text)
+        self.assertTrue(response.context['is_archived'])
+        self.assertEqual(len(response.context['comments']), 1)
+
+    def test_lists_include_archive(self):
+        """Профиль и группа показывают архивные посты после новых."""
+        urls = (
+            reverse('posts:profile', kwargs={'username': self.user}),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                page_obj = self.guest_client.get(url).context['page_obj']
+                self.assertEqual(
+                    [post.text for post in page_obj],
+                    [self.new_post.text, self.old_post.text]
+                )
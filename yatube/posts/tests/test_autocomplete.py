@@ -0,0 +1,84 @@
+from unittest import mock
+
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.autocomplete import GROUP, USER, index
+from posts.models import Group, User
+
+
+class AutocompleteTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='leo', first_name='Лев', last_name='Толстой'
+        )
+        cls.group = Group.objects.create(
+            title='Русская литература',
+            slug='literature',
+        )
+
+    def setUp(self):
+        self.guest_client = Client()
+        index.build()
+
+    def test_prefix_search(self):
+        """Поиск находит авторов и группы по началу любого ключа."""
+        cases = {
+            'le': (USER, self.user.pk),
+            'толс': (USER, self.user.pk),
+            'лит': (GROUP, self.group.pk),
+            'русс': (GROUP, self.group.pk),
+        }
+        for prefix, (kind, pk) in cases.items():
+            with self.subTest(prefix=prefix):
+                results = index.search(prefix, 10)
+                self.assertEqual(
+                    [(item['kind'], item['id']) for item in results],
+                    [(kind, pk)]
+                )
+
+    def test_index_follows_signals(self):
+        """Индекс обновляется при сохранении и удалении объектов."""
+        group = Group.objects.create(title='Поэзия', slug='poetry')
+        self.assertEqual(index.search('поэ', 10)[0]['id'], group.pk)
+        group.title = 'Проза'
+        group.save()
+        self.assertEqual(index.search('поэ', 10), [])
+        self.assertEqual(index.search('про', 10)[0]['id'], group.pk)
+        group.delete()
+        self.assertEqual(index.search('про', 10), [])
+
+    def test_change_during_build_is_kept(self):
+        """Правка, пришедшая во время сборки, не теряется."""
+        read = index.read
+
+        def read_and_change():
+            snapshot = read()
+            index.add(GROUP, 0, {'Поэзия'}, ('Поэзия', 'poetry'))
+            return snapshot
+
+        with mock.patch.object(index, 'read', side_effect=read_and_change):
+            index.build()
+        self.assertEqual(index.search('поэ', 10)[0]['id'], 0)
+
+    @override_settings(AUTOCOMPLETE_REBUILD_INTERVAL=-1)
+    def test_stale_index_rebuilt_in_background(self):
+        """Устаревший индекс отвечает сразу, а собирается в фоне."""
+        with mock.patch.object(index, 'build_in_background') as rebuild:
+            self.assertEqual(len(index.search('le', 10)), 1)
+        rebuild.assert_called_once_with()
+
+    def test_autocomplete_endpoint(self):
+        """Эндпоинт отдает JSON с подсказками нужного типа."""
+        response = self.guest_client.get(
+            reverse('posts:autocomplete'), {'q': 'л', 'kind': GROUP}
+        )
+        results = response.json()['results']
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0]['value'], self.group.slug)
+        self.assertEqual(
+            results[0]['url'],
+            reverse('posts:group_list', kwargs={'slug': self.group.slug})
+        )
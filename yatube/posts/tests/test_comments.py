@@ -0,0 +1,190 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.deletion import schedule_user_deletion
+from posts.models import Comment, Post, User
+
+
+@override_settings(COMMENTS_PAGE_SIZE=2)
+class CommentPaginationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='user')
+        cls.post = Post.objects.create(author=cls.user, text='Пост')
+        cls.comments = [
+            Comment.objects.create(
+                post=cls.post, author=cls.user, text=f'Комментарий {i}'
+            )
+            for i in range(5)
+        ]
+
+    def setUp(self):
+        self.client = Client()
+
+    def test_first_page_inline(self):
+        """Страница поста показывает только первую страницу комментариев
+        без отдельного запроса автора на каждый комментарий."""
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        )
+        self.assertEqual(
+            response.context['comments'], self.comments[:2:-1]
+        )
+        self.assertContains(response, 'Ещё комментарии')
+
+    def test_fragment_pages(self):
+        """Фрагмент по курсору отдает следующие комментарии до конца."""
+        url = reverse('posts:post_comments', kwargs={'post_id': self.post.pk})
+        seen, cursor = [], None
+        for _ in range(3):
+            response = self.client.get(url, {'before': cursor} if cursor
+                                       else {})
+            seen.extend(response.context['comments'])
+            cursor = response.context['next_cursor']
+        self.assertEqual(seen, self.comments[::-1])
+        self.assertIsNone(cursor)
+        self.assertNotContains(response, 'Ещё комментарии')
+
+    def test_no_queries_per_comment(self):
+        """Число запросов фрагмента не зависит от числа комментариев."""
+        url = reverse('posts:post_comments', kwargs={'post_id': self.post.pk})
+        with self.assertNumQueries(3):
+            self.client.get(url)
+
+
+@override_settings(
+    COMMENTS_PAGE_SIZE=2, COMMENTS_REPLY_DEPTH=2, COMMENTS_REPLIES_PAGE_SIZE=2
+)
+class CommentThreadTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='user')
+        cls.post = Post.objects.create(author=cls.user, text='Пост')
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def comment(self, text, parent=None):
+        return Comment.objects.create(
+            post=self.post, author=self.user, text=text, parent=parent
+        )
+
+    def texts(self, response):
+        return [comment.text for comment in response.context['comments']]
+
+    def test_path_and_depth(self):
+        """Путь ответа продолжает путь родителя, счетчик ответов растет."""
+        root = self.comment('Корень')
+        reply = self.comment('Ответ', root)
+        root.refresh_from_db()
+        reply.refresh_from_db()
+        self.assertTrue(reply.path.startswith(root.path))
+        self.assertEqual((root.depth, reply.depth), (0, 1))
+        self.assertEqual(root.reply_count, 1)
+
+    def test_reply_via_form(self):
+        """Форма ответа создает комментарий с родителем."""
+        root = self.comment('Корень')
+        self.client.post(
+            reverse('posts:add_comment', kwargs={'post_id': self.post.pk}),
+            {'text': 'Ответ', 'parent': root.pk}
+        )
+        self.assertEqual(root.replies.get().text, 'Ответ')
+
+    def test_bad_parent_is_rejected(self):
+        """Нечисловой parent дает 400, а не ошибку сервера."""
+        response = self.client.post(
+            reverse('posts:add_comment', kwargs={'post_id': self.post.pk}),
+            {'text': 'Ответ', 'parent': 'x'}
+        )
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post(
+            reverse('posts:add_comment', kwargs={'post_id': self.post.pk}),
+            {'text': 'Ответ', 'parent': '²'}
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Comment.objects.exists())
+
+    def test_deleted_comment_keeps_replies(self):
+        """Ответы удаленного автора поднимаются на его место,
+        а ответы других пользователей остаются."""
+        other = User.objects.create_user(username='other')
+        root = self.comment('Корень')
+        middle = Comment.objects.create(
+            post=self.post, author=other, text='Чужой', parent=root
+        )
+        reply = self.comment('Ответ', middle)
+        answer = self.comment('Ответ 2', reply)
+        schedule_user_deletion(other)
+        Post.all_objects.filter(pk=self.post.pk).update(is_deleted=False)
+        call_command('purge_deleted', pause=0, stdout=StringIO())
+        root.refresh_from_db()
+        reply.refresh_from_db()
+        answer.refresh_from_db()
+        self.assertEqual(reply.parent, root)
+        self.assertEqual(reply.path, root.path + reply.path[-8:])
+        self.assertEqual((reply.depth, answer.depth), (1, 2))
+        self.assertTrue(answer.path.startswith(reply.path))
+        self.assertEqual(root.reply_count, 1)
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        )
+        self.assertEqual(
+            self.texts(response), ['Корень', 'Ответ', 'Ответ 2']
+        )
+
+    def test_direct_delete_keeps_replies(self):
+        """Удаление комментария в обход очистки, в том числе вместе
+        с автором, поднимает ответы на его место, и они остаются видны."""
+        other = User.objects.create_user(username='other')
+        root = Comment.objects.create(
+            post=self.post, author=other, text='Чужой'
+        )
+        reply = self.comment('Ответ', root)
+        answer = self.comment('Ответ 2', reply)
+        self.comment('Ответ 3', answer)
+        other.delete()
+        reply.refresh_from_db()
+        answer.refresh_from_db()
+        self.assertIsNone(reply.parent)
+        self.assertEqual((reply.depth, answer.depth), (0, 1))
+        self.assertEqual(reply.path, reply.path[-8:])
+        self.assertTrue(answer.path.startswith(reply.path))
+        Comment.objects.filter(pk=answer.pk).delete()
+        reply.refresh_from_db()
+        self.assertEqual(reply.reply_count, 1)
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        )
+        self.assertEqual(self.texts(response), ['Ответ', 'Ответ 3'])
+
+    def test_threads_in_display_order(self):
+        """Ветки идут от новых к старым, ответы внутри - по порядку,
+        глубже лимита и сверх лимита на ветку - по ссылкам."""
+        first = self.comment('Первый')
+        answer = self.comment('Ответ 1', first)
+        deep = self.comment('Ответ 1.1', answer)
+        self.comment('Ответ 1.1.1', deep)
+        self.comment('Ответ 2', first)
+        self.comment('Ответ 3', first)
+        second = self.comment('Второй')
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        )
+        self.assertEqual(
+            self.texts(response), ['Второй', 'Первый', 'Ответ 1', 'Ответ 1.1']
+        )
+        comments = response.context['comments']
+        self.assertIsNotNone(comments[3].more_url)
+        self.assertIsNotNone(comments[3].continue_url)
+        self.assertEqual(second.pk, comments[0].pk)
+        response = self.client.get(comments[3].continue_url)
+        self.assertEqual(self.texts(response), ['Ответ 2', 'Ответ 3'])
+        response = self.client.get(comments[3].more_url)
+        self.assertEqual(self.texts(response), ['Ответ 1.1.1'])
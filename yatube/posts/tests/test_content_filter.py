@@ -0,0 +1,82 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.content_filter import Automaton, content_filter
+from posts.models import Comment, Post, User
+
+TEMP_DIR = tempfile.mkdtemp()
+BLOCKLIST = os.path.join(TEMP_DIR, 'blocklist.txt')
+
+
+@override_settings(CONTENT_FILTER_FILE=BLOCKLIST)
+class ContentFilterTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='user')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_DIR, ignore_errors=True)
+
+    def setUp(self):
+        self.write_blocklist('казино\nбыстрый  заработок\n')
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def write_blocklist(self, content):
+        with open(BLOCKLIST, 'w', encoding='utf-8') as blocklist:
+            blocklist.write(content)
+        # Время изменения может не успеть смениться между записями.
+        os.utime(BLOCKLIST, ns=(0, os.stat(BLOCKLIST).st_mtime_ns + 1))
+
+    def test_automaton_finds_overlapping_phrases(self):
+        """Автомат находит все вхождения, в том числе вложенные."""
+        automaton = Automaton(['he', 'she', 'hers', 'his'])
+        self.assertEqual(
+            sorted(automaton.finditer('ushers')),
+            [(1, 4), (2, 4), (2, 6)]
+        )
+
+    def test_matches_whole_words_only(self):
+        """Фраза ищется без учета регистра и только целыми словами."""
+        self.assertEqual(
+            content_filter.matches('Лучшее КАЗИНО и быстрый\nзаработок'),
+            ['казино', 'быстрый заработок']
+        )
+        self.assertEqual(content_filter.matches('казиноплекс'), [])
+
+    def test_hot_reload(self):
+        """Изменение списка подхватывается без перезапуска."""
+        self.assertEqual(content_filter.matches('ставки'), [])
+        self.write_blocklist('ставки\n')
+        self.assertEqual(content_filter.matches('ставки'), ['ставки'])
+
+    def test_forms_reject_blocked_text(self):
+        """Пост и комментарий со стоп-фразой не сохраняются."""
+        self.authorized_client.post(
+            reverse('posts:post_create'), {'text': 'Заходите в казино'}
+        )
+        self.assertFalse(Post.objects.exists())
+        post = Post.objects.create(author=self.user, text='Пост')
+        self.authorized_client.post(
+            reverse('posts:add_comment', kwargs={'post_id': post.pk}),
+            {'text': 'Казино!'}
+        )
+        self.assertFalse(Comment.objects.exists())
+
+    def test_benchmark_command(self):
+        """Бенчмарк выводит скорость в МБ/с."""
+        out = StringIO()
+        call_command(
+            'benchmark_content_filter', '--phrases', '50', '--size', '0.01',
+            stdout=out
+        )
+        self.assertIn('МБ/с', out.getvalue())
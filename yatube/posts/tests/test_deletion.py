@@ -0,0 +1,183 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from core.models import Job
+from core.queue import work
+from posts.deletion import schedule_post_deletion, schedule_user_deletion
+from posts.models import (Comment, Follow, FollowSuggestion, Group,
+                          GroupFollow, Notification, NotificationState,
+                          PendingDeletion, Post, Reaction, ReactionCounter,
+                          User)
+from posts.notifications import fanout_step
+from posts.reactions import reaction_counts, set_reaction
+
+
+class DeletionTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='user')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.posts = [
+            Post.objects.create(author=cls.user, text=f'Запись {i}')
+            for i in range(3)
+        ]
+        for post in cls.posts:
+            Comment.objects.create(
+                post=post, author=cls.reader, text='Комментарий'
+            )
+        Follow.objects.create(user=cls.reader, author=cls.user)
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_post_delete_hides_post_at_once(self):
+        """Удаленный автором пост сразу пропадает из ленты."""
+        post = self.posts[0]
+        self.authorized_client.post(
+            reverse('posts:post_delete', kwargs={'post_id': post.pk})
+        )
+        self.assertFalse(Post.objects.filter(pk=post.pk).exists())
+        self.assertTrue(Post.all_objects.filter(pk=post.pk).exists())
+        response = self.guest_client.get(reverse('posts:index'))
+        self.assertNotIn(post, response.context['page_obj'])
+        response = self.guest_client.get(
+            reverse('posts:post_detail', kwargs={'post_id': post.pk})
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_admin_delete_goes_through_pipeline(self):
+        """Удаление из админки ставит пост и пользователя в очередь
+        очистки, синхронного delete_selected нет."""
+        admin = User.objects.create_superuser('admin', 'a@a.ru', 'pass')
+        client = Client()
+        client.force_login(admin)
+        for model in ('posts_post', 'auth_user'):
+            with self.subTest(model=model):
+                response = client.get(reverse(f'admin:{model}_changelist'))
+                actions = dict(
+                    response.context['action_form'].fields['action'].choices
+                )
+                self.assertNotIn('delete_selected', actions)
+                self.assertIn('delete_in_background', actions)
+        post = self.posts[0]
+        client.post(
+            reverse('admin:posts_post_delete', args=(post.pk,)),
+            {'post': 'yes'}
+        )
+        self.assertTrue(Post.all_objects.get(pk=post.pk).is_deleted)
+        client.post(
+            reverse('admin:auth_user_delete', args=(self.reader.pk,)),
+            {'post': 'yes'}
+        )
+        self.assertFalse(User.objects.get(pk=self.reader.pk).is_active)
+        self.assertEqual(PendingDeletion.objects.count(), 2)
+
+    def test_deleted_author_month_archive(self):
+        """Архив месяца удаленного автора недоступен, как и профиль."""
+        schedule_user_deletion(self.user)
+        today = timezone.localdate()
+        response = self.guest_client.get(reverse(
+            'posts:profile_month_archive',
+            args=(self.user.username, today.year, today.month)
+        ))
+        self.assertEqual(response.status_code, 404)
+
+    def test_purge_removes_user_in_batches(self):
+        """Фоновая команда удаляет пользователя и связанные строки."""
+        schedule_user_deletion(self.user)
+        response = self.guest_client.get(
+            reverse('posts:profile', kwargs={'username': self.user})
+        )
+        self.assertEqual(response.status_code, 404)
+        call_command(
+            'purge_deleted', batch_size=2, pause=0, max_batches=1,
+            stdout=StringIO()
+        )
+        self.assertTrue(User.objects.filter(pk=self.user.pk).exists())
+        call_command('purge_deleted', batch_size=2, pause=0, stdout=StringIO())
+        self.assertFalse(User.objects.filter(pk=self.user.pk).exists())
+        self.assertFalse(Post.all_objects.exists())
+        self.assertFalse(Comment.objects.exists())
+        self.assertFalse(Follow.objects.exists())
+        self.assertFalse(PendingDeletion.objects.exists())
+
+    @override_settings(POSTS_PURGE_PAUSE=0)
+    def test_purge_runs_as_background_job(self):
+        """Удаление ставит задачу, воркер дочищает строки."""
+        post = self.posts[1]
+        schedule_post_deletion(post)
+        schedule_post_deletion(self.posts[2])
+        self.assertEqual(
+            Job.objects.filter(name='posts.purge_deleted').count(), 1
+        )
+        work(burst=True)
+        self.assertFalse(Post.all_objects.filter(pk=post.pk).exists())
+        self.assertFalse(PendingDeletion.objects.exists())
+
+    def test_purge_releases_reactions(self):
+        """Реакции удаляемого пользователя вычитаются из счетчиков."""
+        other = Post.objects.create(author=self.reader, text='Чужой пост')
+        set_reaction(self.user, other.pk, Reaction.LIKE, True)
+        set_reaction(self.reader, other.pk, Reaction.LIKE, True)
+        set_reaction(self.reader, self.posts[0].pk, Reaction.LOVE, True)
+        schedule_user_deletion(self.user)
+        call_command('purge_deleted', batch_size=2, pause=0, stdout=StringIO())
+        self.assertEqual(
+            list(Reaction.objects.values_list('user_id', 'post_id')),
+            [(self.reader.pk, other.pk)]
+        )
+        self.assertFalse(
+            ReactionCounter.objects.exclude(post=other).exists()
+        )
+        self.assertEqual(reaction_counts([other.pk])[other.pk], {'like': 1})
+
+    def test_purge_removes_notifications_in_batches(self):
+        """Уведомления о посте удаляются пачками раньше самого поста."""
+        post = Post.objects.create(author=self.user, text='Новость')
+        while fanout_step(10) is not None:
+            pass
+        Notification.objects.create(user=self.user, post=self.posts[0])
+        NotificationState.objects.create(user=self.user, latest=post.pk)
+        self.assertEqual(Notification.objects.filter(post=post).count(), 1)
+        schedule_post_deletion(post)
+        call_command(
+            'purge_deleted', batch_size=1, pause=0, max_batches=1,
+            stdout=StringIO()
+        )
+        self.assertFalse(Notification.objects.filter(post=post).exists())
+        self.assertTrue(Post.all_objects.filter(pk=post.pk).exists())
+        schedule_user_deletion(self.user)
+        call_command('purge_deleted', batch_size=1, pause=0, stdout=StringIO())
+        self.assertFalse(Notification.objects.exists())
+        self.assertFalse(
+            NotificationState.objects.filter(user_id=self.user.pk).exists()
+        )
+
+    def test_purge_removes_subscriptions(self):
+        """Подписки на группы и подсказки удаляются до пользователя."""
+        group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        GroupFollow.objects.create(user=self.user, group=group)
+        FollowSuggestion.objects.create(
+            user=self.user, author=self.reader, score=1
+        )
+        FollowSuggestion.objects.create(
+            user=self.reader, author=self.user, score=1
+        )
+        schedule_user_deletion(self.user)
+        call_command(
+            'purge_deleted', batch_size=1, pause=0, max_batches=2,
+            stdout=StringIO()
+        )
+        self.assertFalse(GroupFollow.objects.exists())
+        self.assertTrue(User.objects.filter(pk=self.user.pk).exists())
+        call_command('purge_deleted', batch_size=1, pause=0, stdout=StringIO())
+        self.assertFalse(FollowSuggestion.objects.exists())
@@ -0,0 +1,86 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core import mail
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from core.models import BackfillCheckpoint
+from posts.digest import Digest
+from posts.models import Follow, Group, GroupFollow, Post, User
+
+
+class DigestTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.readers = [
+            User.objects.create_user(
+                username=f'reader{i}', email=f'reader{i}@example.com'
+            )
+            for i in range(4)
+        ]
+        Follow.objects.create(user=cls.readers[0], author=cls.author)
+        Follow.objects.create(user=cls.readers[1], author=cls.author)
+        GroupFollow.objects.create(user=cls.readers[2], group=cls.group)
+        cls.until = timezone.now()
+        cls.post = Post.objects.create(
+            author=cls.author, text='Свежий пост автора'
+        )
+        cls.group_post = Post.objects.create(
+            author=cls.readers[3], group=cls.group, text='Пост в группе'
+        )
+        old = Post.objects.create(author=cls.author, text='Старый пост')
+        Post.objects.filter(pk__in=(cls.post.pk, cls.group_post.pk)).update(
+            pub_date=cls.until - timedelta(hours=1)
+        )
+        Post.objects.filter(pk=old.pk).update(
+            pub_date=cls.until - timedelta(days=2)
+        )
+
+    def test_digest_contains_window_posts(self):
+        """Письма получают только подписчики, в них посты окна."""
+        sent = Digest('daily', until=self.until, chunk_size=2).run()
+        self.assertEqual(sent, 3)
+        by_address = {message.to[0]: message for message in mail.outbox}
+        self.assertEqual(set(by_address), {
+            'reader0@example.com', 'reader1@example.com',
+            'reader2@example.com',
+        })
+        body = by_address['reader0@example.com'].body
+        self.assertIn('Свежий пост автора', body)
+        self.assertNotIn('Старый пост', body)
+        self.assertIn('Пост в группе', by_address['reader2@example.com'].body)
+
+    def test_one_connection_per_run(self):
+        """Все куски отправляются через одно открытое соединение."""
+        with mock.patch('posts.digest.get_connection') as get_connection:
+            get_connection.return_value.send_messages.return_value = 1
+            Digest('daily', until=self.until, chunk_size=1).run()
+        get_connection.assert_called_once_with()
+        self.assertEqual(
+            get_connection.return_value.send_messages.call_count, 3
+        )
+
+    def test_run_resumes_from_checkpoint(self):
+        """Повторный запуск продолжает с сохраненного куска."""
+        digest = Digest('weekly', until=self.until, chunk_size=2)
+        BackfillCheckpoint.objects.create(
+            name=digest.name, last_pk=self.readers[1].pk
+        )
+        self.assertEqual(digest.run(), 1)
+        self.assertEqual(mail.outbox[0].to, ['reader2@example.com'])
+        self.assertEqual(
+            Digest('weekly', until=self.until).run(), 0
+        )
+
+    def test_command(self):
+        """Команда рассылает дайджест за выбранный период."""
+        out = StringIO()
+        call_command('send_digest', period='weekly', stdout=out)
+        self.assertIn('digest:weekly:', out.getvalue())
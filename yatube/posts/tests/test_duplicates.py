@@ -0,0 +1,108 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.duplicates import signature, similarity
+from posts.management.commands import cluster_duplicates
+from posts.models import (Comment, ContentBand, ContentSignature, Post,
+                          User)
+
+SPAM = (
+    'Купите наши лучшие часы со скидкой прямо сейчас, '
+    'доставка по всей стране бесплатно и быстро'
+)
+
+
+class DuplicateTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='user')
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_similarity_of_near_duplicates(self):
+        """Почти одинаковые тексты похожи, разные - нет."""
+        base = signature(SPAM)
+        self.assertGreaterEqual(similarity(base, signature(SPAM + '!')), 0.8)
+        self.assertLess(
+            similarity(base, signature('Совсем другой текст о погоде')), 0.5
+        )
+
+    def test_post_signature_and_flag(self):
+        """Пост получает сигнатуру и полосы, повтор помечается."""
+        first = Post.objects.create(author=self.user, text=SPAM)
+        second = Post.objects.create(author=self.user, text=SPAM.upper())
+        self.assertEqual(
+            ContentBand.objects.filter(object_id=first.pk).count(), 16
+        )
+        flagged = ContentSignature.objects.get(
+            kind=ContentSignature.POST, object_id=second.pk
+        )
+        self.assertEqual(flagged.duplicate_of, first.pk)
+        second.delete()
+        self.assertFalse(
+            ContentBand.objects.filter(object_id=second.pk).exists()
+        )
+
+    def test_resave_without_text_change(self):
+        """Сохранение без правки текста не переписывает сигнатуру."""
+        post = Post.objects.create(author=self.user, text=SPAM)
+        band_ids = set(ContentBand.objects.values_list('pk', flat=True))
+        post.save()
+        self.assertEqual(
+            set(ContentBand.objects.values_list('pk', flat=True)), band_ids
+        )
+        post.text = 'Совсем другой текст о погоде'
+        post.save()
+        self.assertFalse(ContentBand.objects.filter(pk__in=band_ids).exists())
+
+    @override_settings(DUPLICATES_ACTION='reject')
+    def test_reject_duplicate_comment(self):
+        """В режиме reject повторный комментарий не сохраняется."""
+        post = Post.objects.create(author=self.user, text='Пост')
+        url = reverse('posts:add_comment', kwargs={'post_id': post.pk})
+        self.authorized_client.post(url, {'text': SPAM})
+        self.authorized_client.post(url, {'text': SPAM + ' Да!'})
+        self.assertEqual(Comment.objects.count(), 1)
+
+    def test_cluster_command(self):
+        """Команда находит кластер и помечает дубликаты."""
+        posts = [
+            Post.objects.create(author=self.user, text=SPAM + '.' * i)
+            for i in range(3)
+        ]
+        Post.objects.create(author=self.user, text='Обычный пост о котах')
+        ContentSignature.objects.update(duplicate_of=None)
+        out = StringIO()
+        call_command('cluster_duplicates', '--flag', stdout=out)
+        self.assertIn('Кластеров: 1', out.getvalue())
+        self.assertEqual(
+            set(ContentSignature.objects.filter(
+                duplicate_of=posts[0].pk
+            ).values_list('object_id', flat=True)),
+            {posts[1].pk, posts[2].pk}
+        )
+
+    def test_cluster_compares_with_representatives(self):
+        """Тексты корзины сравниваются с представителями кластеров,
+        а не попарно."""
+        signatures = {pk: pk % 2 for pk in range(1, 21)}
+        clusters = cluster_duplicates.UnionFind()
+        with mock.patch.object(
+            cluster_duplicates, 'similarity',
+            side_effect=lambda first, second: float(first == second)
+        ) as compare:
+            cluster_duplicates.Command().merge_bucket(
+                list(signatures), signatures, clusters, 0.5
+            )
+        self.assertEqual(
+            clusters.clusters(),
+            [list(range(1, 21, 2)), list(range(2, 21, 2))]
+        )
+        self.assertLessEqual(compare.call_count, 2 * len(signatures))
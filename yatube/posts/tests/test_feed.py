@@ -0,0 +1,94 @@
+from datetime import timedelta
+
+from django.db import connection
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.feed import personal_feed, stream_sql
+from posts.models import Follow, Group, GroupFollow, Post, User
+
+
+class PersonalFeedTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='author')
+        cls.other = User.objects.create_user(username='other')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.reader)
+        now = timezone.now()
+        self.posts = []
+        for minutes, author, group in ((1, self.author, None),
+                                       (2, self.other, self.group),
+                                       (3, self.author, self.group),
+                                       (4, self.other, None),
+                                       (5, self.author, None)):
+            post = Post.objects.create(
+                author=author, group=group, text=f'Пост {minutes}'
+            )
+            Post.objects.filter(pk=post.pk).update(
+                pub_date=now - timedelta(minutes=minutes)
+            )
+            self.posts.append(Post.objects.get(pk=post.pk))
+        Follow.objects.create(user=self.reader, author=self.author)
+        GroupFollow.objects.create(user=self.reader, group=self.group)
+
+    def test_merge_without_duplicates(self):
+        """Лента сливает авторов и группы по дате без повторов."""
+        posts, cursor = personal_feed(self.reader, limit=10)
+        self.assertEqual(
+            posts, [self.posts[0], self.posts[1], self.posts[2],
+                    self.posts[4]]
+        )
+        self.assertIsNone(cursor)
+
+    def test_keyset_pages(self):
+        """Курсор продолжает ленту с того места, где кончилась страница."""
+        first, cursor = personal_feed(self.reader, limit=2)
+        second, cursor = personal_feed(self.reader, cursor, limit=2)
+        self.assertEqual(first + second, [
+            self.posts[0], self.posts[1], self.posts[2], self.posts[4]
+        ])
+        self.assertIsNone(cursor)
+
+    def test_queries_do_not_grow_with_follows(self):
+        """Число запросов ленты не зависит от числа подписок."""
+        personal_feed(self.reader, limit=10)
+        for i in range(5):
+            author = User.objects.create_user(username=f'extra{i}')
+            Follow.objects.create(user=self.reader, author=author)
+        with self.assertNumQueries(4):
+            personal_feed(self.reader, limit=10)
+
+    def test_streams_are_bounded(self):
+        """Каждый поток отдает не больше страницы постов по индексу."""
+        sql, params = stream_sql('author_id', None, 3)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'EXPLAIN QUERY PLAN ' + sql, [self.author.pk, *params]
+            )
+            plan = ' '.join(str(row[-1]) for row in cursor.fetchall())
+        self.assertIn('posts_post_author_', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_group_subscription_views(self):
+        """Подписка на группу добавляет ее посты в ленту подписок."""
+        GroupFollow.objects.all().delete()
+        url = reverse('posts:group_follow', kwargs={'slug': 'group'})
+        self.client.get(url)
+        self.client.get(url)
+        self.assertEqual(GroupFollow.objects.count(), 1)
+        response = self.client.get(reverse('posts:follow_index'))
+        self.assertIn(self.posts[1], response.context['page_obj'])
+        self.assertEqual(response.context['following_count'], 2)
+        self.client.get(
+            reverse('posts:group_unfollow', kwargs={'slug': 'group'})
+        )
+        self.assertFalse(GroupFollow.objects.exists())
@@ -0,0 +1,87 @@
+from array import array
+
+from django.core.cache import cache
+from django.test import Client, TransactionTestCase
+from django.urls import reverse
+
+from posts.follow_cache import (cached_followees, get_followees, is_following,
+                                store)
+from posts.models import Follow, Post, User
+
+
+class FollowCacheTests(TransactionTestCase):
+    """Кеш обновляется после фиксации, поэтому без обертки TestCase."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='reader')
+        self.authors = [
+            User.objects.create_user(username=f'author{i}') for i in range(3)
+        ]
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_miss_falls_back_to_db(self):
+        """При промахе подписки читаются из базы и кешируются."""
+        for author in reversed(self.authors):
+            Follow.objects.create(user=self.user, author=author)
+        cache.clear()
+        self.assertIsNone(cached_followees(self.user.pk))
+        with self.assertNumQueries(1):
+            followees = get_followees(self.user.pk)
+        self.assertEqual(
+            list(followees), sorted(author.pk for author in self.authors)
+        )
+        with self.assertNumQueries(0):
+            self.assertTrue(is_following(self.user.pk, self.authors[1].pk))
+
+    def test_signals_invalidate_cache(self):
+        """Подписка и отписка сбрасывают закешированный массив."""
+        self.assertFalse(is_following(self.user.pk, self.authors[0].pk))
+        follow = Follow.objects.create(user=self.user, author=self.authors[0])
+        self.assertIsNone(cached_followees(self.user.pk))
+        self.assertTrue(is_following(self.user.pk, self.authors[0].pk))
+        follow.delete()
+        self.assertIsNone(cached_followees(self.user.pk))
+        self.assertFalse(is_following(self.user.pk, self.authors[0].pk))
+
+    def test_concurrent_changes_are_not_lost(self):
+        """Две подписки подряд не затирают друг друга в кеше."""
+        get_followees(self.user.pk)
+        Follow.objects.create(user=self.user, author=self.authors[0])
+        Follow.objects.create(user=self.user, author=self.authors[1])
+        self.assertEqual(
+            list(get_followees(self.user.pk)),
+            sorted([self.authors[0].pk, self.authors[1].pk])
+        )
+
+    def test_stale_cache_does_not_block_unfollow(self):
+        """Отписка удаляет строку, даже если кеш считает иначе."""
+        author = self.authors[0]
+        Follow.objects.create(user=self.user, author=author)
+        store(self.user.pk, array('l'))
+        self.client.get(
+            reverse('posts:profile_unfollow', kwargs={'username': author})
+        )
+        self.assertFalse(Follow.objects.exists())
+
+    def test_follow_views_use_cache(self):
+        """Подписка через страницы и лента подписок работают через кеш."""
+        author = self.authors[2]
+        Post.objects.create(author=author, text='Пост автора')
+        self.client.get(
+            reverse('posts:profile_follow', kwargs={'username': author})
+        )
+        self.client.get(
+            reverse('posts:profile_follow', kwargs={'username': author})
+        )
+        self.assertEqual(
+            Follow.objects.filter(user=self.user, author=author).count(), 1
+        )
+        response = self.client.get(reverse('posts:follow_index'))
+        self.assertEqual(response.context['following_count'], 1)
+        self.assertEqual(len(response.context['page_obj']), 1)
+        self.client.get(
+            reverse('posts:profile_unfollow', kwargs={'username': author})
+        )
+        self.assertFalse(is_following(self.user.pk, author.pk))
@@ -2,6 +2,7 @@ import shutil
 import tempfile
 
 from django.conf import settings
+from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
@@ -146,3 +147,56 @@ class PostPagesTests(TestCase):
             follow=True
         )
         self.assertEqual(Comment.objects.count(), comments_count)
+
+
+class GroupPickerTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='user')
+        Group.objects.bulk_create(
+            Group(title=f'Группа {i:02}', slug=f'group-{i}')
+            for i in range(25)
+        )
+        cls.group = Group.objects.get(slug='group-7')
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_create_page_does_not_render_all_groups(self):
+        """Страница создания поста не выводит все группы."""
+        response = self.authorized_client.get(reverse('posts:post_create'))
+        self.assertEqual(response.content.decode().count('<option'), 1)
+
+    def test_recent_group_offered_after_post(self):
+        """Группа нового поста попадает в недавние группы автора."""
+        self.authorized_client.post(
+            reverse('posts:post_create'),
+            {'text': 'Запись в группе', 'group': self.group.pk}
+        )
+        response = self.authorized_client.get(reverse('posts:post_create'))
+        self.assertContains(
+            response, f'<option value="{self.group.pk}">{self.group.title}'
+        )
+
+    def test_group_options_keyset_pages(self):
+        """Варианты групп отдаются страницами по курсору."""
+        url = reverse('posts:group_options')
+        first = self.authorized_client.get(url).json()
+        second = self.authorized_client.get(
+            url, {'after': first['next']}
+        ).json()
+        third = self.authorized_client.get(
+            url, {'after': second['next']}
+        ).json()
+        titles = [
+            group['title']
+            for page in (first, second, third)
+            for group in page['results']
+        ]
+        self.assertEqual(
+            titles, [f'Группа {i:02}' for i in range(25)]
+        )
+        self.assertIsNone(third['next'])
@@ -0,0 +1,118 @@
+from datetime import datetime
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.deletion import schedule_post_deletion
+from posts.models import Group, Post, User
+from posts.months import month_cache_key
+
+
+class MonthArchiveTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='user')
+        cls.group = Group.objects.create(
+            title='Название группы',
+            slug='test-slug',
+        )
+        cls.old_post = Post.objects.create(
+            author=cls.user,
+            text='Запись за март',
+            group=cls.group
+        )
+        cls.older_post = Post.objects.create(
+            author=cls.user,
+            text='Запись за январь',
+        )
+        Post.objects.filter(pk=cls.old_post.pk).update(
+            pub_date=timezone.make_aware(datetime(2022, 3, 15))
+        )
+        Post.objects.filter(pk=cls.older_post.pk).update(
+            pub_date=timezone.make_aware(datetime(2022, 1, 10))
+        )
+
+    def setUp(self):
+        self.guest_client = Client()
+        cache.clear()
+
+    def test_month_pages_show_month_posts(self):
+        """Архив месяца показывает только посты этого месяца."""
+        urls = (
+            reverse('posts:month_archive', args=(2022, 3)),
+            reverse('posts:group_month_archive', args=('test-slug', 2022, 3)),
+            reverse('posts:profile_month_archive', args=('user', 2022, 3)),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertTemplateUsed(response, 'posts/month_archive.html')
+                self.assertContains(response, self.old_post.text)
+                self.assertNotContains(response, self.older_post.text)
+
+    def test_closed_month_is_cached(self):
+        """Закрытый месяц отдается с долгим Cache-Control и из кэша."""
+        url = reverse('posts:month_archive', args=(2022, 3))
+        response = self.guest_client.get(url)
+        self.assertIn('max-age', response['Cache-Control'])
+        self.assertIn('public', response['Cache-Control'])
+        self.assertEqual(
+            response.context['page']['older_url'],
+            reverse('posts:month_archive', args=(2022, 1))
+        )
+        with self.assertNumQueries(0):
+            response = self.guest_client.get(url)
+        self.assertContains(response, self.old_post.text)
+
+    def test_cache_follows_edit_and_delete(self):
+        """Правка и удаление поста сбрасывают кэш его месяца."""
+        url = reverse('posts:month_archive', args=(2022, 3))
+        self.guest_client.get(url)
+        post = Post.objects.get(pk=self.old_post.pk)
+        post.text = 'Исправленная запись'
+        post.save()
+        self.assertContains(self.guest_client.get(url), post.text)
+        schedule_post_deletion(post)
+        self.assertNotContains(self.guest_client.get(url), post.text)
+
+    def test_bad_page_not_found(self):
+        """Несуществующие номера страниц не кэшируются и дают 404."""
+        url = reverse('posts:month_archive', args=(2022, 3))
+        for page in ('2', '0', 'x'):
+            with self.subTest(page=page):
+                response = self.guest_client.get(url, {'page': page})
+                self.assertEqual(response.status_code, 404)
+        self.assertIsNone(cache.get(month_cache_key(2022, 3, 2)))
+
+    def test_index_pages_cached_separately(self):
+        """Каждая страница главной кэшируется со своей ссылкой на архив."""
+        Post.objects.bulk_create(
+            Post(author=self.user, text=f'Пост {i}') for i in range(10)
+        )
+        self.guest_client.get(reverse('posts:index'))
+        response = self.guest_client.get(
+            reverse('posts:index'), {'page': 2}
+        )
+        self.assertContains(
+            response, reverse('posts:month_archive', args=(2022, 1))
+        )
+
+    def test_future_month_not_found(self):
+        """Архив будущего месяца недоступен."""
+        year = timezone.localdate().year + 1
+        response = self.guest_client.get(
+            reverse('posts:month_archive', args=(year, 1))
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_prerender_command(self):
+        """Команда заранее кладет страницы архива в кэш."""
+        out = StringIO()
+        call_command('prerender_month_archive', groups=True, stdout=out)
+        self.assertIn('3', out.getvalue())
+        self.assertIsNotNone(cache.get(month_cache_key(2022, 3, 1)))
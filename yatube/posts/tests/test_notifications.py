@@ -0,0 +1,98 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.models import (Follow, Notification, NotificationFanout,
+                          NotificationState, Post, User)
+from posts.notifications import (compact_step, fanout_step, has_unread,
+                                 inbox)
+
+
+class NotificationsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.readers = [
+            User.objects.create_user(username=f'reader{i}') for i in range(5)
+        ]
+        for reader in cls.readers:
+            Follow.objects.create(user=reader, author=cls.author)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.readers[0])
+
+    def test_post_is_fanned_out_in_batches(self):
+        """Новый пост раздается подписчикам пачками и уходит из очереди."""
+        post = Post.objects.create(author=self.author, text='Новость')
+        self.assertTrue(NotificationFanout.objects.filter(post=post).exists())
+        self.assertEqual(fanout_step(2), 2)
+        self.assertEqual(fanout_step(2), 2)
+        self.assertEqual(fanout_step(2), 1)
+        self.assertEqual(fanout_step(2), 0)
+        self.assertIsNone(fanout_step(2))
+        self.assertEqual(
+            Notification.objects.filter(post=post).count(), len(self.readers)
+        )
+        self.assertEqual(
+            set(NotificationState.objects.values_list('latest', flat=True)),
+            {post.pk}
+        )
+
+    def test_deleted_post_is_skipped(self):
+        """Скрытый до раздачи пост уведомлений не создает."""
+        post = Post.objects.create(author=self.author, text='Черновик')
+        Post.all_objects.filter(pk=post.pk).update(is_deleted=True)
+        self.assertEqual(fanout_step(10), 0)
+        self.assertFalse(Notification.objects.exists())
+
+    def test_badge_compares_watermarks(self):
+        """Значок горит до открытия списка уведомлений."""
+        self.assertFalse(has_unread(self.readers[0]))
+        Post.objects.create(author=self.author, text='Новость')
+        call_command('fanout_notifications', pause=0, stdout=StringIO())
+        self.assertTrue(has_unread(self.readers[0]))
+        response = self.client.get(reverse('posts:index'))
+        self.assertTrue(response.context['has_unread_notifications'])
+        response = self.client.get(reverse('posts:notifications'))
+        self.assertEqual(len(response.context['notifications']), 1)
+        self.assertFalse(has_unread(self.readers[0]))
+        self.assertTrue(has_unread(self.readers[1]))
+
+    def test_inbox_pages_by_post_id(self):
+        """Страницы уведомлений идут от новых постов к старым."""
+        posts = [
+            Post.objects.create(author=self.author, text=f'Пост {i}')
+            for i in range(3)
+        ]
+        call_command('fanout_notifications', pause=0, stdout=StringIO())
+        page, cursor = inbox(self.readers[0], limit=2)
+        self.assertEqual(
+            [row.post for row in page], [posts[2], posts[1]]
+        )
+        page, cursor = inbox(self.readers[0], cursor, limit=2)
+        self.assertEqual([row.post for row in page], [posts[0]])
+        self.assertIsNone(cursor)
+
+    def test_compact_removes_old_rows(self):
+        """Уплотнение удаляет только уведомления старше срока."""
+        old, new = [
+            Post.objects.create(author=self.author, text=text)
+            for text in ('Старый', 'Новый')
+        ]
+        call_command('fanout_notifications', pause=0, stdout=StringIO())
+        Notification.objects.filter(post=old).update(
+            created=timezone.now() - timedelta(days=100)
+        )
+        self.assertEqual(compact_step(90, 2), 2)
+        self.assertEqual(compact_step(90, 2), 2)
+        self.assertEqual(compact_step(90, 2), 1)
+        self.assertEqual(compact_step(90, 2), 0)
+        self.assertEqual(
+            set(Notification.objects.values_list('post_id', flat=True)),
+            {new.pk}
+        )
@@ -0,0 +1,107 @@
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.models import Job
+from core.queue import work
+from posts.models import Comment, Follow, Group, Post, User
+from posts.popular import (COMMENT, FOLD_LOCK_KEY, VIEW, buffer,
+                           popular_groups, popular_posts, record_event)
+
+HOUR = 60 * 60
+
+
+@override_settings(POPULAR_HALF_LIFE=HOUR, POPULAR_TOP_K=2)
+class PopularTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='user')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+
+    def setUp(self):
+        cache.clear()
+        buffer.items.clear()
+        self.posts = [
+            Post.objects.create(author=self.user, text=f'Пост {i}')
+            for i in range(3)
+        ]
+
+    def fold(self):
+        buffer.flush()
+        work(burst=True)
+
+    def test_recent_events_outweigh_old(self):
+        """Старые события затухают: свежие просмотры обгоняют
+        давний комментарий."""
+        old, new = self.posts[:2]
+        record_event(old.pk, None, COMMENT, now=0)
+        record_event(new.pk, None, VIEW, now=HOUR)
+        self.fold()
+        self.assertEqual(popular_posts(), [old, new])
+        record_event(new.pk, None, VIEW, now=3 * HOUR)
+        self.fold()
+        self.assertEqual(popular_posts(), [new, old])
+
+    def test_top_k_keeps_best(self):
+        """Список лучших хранит не больше POPULAR_TOP_K постов."""
+        for count, post in enumerate(self.posts, start=1):
+            for _ in range(count):
+                record_event(post.pk, None, VIEW, now=0)
+        self.fold()
+        self.assertEqual(popular_posts(), self.posts[:0:-1])
+        self.assertEqual(popular_posts(limit=1), [self.posts[2]])
+
+    def test_events_from_signals_and_views(self):
+        """Просмотры, комментарии и подписки поднимают пост и группу."""
+        post = Post.objects.create(
+            author=self.user, text='Пост в группе', group=self.group
+        )
+        Comment.objects.create(post=post, author=self.user, text='Ура')
+        Follow.objects.create(
+            user=User.objects.create_user(username='fan'), author=self.user
+        )
+        self.fold()
+        self.assertEqual(popular_posts()[0], post)
+        self.assertEqual(popular_posts(self.group), [post])
+        self.assertEqual(popular_groups(), [self.group])
+        client = Client()
+        client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.posts[0].pk})
+        )
+        self.fold()
+        response = client.get(reverse('posts:popular'))
+        self.assertEqual(
+            response.context['posts'], [post, self.posts[0]]
+        )
+
+    def test_popular_feed_queries(self):
+        """Лента читает посты одним запросом по первичным ключам."""
+        record_event(self.posts[0].pk, None, VIEW)
+        self.fold()
+        with self.assertNumQueries(1):
+            popular_posts()
+
+    def test_views_do_not_touch_cache(self):
+        """Событие копится в буфере, а в кеш его вливает задача."""
+        record_event(self.posts[0].pk, None, VIEW)
+        record_event(self.posts[0].pk, None, VIEW)
+        self.assertEqual(popular_posts(), [])
+        self.assertEqual(buffer.flush(), 1)
+        self.assertEqual(
+            Job.objects.filter(name='posts.fold_popular').count(), 1
+        )
+        self.fold()
+        self.assertEqual(popular_posts(), [self.posts[0]])
+
+    def test_busy_fold_is_postponed(self):
+        """Пока пачку вливает другой процесс, задача откладывается."""
+        record_event(self.posts[0].pk, None, VIEW)
+        cache.set(FOLD_LOCK_KEY, 1)
+        self.fold()
+        self.assertEqual(popular_posts(), [])
+        self.assertTrue(Job.objects.filter(
+            name='posts.fold_popular', status=Job.QUEUED
+        ).exists())
@@ -0,0 +1,99 @@
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post, Reaction, ReactionCounter, User
+from posts.reactions import reaction_counts, set_reaction
+
+
+@override_settings(REACTION_SHARDS=4)
+class ReactionTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.users = [
+            User.objects.create_user(username=f'user{i}') for i in range(12)
+        ]
+        cls.post = Post.objects.create(author=cls.users[0], text='Пост')
+        cls.other = Post.objects.create(author=cls.users[0], text='Другой')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.users[0])
+
+    def test_sharded_counts(self):
+        """Реакции раскладываются по шардам и суммируются при чтении."""
+        for user in self.users:
+            set_reaction(user, self.post.pk, Reaction.LIKE, True)
+        set_reaction(self.users[0], self.post.pk, Reaction.LOVE, True)
+        self.assertLessEqual(
+            ReactionCounter.objects.filter(post=self.post).count(), 4 + 1
+        )
+        self.assertEqual(
+            reaction_counts([self.post.pk, self.other.pk]),
+            {self.post.pk: {'like': 12, 'love': 1}, self.other.pk: {}}
+        )
+
+    def test_set_reaction_is_idempotent(self):
+        """Повтор постановки или снятия не меняет счетчик."""
+        user = self.users[1]
+        self.assertTrue(set_reaction(user, self.post.pk, 'like', True))
+        self.assertFalse(set_reaction(user, self.post.pk, 'like', True))
+        self.assertEqual(reaction_counts([self.post.pk])[self.post.pk],
+                         {'like': 1})
+        self.assertTrue(set_reaction(user, self.post.pk, 'like', False))
+        self.assertFalse(set_reaction(user, self.post.pk, 'like', False))
+        self.assertEqual(reaction_counts([self.post.pk])[self.post.pk], {})
+
+    def test_counts_read_with_one_get_many(self):
+        """Повторное чтение страницы берет счетчики из кеша."""
+        reaction_counts([self.post.pk, self.other.pk])
+        with self.assertNumQueries(0):
+            reaction_counts([self.post.pk, self.other.pk])
+
+    def test_react_view(self):
+        """Реакция ставится и снимается через POST."""
+        url = reverse('posts:post_react', kwargs={'post_id': self.post.pk})
+        self.client.post(url, {'kind': 'laugh', 'active': '1'})
+        self.assertTrue(Reaction.objects.filter(kind='laugh').exists())
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        )
+        self.assertEqual(response.context['my_reactions'], {'laugh'})
+        self.client.post(url, {'kind': 'laugh', 'active': '0'})
+        self.assertFalse(Reaction.objects.exists())
+        response = self.client.post(url, {'kind': 'angry', 'active': '1'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_feed_shows_own_reactions(self):
+        """Лента показывает каждому пользователю его реакции и его формы."""
+        set_reaction(self.users[0], self.post.pk, Reaction.LIKE, True)
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'name="active" value="0"', count=1)
+        other = Client()
+        other.force_login(self.users[1])
+        response = other.get(reverse('posts:index'))
+        self.assertNotContains(response, 'name="active" value="0"')
+        response = other.post(
+            reverse('posts:post_react', kwargs={'post_id': self.post.pk}),
+            {'kind': 'like', 'active': '1'}
+        )
+        self.assertEqual(response.status_code, 302)
+        response = Client().get(reverse('posts:index'))
+        self.assertNotContains(response, 'csrfmiddlewaretoken')
+
+    def test_index_list_cached_once_for_all(self):
+        """Список главной кешируется один на всех без форм и токенов,
+        а реакции каждого пользователя подставляются отдельно."""
+        set_reaction(self.users[0], self.post.pk, Reaction.LIKE, True)
+        self.client.get(reverse('posts:index'))
+        fragment = cache.get(make_template_fragment_key('index_page', [1]))
+        self.assertNotIn('csrfmiddlewaretoken', fragment)
+        self.assertNotIn('name="active"', fragment)
+        other = Client()
+        other.force_login(self.users[1])
+        response = other.get(reverse('posts:index'))
+        self.assertNotContains(response, 'name="active" value="0"')
+        self.assertContains(response, 'csrfmiddlewaretoken', count=6)
@@ -0,0 +1,144 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import related
+from posts.models import (Group, Post, RelatedCheckpoint, RelatedPost,
+                          RelatedPosting, User)
+from posts.related import Corpus
+
+
+@override_settings(RELATED_POSTS_MAX_DF=1)
+class RelatedPostsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='user')
+        cls.group = Group.objects.create(
+            title='Сад', slug='garden', description='Описание'
+        )
+
+    def setUp(self):
+        self.client = Client()
+        self.cats = Post.objects.create(
+            author=self.user, text='Кошки любят спать на солнце'
+        )
+        self.kittens = Post.objects.create(
+            author=self.user, text='Кошки и котята спать любят'
+        )
+        self.roses = Post.objects.create(
+            author=self.user, text='Розы растут в саду', group=self.group
+        )
+
+    def build(self, *args):
+        call_command('build_related_posts', *args, stdout=StringIO())
+
+    def test_neighbours_by_text(self):
+        """Соседи ищутся по общим термам, а не по всем постам."""
+        corpus = Corpus().load(batch_size=2)
+        neighbours = corpus.neighbours(self.cats.pk, 5)
+        self.assertEqual([pk for pk, _ in neighbours], [self.kittens.pk])
+
+    def test_candidates_are_capped(self):
+        """Списки постов обрезаются до самых новых, а лишние кандидаты
+        не оцениваются."""
+        newest = Post.objects.create(author=self.user, text='Кошки на солнце')
+        corpus = Corpus(max_postings=2).load(batch_size=10)
+        self.assertEqual(
+            [pk for pk, _ in corpus.postings['кошк']],
+            [newest.pk, self.kittens.pk]
+        )
+        corpus = Corpus(max_candidates=1).load(batch_size=10)
+        self.assertEqual(len(corpus.neighbours(self.cats.pk, 5)), 1)
+
+    def test_group_feature(self):
+        """Посты одной группы похожи даже без общих слов."""
+        tulips = Post.objects.create(
+            author=self.user, text='Тюльпаны весной', group=self.group
+        )
+        corpus = Corpus().load(batch_size=10)
+        self.assertEqual(
+            [pk for pk, _ in corpus.neighbours(tulips.pk, 5)],
+            [self.roses.pk]
+        )
+
+    def test_large_group_keeps_feature(self):
+        """Группа с постами сверх лимита списка остается признаком."""
+        for i in range(3):
+            Post.objects.create(
+                author=self.user, text=f'Пион {i}', group=self.group
+            )
+        tulips = Post.objects.create(
+            author=self.user, text='Тюльпаны весной', group=self.group
+        )
+        corpus = Corpus(max_postings=2).load(batch_size=10)
+        self.assertEqual(
+            len(corpus.neighbours(tulips.pk, 5)), 1
+        )
+
+    def test_post_detail_shows_related(self):
+        """Страница поста показывает предрасчитанные похожие посты."""
+        self.build('--full')
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.cats.pk})
+        )
+        self.assertEqual(response.context['related'], [self.kittens])
+
+    def test_incremental_update(self):
+        """Повторный запуск пересчитывает только новые посты и соседей."""
+        self.build()
+        self.assertEqual(
+            RelatedPost.objects.filter(post=self.cats).count(), 1
+        )
+        puppies = Post.objects.create(
+            author=self.user, text='Щенки тоже любят спать'
+        )
+        out = StringIO()
+        call_command('build_related_posts', stdout=out)
+        self.assertIn('Пересчитано постов: 3', out.getvalue())
+        self.assertIn(
+            puppies.pk,
+            RelatedPost.objects.filter(post=self.cats).values_list(
+                'related_id', flat=True
+            )
+        )
+
+    def test_incremental_reads_only_new_posts(self):
+        """Инкрементальный запуск читает только новые посты и хранит
+        прогресс в своей строке."""
+        self.build()
+        checkpoint = RelatedCheckpoint.objects.get()
+        self.assertEqual(checkpoint.last_pk, self.roses.pk)
+        self.assertEqual(checkpoint.post_count, 3)
+        Post.objects.create(author=self.user, text='Кошки и розы')
+        with mock.patch.object(
+            related, 'post_terms', wraps=related.post_terms
+        ) as post_terms:
+            self.build()
+        self.assertEqual(post_terms.call_count, 1)
+        self.assertEqual(RelatedCheckpoint.objects.get().post_count, 4)
+        self.assertEqual(
+            RelatedPosting.objects.filter(term='кошк').count(), 3
+        )
+
+    @override_settings(RELATED_POSTS_MAX_POSTINGS=2)
+    def test_incremental_truncates_postings(self):
+        """Новые посты вытесняют из списка терма самые старые."""
+        self.build()
+        newest = Post.objects.create(author=self.user, text='Кошки спят')
+        self.build()
+        self.assertEqual(
+            list(RelatedPosting.objects.filter(term='кошк').order_by(
+                '-post_id'
+            ).values_list('post_id', flat=True)),
+            [newest.pk, self.kittens.pk]
+        )
+        self.assertIn(
+            newest.pk,
+            RelatedPost.objects.filter(post=self.kittens).values_list(
+                'related_id', flat=True
+            )
+        )
@@ -0,0 +1,91 @@
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Post, User
+from posts.search import build_match, matching_ids
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='user')
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Коты любят <b>рыбу</b>'
+        )
+        Post.objects.create(author=cls.user, text='Собака грызет кость')
+        Post.objects.bulk_create(
+            Post(author=cls.user, text=f'Кошка номер {i}') for i in range(12)
+        )
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def test_query_is_stemmed(self):
+        """Слова запроса обрезаются до основы и ищутся по префиксу."""
+        self.assertEqual(build_match('Котами, рыба!'), '"кот"* "рыб"*')
+
+    def test_search_highlights_matches(self):
+        """Поиск находит пост по словоформе и подсвечивает совпадение."""
+        response = self.guest_client.get(
+            reverse('posts:search'), {'q': 'котами'}
+        )
+        posts = response.context['posts']
+        self.assertEqual(posts, [self.post])
+        self.assertIn('<mark>Коты</mark>', posts[0].snippet)
+        self.assertIn('&lt;b&gt;', posts[0].snippet)
+
+    def test_search_keyset_pagination(self):
+        """Результаты листаются курсором без повторов."""
+        url = reverse('posts:search')
+        first = self.guest_client.get(url, {'q': 'кошка'}).context
+        self.assertEqual(len(first['posts']), 10)
+        second = self.guest_client.get(
+            url, {'q': 'кошка', 'after': first['next_cursor']}
+        ).context
+        self.assertEqual(len(second['posts']), 2)
+        self.assertIsNone(second['next_cursor'])
+        self.assertFalse(set(first['posts']) & set(second['posts']))
+
+    def test_index_follows_edits_and_deletes(self):
+        """Индекс обновляется при изменении и удалении постов."""
+        post = Post.objects.create(author=self.user, text='Старый текст')
+        post.text = 'Новый текст'
+        post.save()
+        found = Post.objects.filter(pk__in=matching_ids('новый'))
+        self.assertEqual(list(found), [post])
+        self.assertFalse(
+            Post.objects.filter(pk__in=matching_ids('старый')).exists()
+        )
+        post.delete()
+        self.assertFalse(
+            Post.objects.filter(pk__in=matching_ids('новый')).exists()
+        )
+
+    def test_punctuation_only_query(self):
+        """Запрос из одних знаков препинания ничего не находит
+        и не ломает поиск."""
+        admin = User.objects.create_superuser('admin', 'a@a.ru', 'pass')
+        client = Client()
+        client.force_login(admin)
+        for query in ('!!!', '#', '- "'):
+            with self.subTest(query=query):
+                response = self.guest_client.get(
+                    reverse('posts:search'), {'q': query}
+                )
+                self.assertEqual(list(response.context['posts']), [])
+                response = client.get('/admin/posts/post/', {'q': query})
+                self.assertEqual(
+                    list(response.context['cl'].result_list), []
+                )
+
+    def test_admin_search_uses_index(self):
+        """Поиск в админке идет по полнотекстовому индексу."""
+        admin = User.objects.create_superuser('admin', 'a@a.ru', 'pass')
+        client = Client()
+        client.force_login(admin)
+        response = client.get('/admin/posts/post/', {'q': 'котами'})
+        self.assertEqual(
+            list(response.context['cl'].result_list), [self.post]
+        )
@@ -0,0 +1,62 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Follow, FollowSuggestion, User
+from posts.suggestions import load_graph
+
+
+class FollowSuggestionTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.ann, cls.bob, cls.kate, cls.max, cls.zoe = (
+            User.objects.create_user(username=name)
+            for name in ('ann', 'bob', 'kate', 'max', 'zoe')
+        )
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.ann)
+        for user, author in ((self.ann, self.bob), (self.bob, self.kate),
+                             (self.zoe, self.bob), (self.zoe, self.max)):
+            Follow.objects.create(user=user, author=author)
+
+    def build(self):
+        call_command('build_follow_suggestions', stdout=StringIO())
+
+    def test_graph_is_csr(self):
+        """Граф подписок хранится как смещения и отсортированные соседи."""
+        following, followers = load_graph()
+        node = following.ids.index(self.zoe.pk)
+        self.assertEqual(
+            [following.ids[n] for n in following.neighbours(node)],
+            sorted([self.bob.pk, self.max.pk])
+        )
+        bob = following.ids.index(self.bob.pk)
+        self.assertTrue(followers.has_edge(bob, node))
+        self.assertFalse(following.has_edge(bob, node))
+
+    def test_suggestions_ranking(self):
+        """Друг друга идет выше подписок пользователя с общими авторами."""
+        self.build()
+        self.assertEqual(
+            list(FollowSuggestion.objects.filter(user=self.ann).order_by(
+                '-score'
+            ).values_list('author__username', flat=True)),
+            ['kate', 'max']
+        )
+
+    def test_pages_show_suggestions(self):
+        """Подсказки видны в профиле и ленте, кроме уже выбранных."""
+        self.build()
+        response = self.client.get(reverse('posts:follow_index'))
+        self.assertEqual(response.context['suggestions'],
+                         [self.kate, self.max])
+        Follow.objects.create(user=self.ann, author=self.kate)
+        response = self.client.get(
+            reverse('posts:profile', kwargs={'username': 'bob'})
+        )
+        self.assertEqual(response.context['suggestions'], [self.max])
@@ -0,0 +1,86 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Post, PostTag, Tag, TagDayCount, User
+from posts.tags import extract_tags, trending_tags
+
+
+class TagTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='user')
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def tag_names(self, post):
+        return set(PostTag.objects.filter(post=post).values_list(
+            'tag__name', flat=True
+        ))
+
+    def test_extract_tags(self):
+        """Теги извлекаются из текста и приводятся к нижнему регистру."""
+        self.assertEqual(
+            extract_tags('Весна #Природа и #лес, но не a#b'),
+            {'природа', 'лес'}
+        )
+
+    def test_edit_updates_index_by_diff(self):
+        """Редактирование поста меняет только разницу в тегах."""
+        post = Post.objects.create(author=self.user, text='#кот и #пес')
+        self.assertEqual(self.tag_names(post), {'кот', 'пес'})
+        kept = PostTag.objects.get(post=post, tag__name='кот').pk
+        self.authorized_client.post(
+            reverse('posts:post_edit', kwargs={'post_id': post.pk}),
+            {'text': '#кот и #еж'}
+        )
+        self.assertEqual(self.tag_names(post), {'кот', 'еж'})
+        self.assertEqual(
+            PostTag.objects.get(post=post, tag__name='кот').pk, kept
+        )
+        self.assertEqual(
+            TagDayCount.objects.get(tag__name='пес').count, 0
+        )
+
+    def test_trending_counts(self):
+        """Популярность тегов считается инкрементально."""
+        Post.objects.create(author=self.user, text='#кот')
+        post = Post.objects.create(author=self.user, text='#кот #пес')
+        self.assertEqual(trending_tags(), [('кот', 2), ('пес', 1)])
+        post.delete()
+        cache.clear()
+        self.assertEqual(trending_tags(), [('кот', 1)])
+
+    def test_tag_feed_keyset_pagination(self):
+        """Лента тега листается курсором от новых постов к старым."""
+        posts = [
+            Post.objects.create(author=self.user, text=f'#кот {i}')
+            for i in range(12)
+        ]
+        Post.objects.create(author=self.user, text='без тегов')
+        url = reverse('posts:tag_list', kwargs={'name': 'кот'})
+        first = self.guest_client.get(url).context
+        second = self.guest_client.get(
+            url, {'before': first['next_cursor']}
+        ).context
+        self.assertEqual(
+            first['posts'] + second['posts'], posts[::-1]
+        )
+        self.assertIsNone(second['next_cursor'])
+
+    def test_backfill_tags_existing_posts(self):
+        """Заполнение размечает посты, созданные без сигналов."""
+        Post.objects.bulk_create([Post(author=self.user, text='#старое')])
+        call_command(
+            'backfill', 'post_tags', pause=0, reset=True, stdout=StringIO()
+        )
+        self.assertTrue(Tag.objects.filter(name='старое').exists())
+        self.assertEqual(PostTag.objects.count(), 1)
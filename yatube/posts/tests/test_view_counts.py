@@ -0,0 +1,85 @@
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.queue import work
+from posts.models import Post, User
+from posts.view_counts import ViewBuffer, buffer, metrics
+
+
+@override_settings(VIEW_COUNTS_FLUSH_INTERVAL=3600, VIEW_COUNTS_MAX_POSTS=3)
+class ViewCountTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='user', is_staff=True)
+
+    def setUp(self):
+        cache.clear()
+        buffer.items.clear()
+        self.posts = [
+            Post.objects.create(author=self.user, text=f'Пост {i}')
+            for i in range(3)
+        ]
+
+    def view_counts(self):
+        return [
+            Post.objects.get(pk=post.pk).view_count for post in self.posts
+        ]
+
+    def test_views_buffered_until_flush(self):
+        """Просмотры копятся в памяти и пишутся одной пачкой."""
+        views = ViewBuffer()
+        for post in self.posts[:2]:
+            views.add(post.pk, 1)
+            views.add(post.pk, 1)
+        self.assertEqual(self.view_counts(), [0, 0, 0])
+        with self.assertNumQueries(1):
+            self.assertEqual(views.flush(), 2)
+        self.assertEqual(self.view_counts(), [0, 0, 0])
+        work(burst=True)
+        self.assertEqual(self.view_counts(), [2, 2, 0])
+
+    def test_flush_when_buffer_full(self):
+        """Буфер сбрасывается сам, когда в нем VIEW_COUNTS_MAX_POSTS
+        постов, и пишет метрики сброса."""
+        views = ViewBuffer()
+        views.add(self.posts[0].pk, 1)
+        views.add(self.posts[0].pk, 1)
+        views.add(self.posts[1].pk, 1)
+        views.add(self.posts[2].pk, 1)
+        self.assertEqual(views.items, {})
+        work(burst=True)
+        self.assertEqual(self.view_counts(), [2, 1, 1])
+        summary = metrics()
+        self.assertEqual(summary['flushes'], 1)
+        self.assertEqual(summary['views'], 4)
+        self.assertEqual(summary['last']['posts'], 3)
+
+    def test_post_detail_counts_view(self):
+        """Страница поста учитывает просмотр, метрики доступны персоналу."""
+        client = Client()
+        client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.posts[0].pk})
+        )
+        self.assertEqual(buffer.items[self.posts[0].pk], 1)
+        buffer.flush()
+        work(burst=True)
+        self.assertEqual(self.view_counts()[0], 1)
+        url = reverse('posts:view_counts_metrics')
+        self.assertEqual(client.get(url).status_code, 302)
+        client.force_login(self.user)
+        self.assertEqual(client.get(url).json()['views'], 1)
+
+    def test_idle_buffer_has_timer(self):
+        """Первый просмотр заводит таймер сброса для простаивающего
+        процесса, сброс его снимает."""
+        views = ViewBuffer()
+        views.add(self.posts[0].pk, 1)
+        timer = views.timer
+        self.assertTrue(timer.daemon)
+        self.assertEqual(timer.interval, 3600)
+        self.assertEqual(timer.function, views.flush_later)
+        views.flush()
+        self.assertIsNone(views.timer)
+        self.assertTrue(timer.finished.is_set())
@@ -6,15 +6,56 @@ app_name = 'posts'
 
 urlpatterns = [
     path('', views.index, name='index'),
+    path('popular/', views.popular, name='popular'),
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
+    path('group/<slug:slug>/popular/',
+         views.popular,
+         name='group_popular'),
+    path('group/<slug:slug>/follow/',
+         views.group_follow,
+         name='group_follow'),
+    path('group/<slug:slug>/unfollow/',
+         views.group_unfollow,
+         name='group_unfollow'),
     path('profile/<str:username>/', views.profile, name='profile'),
+    path('archive/<int:year>/<int:month>/',
+         views.month_archive,
+         name='month_archive'),
+    path('group/<slug:slug>/archive/<int:year>/<int:month>/',
+         views.month_archive,
+         name='group_month_archive'),
+    path('profile/<str:username>/archive/<int:year>/<int:month>/',
+         views.month_archive,
+         name='profile_month_archive'),
+    path('tag/<str:name>/', views.tag_posts, name='tag_list'),
+    path('search/', views.search, name='search'),
+    path('metrics/views/',
+         views.view_counts_metrics,
+         name='view_counts_metrics'),
+    path('autocomplete/', views.autocomplete, name='autocomplete'),
+    path('group-options/',
+         views.group_options_view,
+         name='group_options'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
     path('create/', views.post_create, name='post_create'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
+    path('posts/<int:post_id>/delete/',
+         views.post_delete,
+         name='post_delete'),
+    path('posts/<int:post_id>/react/',
+         views.post_react,
+         name='post_react'),
+    path('posts/<int:post_id>/comments/',
+         views.post_comments,
+         name='post_comments'),
+    path('posts/<int:post_id>/comments/<int:comment_id>/replies/',
+         views.comment_replies,
+         name='comment_replies'),
     path('posts/<int:post_id>/comment/',
          views.add_comment,
          name='add_comment'),
     path('follow/', views.follow_index, name='follow_index'),
+    path('notifications/', views.notifications, name='notifications'),
     path('profile/<str:username>/follow/',
          views.profile_follow,
          name='profile_follow'),
@@ -0,0 +1,100 @@
+"""Счетчики просмотров постов с буфером в памяти процесса.
+
+Просмотры копятся в буфере процесса (см. buffers.ProcessBuffer)
+и не реже раза в VIEW_COUNTS_FLUSH_INTERVAL секунд или при
+VIEW_COUNTS_MAX_POSTS постах уходят задачей posts.flush_view_counts.
+Задача обновляет посты с одинаковым приростом одним UPDATE, поэтому
+пачка стоит несколько запросов. При остановке или падении процесса
+теряются просмотры, накопленные с последнего сброса, то есть
+не больше одного интервала.
+"""
+import time
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.db import DatabaseError, transaction
+from django.db.models import F
+
+from core.queue import enqueue
+
+from .buffers import ProcessBuffer
+from .models import Post
+
+METRICS_KEY = 'view_counts:{}'
+COUNTERS = ('flushes', 'posts', 'views', 'failures', 'latency_us')
+UPDATE_CHUNK = 500
+
+
+def incr_metric(name, delta):
+    key = METRICS_KEY.format(name)
+    cache.add(key, 0, None)
+    cache.incr(key, delta)
+
+
+def record_flush(posts, views, seconds):
+    incr_metric('flushes', 1)
+    incr_metric('posts', posts)
+    incr_metric('views', views)
+    incr_metric('latency_us', int(seconds * 1_000_000))
+    cache.set(METRICS_KEY.format('last'), {
+        'posts': posts,
+        'views': views,
+        'latency_ms': round(seconds * 1000, 3),
+        'at': time.time(),
+    }, None)
+
+
+def metrics():
+    """Сводка по сбросам всех процессов из общего кеша."""
+    values = cache.get_many([METRICS_KEY.format(name) for name in COUNTERS])
+    summary = {
+        name: values.get(METRICS_KEY.format(name), 0) for name in COUNTERS
+    }
+    flushes = summary.pop('flushes')
+    latency = summary.pop('latency_us')
+    summary.update({
+        'flushes': flushes,
+        'avg_batch_posts': flushes and summary['posts'] / flushes,
+        'avg_latency_ms': flushes and latency / flushes / 1000,
+        'last': cache.get(METRICS_KEY.format('last')),
+    })
+    return summary
+
+
+def apply_counts(counts):
+    """Прибавляет просмотры [[post_id, прирост], ...] к постам."""
+    started = time.perf_counter()
+    by_delta = defaultdict(list)
+    for post_id, delta in counts:
+        by_delta[delta].append(post_id)
+    try:
+        with transaction.atomic():
+            for delta, ids in by_delta.items():
+                for start in range(0, len(ids), UPDATE_CHUNK):
+                    Post.all_objects.filter(
+                        pk__in=ids[start:start + UPDATE_CHUNK]
+                    ).update(view_count=F('view_count') + delta)
+    except DatabaseError:
+        incr_metric('failures', 1)
+        raise
+    views = sum(delta for _, delta in counts)
+    record_flush(len(counts), views, time.perf_counter() - started)
+    return views
+
+
+class ViewBuffer(ProcessBuffer):
+    interval_setting = 'VIEW_COUNTS_FLUSH_INTERVAL'
+    max_size_setting = 'VIEW_COUNTS_MAX_POSTS'
+
+    def combine(self, old, new):
+        return old + new
+
+    def handoff(self, items):
+        enqueue('posts.flush_view_counts', counts=list(items.items()))
+
+
+buffer = ViewBuffer()
+
+
+def record_view(post_id):
+    buffer.add(post_id, 1)
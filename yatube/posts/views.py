@@ -1,9 +1,40 @@
+import re
+from datetime import date
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
+from django.core.paginator import InvalidPage, Paginator
+from django.http import Http404, HttpResponseBadRequest, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.utils import timezone
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.decorators.http import require_POST
+
+from core.queue import enqueue
+from core.ratelimit import ratelimit
 
+from .archive import ArchiveChain, get_post_or_archived
+from .autocomplete import GROUP, USER
+from .autocomplete import index as autocomplete_index
+from .comments import comment_page, reply_page
+from .deletion import schedule_post_deletion
+from .feed import personal_feed
+from .follow_cache import get_followees, is_following
 from .forms import CommentForm, PostForm
-from .models import Follow, Group, Post, User
+from .groups import group_options, recent_groups, remember_group
+from .months import is_closed_month, older_posts_url, render_month_page
+from .notifications import inbox, mark_seen
+from .popular import VIEW, popular_groups, popular_posts, record_event
+from .reactions import attach_counts, set_reaction
+from .related import related_posts
+from .search import search_posts
+from .suggestions import suggested_authors
+from .tags import tag_feed, trending_tags
+from .view_counts import metrics as view_metrics
+from .view_counts import record_view
+from .models import (Follow, Group, GroupFollow, Post, Reaction, Tag,
+                     User)
 
 TOP_TEN = 10
 
@@ -18,6 +49,8 @@ def index(request):
     context = {
         'title': title,
         'page_obj': page_obj,
+        'older_url': older_posts_url(page_obj),
+        'trending': trending_tags(),
     }
     return render(request, template, context)
 
@@ -25,62 +58,224 @@ def index(request):
 def group_posts(request, slug):
     template = 'posts/group_list.html'
     group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.order_by('-pub_date')
+    posts = ArchiveChain(
+        group.posts.order_by('-pub_date'),
+        group.archived_posts.order_by('-pub_date')
+    )
     paginator = Paginator(posts, TOP_TEN)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
+    subscribed = request.user.is_authenticated and GroupFollow.objects.filter(
+        user=request.user, group=group
+    ).exists()
     context = {
         'group': group,
         'page_obj': page_obj,
+        'older_url': older_posts_url(page_obj, group=group),
+        'subscribed': subscribed,
     }
     return render(request, template, context)
 
 
 def profile(request, username):
     template = 'posts/profile.html'
-    author = get_object_or_404(User, username=username)
-    posts = author.posts.all()
+    author = get_object_or_404(User, username=username, is_active=True)
+    posts = ArchiveChain(
+        author.posts.all(),
+        author.archived_posts.all()
+    )
     paginator = Paginator(posts, TOP_TEN)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
-    following = request.user.is_authenticated and Follow.objects.filter(
-        user=request.user,
-        author=author
-    ).exists()
+    following = request.user.is_authenticated and is_following(
+        request.user.pk, author.pk
+    )
     context = {
         'author': author,
         'posts': posts,
         'page_obj': page_obj,
-        'following': following
+        'following': following,
+        'older_url': older_posts_url(page_obj, author=author),
+        'suggestions': (
+            suggested_authors(request.user)
+            if request.user.is_authenticated else []
+        ),
+    }
+    return render(request, template, context)
+
+
+def popular(request, slug=None):
+    template = 'posts/popular.html'
+    group = slug and get_object_or_404(Group, slug=slug)
+    context = {
+        'group': group,
+        'posts': popular_posts(group, TOP_TEN),
+        'groups': popular_groups(),
+    }
+    return render(request, template, context)
+
+
+def month_archive(request, year, month, slug=None, username=None):
+    template = 'posts/month_archive.html'
+    if not 1 <= month <= 12 or not 1 <= year <= 9999:
+        raise Http404
+    today = timezone.localdate()
+    if (year, month) > (today.year, today.month):
+        raise Http404
+    group = slug and get_object_or_404(Group, slug=slug)
+    author = username and get_object_or_404(
+        User, username=username, is_active=True
+    )
+    try:
+        page = render_month_page(
+            year, month, request.GET.get('page'), group, author
+        )
+    except InvalidPage:
+        raise Http404
+    context = {
+        'year': year,
+        'month': month,
+        'month_start': date(year, month, 1),
+        'group': group,
+        'author': author,
+        'page': page,
+    }
+    response = render(request, template, context)
+    if is_closed_month(year, month):
+        visibility = (
+            'private' if request.user.is_authenticated else 'public'
+        )
+        patch_cache_control(
+            response,
+            max_age=settings.POSTS_MONTH_ARCHIVE_MAX_AGE,
+            **{visibility: True}
+        )
+        patch_vary_headers(response, ('Cookie',))
+    return response
+
+
+def parse_search_cursor(value):
+    try:
+        rank, post_id = value.split('_')
+        return float(rank), int(post_id)
+    except (AttributeError, ValueError):
+        return None
+
+
+def search(request):
+    template = 'posts/search.html'
+    query = request.GET.get('q', '').strip()
+    posts, next_cursor = search_posts(
+        query, TOP_TEN, parse_search_cursor(request.GET.get('after'))
+    )
+    context = {
+        'query': query,
+        'posts': posts,
+        'next_cursor': next_cursor and '{}_{}'.format(*next_cursor),
+    }
+    return render(request, template, context)
+
+
+def autocomplete(request):
+    kind = request.GET.get('kind')
+    results = autocomplete_index.search(
+        request.GET.get('q', ''),
+        settings.AUTOCOMPLETE_LIMIT,
+        kind if kind in (USER, GROUP) else None
+    )
+    return JsonResponse({'results': results})
+
+
+def group_options_view(request):
+    results, next_cursor = group_options(
+        request.GET.get('q', '').strip(), request.GET.get('after')
+    )
+    return JsonResponse({'results': results, 'next': next_cursor})
+
+
+def tag_posts(request, name):
+    template = 'posts/tag_list.html'
+    tag = get_object_or_404(Tag, name=name.lower())
+    posts, next_cursor = tag_feed(tag, request.GET.get('before'), TOP_TEN)
+    context = {
+        'tag': tag,
+        'posts': posts,
+        'next_cursor': next_cursor,
+        'trending': trending_tags(),
     }
     return render(request, template, context)
 
 
 def post_detail(request, post_id):
     template = 'posts/post_detail.html'
-    post = get_object_or_404(Post, pk=post_id)
+    post = get_post_or_archived(post_id)
+    if post is None:
+        raise Http404
     form = CommentForm()
-    comments = post.comments.order_by('-created')
+    comments, next_cursor = comment_page(post)
+    is_archived = not isinstance(post, Post)
+    if not is_archived:
+        record_event(post.pk, post.group_id, VIEW)
+        record_view(post.pk)
+        attach_counts([post], request.user)
     context = {
         'post': post,
         'form': form,
         'comments': comments,
+        'next_cursor': next_cursor,
+        'is_archived': is_archived,
+        'related': [] if is_archived else related_posts(post),
+        'my_reactions': getattr(post, 'my_reactions', set()),
+    }
+    return render(request, template, context)
+
+
+def post_comments(request, post_id):
+    template = 'posts/includes/comments.html'
+    post = get_post_or_archived(post_id)
+    if post is None:
+        raise Http404
+    comments, next_cursor = comment_page(post, request.GET.get('before'))
+    context = {
+        'post': post,
+        'comments': comments,
+        'next_cursor': next_cursor,
+        'is_archived': not isinstance(post, Post),
+    }
+    return render(request, template, context)
+
+
+def comment_replies(request, post_id, comment_id):
+    template = 'posts/includes/comments.html'
+    post = get_post_or_archived(post_id)
+    if post is None:
+        raise Http404
+    parent = get_object_or_404(post.comments, pk=comment_id)
+    context = {
+        'post': post,
+        'comments': reply_page(post, parent, request.GET.get('after')),
+        'is_archived': not isinstance(post, Post),
     }
     return render(request, template, context)
 
 
 @login_required
+@ratelimit('post_create', methods=('POST',))
 def post_create(request):
     template = 'posts/create_post.html'
     title = 'Новый пост'
     form = PostForm(
         request.POST or None,
-        files=request.FILES or None
+        files=request.FILES or None,
+        recent_groups=recent_groups(request.user)
     )
     if form.is_valid():
         post = form.save(commit=False)
         post.author = request.user
         post.save()
+        if post.image:
+            enqueue('posts.thumbnails', post_id=post.pk, unique=True)
+        remember_group(request.user, post.group)
         return redirect('posts:profile', request.user.username)
     context = {
         'title': title,
@@ -98,10 +293,14 @@ def post_edit(request, post_id):
     form = PostForm(
         request.POST or None,
         files=request.FILES or None,
-        instance=post
+        instance=post,
+        recent_groups=recent_groups(request.user)
     )
     if form.is_valid():
-        form.save()
+        post = form.save()
+        if 'image' in form.changed_data and post.image:
+            enqueue('posts.thumbnails', post_id=post.pk, unique=True)
+        remember_group(request.user, post.group)
         return redirect('posts:post_detail', post_id)
     context = {
         'is_edit': True,
@@ -112,13 +311,39 @@ def post_edit(request, post_id):
 
 
 @login_required
+@require_POST
+def post_delete(request, post_id):
+    post = get_object_or_404(Post, pk=post_id)
+    if post.author == request.user:
+        schedule_post_deletion(post)
+    return redirect('posts:profile', username=request.user.username)
+
+
+@login_required
+@require_POST
+def post_react(request, post_id):
+    post = get_object_or_404(Post, pk=post_id)
+    kind = request.POST.get('kind')
+    if kind not in dict(Reaction.KIND_CHOICES):
+        return HttpResponseBadRequest()
+    active = request.POST.get('active') == '1'
+    set_reaction(request.user, post.pk, kind, active)
+    return redirect('posts:post_detail', post_id)
+
+
+@login_required
+@ratelimit('add_comment', methods=('POST',))
 def add_comment(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
+    parent_id = request.POST.get('parent') or None
+    if parent_id is not None and not re.fullmatch(r'[0-9]+', parent_id):
+        return HttpResponseBadRequest()
     form = CommentForm(request.POST or None)
     if form.is_valid():
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
+        comment.parent = post.comments.filter(pk=parent_id).first()
         comment.save()
     return redirect('posts:post_detail', post_id)
 
@@ -127,33 +352,74 @@ def add_comment(request, post_id):
 def follow_index(request):
     template = 'posts/follow.html'
     title = 'Избранные авторы'
-    posts = Post.objects.filter(author__following__user=request.user)
-    author = Follow.objects.filter(author__following__user=request.user)
-    paginator = Paginator(posts, TOP_TEN)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    following_count = author.count()
+    posts, next_cursor = personal_feed(
+        request.user, request.GET.get('before'), TOP_TEN
+    )
+    page_obj = Paginator(posts, TOP_TEN).page(1)
+    following_count = (
+        len(get_followees(request.user.pk))
+        + GroupFollow.objects.filter(user=request.user).count()
+    )
     context = {
         'title': title,
         'page_obj': page_obj,
-        'following_count': following_count
+        'next_cursor': next_cursor,
+        'following_count': following_count,
+        'suggestions': suggested_authors(request.user),
+    }
+    return render(request, template, context)
+
+
+@login_required
+def notifications(request):
+    template = 'posts/notifications.html'
+    try:
+        before = int(request.GET['before'])
+    except (KeyError, ValueError):
+        before = None
+    rows, next_cursor = inbox(
+        request.user, before, settings.NOTIFICATIONS_PAGE_SIZE
+    )
+    if before is None:
+        mark_seen(request.user)
+    context = {
+        'title': 'Уведомления',
+        'notifications': rows,
+        'next_cursor': next_cursor,
     }
     return render(request, template, context)
 
 
 @login_required
+@ratelimit('follow')
 def profile_follow(request, username):
-    author = get_object_or_404(User, username=username)
-    follower = Follow.objects.filter(user=request.user, author=author)
-    if request.user != author and not follower.exists():
-        Follow.objects.create(user=request.user, author=author)
+    author = get_object_or_404(User, username=username, is_active=True)
+    if request.user != author:
+        Follow.objects.get_or_create(user=request.user, author=author)
     return redirect('posts:profile', username=author)
 
 
 @login_required
 def profile_unfollow(request, username):
     author = get_object_or_404(User, username=username)
-    follower = Follow.objects.filter(user=request.user, author=author)
-    if follower.exists():
-        follower.delete()
+    Follow.objects.filter(user=request.user, author=author).delete()
     return redirect('posts:profile', username=author)
+
+
+@login_required
+@ratelimit('follow')
+def group_follow(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    GroupFollow.objects.get_or_create(user=request.user, group=group)
+    return redirect('posts:group_list', slug=slug)
+
+
+@login_required
+def group_unfollow(request, slug):
+    GroupFollow.objects.filter(user=request.user, group__slug=slug).delete()
+    return redirect('posts:group_list', slug=slug)
+
+
+@staff_member_required
+def view_counts_metrics(request):
+    return JsonResponse(view_metrics())
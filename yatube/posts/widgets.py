@@ -0,0 +1,33 @@
+from django import forms
+
+
+class LazyGroupSelect(forms.Select):
+    """Выпадающий список групп без полного списка вариантов.
+
+    Отрисовываются только пустой вариант, выбранная группа и недавние
+    группы пользователя, остальные варианты подгружает скрипт
+    group_picker.js со страницы по адресу из data-options-url.
+    """
+
+    def __init__(self, attrs=None, recent=()):
+        super().__init__(attrs)
+        self.recent = list(recent)
+
+    def optgroups(self, name, value, attrs=None):
+        labels = dict(self.recent)
+        missing = [
+            item for item in value
+            if item and item.isdigit() and int(item) not in labels
+        ]
+        if missing:
+            labels.update(
+                self.choices.queryset.filter(pk__in=missing)
+                .values_list('pk', 'title')
+            )
+        choices = self.choices
+        self.choices = [('', choices.field.empty_label)]
+        self.choices.extend(labels.items())
+        try:
+            return super().optgroups(name, value, attrs)
+        finally:
+            self.choices = choices
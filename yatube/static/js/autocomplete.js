@@ -0,0 +1,34 @@
+// Подсказки для полей с атрибутом data-autocomplete-url.
+// Варианты подгружаются по мере ввода в связанный <datalist>,
+// при выборе варианта браузер переходит по его url.
+document.querySelectorAll('[data-autocomplete-url]').forEach(function (input) {
+  var list = document.getElementById(input.getAttribute('list'));
+  var results = [];
+  var timer = null;
+
+  input.addEventListener('input', function () {
+    var chosen = results.find(function (item) {
+      return item.label === input.value;
+    });
+    if (chosen) {
+      window.location = chosen.url;
+      return;
+    }
+    clearTimeout(timer);
+    timer = setTimeout(function () {
+      var url = new URL(input.dataset.autocompleteUrl, window.location);
+      url.searchParams.set('q', input.value);
+      fetch(url).then(function (response) {
+        return response.json();
+      }).then(function (data) {
+        results = data.results;
+        list.innerHTML = '';
+        results.forEach(function (item) {
+          var option = document.createElement('option');
+          option.value = item.label;
+          list.appendChild(option);
+        });
+      });
+    }, 100);
+  });
+});
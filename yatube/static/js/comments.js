@@ -0,0 +1,17 @@
+// Кнопка «Ещё комментарии» подгружает следующую страницу фрагментом
+// и заменяет себя им; во фрагменте, если есть, лежит новая кнопка.
+document.addEventListener('click', function (event) {
+  var button = event.target.closest('button[data-comments-url]');
+  if (!button) {
+    return;
+  }
+  button.disabled = true;
+  fetch(button.dataset.commentsUrl).then(function (response) {
+    return response.text();
+  }).then(function (html) {
+    button.insertAdjacentHTML('afterend', html);
+    button.remove();
+  }).catch(function () {
+    button.disabled = false;
+  });
+});
@@ -0,0 +1,60 @@
+// Ленивый выбор группы для select[data-options-url].
+// Над списком появляется поле поиска, под ним - кнопка «Ещё группы»;
+// варианты подгружаются постранично и добавляются в сам select.
+document.querySelectorAll('select[data-options-url]').forEach(function (select) {
+  var search = document.createElement('input');
+  var more = document.createElement('button');
+  var cursor = null;
+  var timer = null;
+
+  search.type = 'search';
+  search.className = 'form-control mb-2';
+  search.placeholder = 'Найти группу';
+  more.type = 'button';
+  more.className = 'btn btn-link p-0';
+  more.textContent = 'Ещё группы';
+  select.before(search);
+  select.after(more);
+
+  function load(params) {
+    var url = new URL(select.dataset.optionsUrl, window.location);
+    Object.keys(params).forEach(function (key) {
+      url.searchParams.set(key, params[key]);
+    });
+    return fetch(url).then(function (response) {
+      return response.json();
+    });
+  }
+
+  function addOptions(results) {
+    results.forEach(function (group) {
+      var value = String(group.id);
+      if (!select.querySelector('option[value="' + value + '"]')) {
+        select.add(new Option(group.title, value));
+      }
+    });
+  }
+
+  more.addEventListener('click', function () {
+    load(cursor ? {after: cursor} : {}).then(function (data) {
+      addOptions(data.results);
+      cursor = data.next;
+      more.hidden = !cursor;
+    });
+  });
+
+  search.addEventListener('input', function () {
+    clearTimeout(timer);
+    timer = setTimeout(function () {
+      if (!search.value) {
+        return;
+      }
+      load({q: search.value}).then(function (data) {
+        addOptions(data.results);
+        if (data.results.length) {
+          select.value = String(data.results[0].id);
+        }
+      });
+    }, 150);
+  });
+});
@@ -0,0 +1,35 @@
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.contrib.auth.admin import UserAdmin
+
+from posts.deletion import schedule_user_deletion
+
+User = get_user_model()
+
+
+def delete_in_background(modeladmin, request, queryset):
+    for user in queryset:
+        schedule_user_deletion(user)
+
+
+delete_in_background.short_description = 'Удалить в фоне'
+
+
+class BackgroundDeleteUserAdmin(UserAdmin):
+    actions = (delete_in_background,)
+
+    def get_actions(self, request):
+        # Синхронное каскадное удаление обошло бы фоновую очистку.
+        actions = super().get_actions(request)
+        actions.pop('delete_selected', None)
+        return actions
+
+    def delete_model(self, request, obj):
+        schedule_user_deletion(obj)
+
+    def delete_queryset(self, request, queryset):
+        delete_in_background(self, request, queryset)
+
+
+admin.site.unregister(User)
+admin.site.register(User, BackgroundDeleteUserAdmin)
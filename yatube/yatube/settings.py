@@ -44,6 +44,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.ratelimit.RateLimitMiddleware',
 ]
 
 ROOT_URLCONF = 'yatube.urls'
@@ -62,6 +63,7 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'core.context_processors.year.year',
+                'core.context_processors.notifications.notifications',
             ],
         },
     },
@@ -106,7 +108,10 @@ STATIC_URL = '/static/'
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
 
-EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+# Письма складываются в очередь и отправляются командой send_mail_spool
+# через SPOOL_EMAIL_BACKEND.
+EMAIL_BACKEND = 'core.mail.SpoolBackend'
+SPOOL_EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
@@ -119,3 +124,110 @@ CACHES = {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     }
 }
+
+POSTS_ARCHIVE_AFTER_DAYS = 365
+POSTS_ARCHIVE_BATCH_SIZE = 500
+
+POSTS_MONTH_ARCHIVE_CACHE_TIMEOUT = 60 * 60 * 24
+POSTS_MONTH_ARCHIVE_MAX_AGE = 60 * 60 * 24 * 30
+
+DB_BACKUP_STEP_PAGES = 256
+DB_BACKUP_STEP_SLEEP = 0.01
+DB_ANALYSIS_LIMIT = 400
+
+BACKFILL_BATCH_SIZE = 1000
+BACKFILL_PAUSE = 0.05
+
+POSTS_PURGE_BATCH_SIZE = 500
+POSTS_PURGE_PAUSE = 0.05
+
+AUTOCOMPLETE_LIMIT = 10
+AUTOCOMPLETE_REBUILD_INTERVAL = 60 * 10
+
+GROUP_OPTIONS_PAGE_SIZE = 10
+RECENT_GROUPS_LIMIT = 5
+RECENT_GROUPS_TIMEOUT = 60 * 60 * 24 * 30
+
+TRENDING_TAGS_DAYS = 7
+TRENDING_TAGS_LIMIT = 10
+TRENDING_TAGS_TIMEOUT = 60
+
+DUPLICATE_THRESHOLD = 0.8
+DUPLICATE_MAX_CANDIDATES = 50
+# 'flag' - сохранить и пометить, 'reject' - не принимать форму.
+DUPLICATES_ACTION = 'flag'
+
+# Стоп-список: по одной фразе на строку, правки подхватываются на лету.
+CONTENT_FILTER_FILE = os.path.join(BASE_DIR, 'blocklist.txt')
+
+RELATED_POSTS_LIMIT = 5
+RELATED_POSTS_CHUNK_SIZE = 500
+# Термы, которые встречаются в большей доле постов, не учитываются.
+RELATED_POSTS_MAX_DF = 0.5
+# Из списка постов терма хранятся только столько самых новых.
+RELATED_POSTS_MAX_POSTINGS = 1000
+# Сколько постов-кандидатов оценивать для одного поста.
+RELATED_POSTS_MAX_CANDIDATES = 200
+
+FOLLOW_SUGGESTIONS_LIMIT = 5
+FOLLOW_SUGGESTIONS_CHUNK_SIZE = 500
+FOLLOW_SUGGESTIONS_MAX_FANOUT = 1000
+
+FOLLOW_CACHE_TIMEOUT = 60 * 60 * 24
+
+POPULAR_WEIGHTS = {'view': 1, 'comment': 5, 'follow': 10}
+POPULAR_HALF_LIFE = 60 * 60 * 6
+POPULAR_TOP_K = 100
+POPULAR_GROUPS_LIMIT = 10
+POPULAR_TIMEOUT = 60 * 60 * 24 * 7
+POPULAR_FLUSH_INTERVAL = 10
+POPULAR_MAX_POSTS = 500
+
+COMMENTS_PAGE_SIZE = 20
+COMMENTS_REPLY_DEPTH = 3
+COMMENTS_REPLIES_PAGE_SIZE = 5
+
+REACTION_SHARDS = 8
+REACTION_COUNTS_TIMEOUT = 60 * 60
+
+VIEW_COUNTS_FLUSH_INTERVAL = 30
+VIEW_COUNTS_MAX_POSTS = 1000
+
+NOTIFICATIONS_BATCH_SIZE = 1000
+NOTIFICATIONS_PAUSE = 0.1
+NOTIFICATIONS_KEEP_DAYS = 90
+NOTIFICATIONS_PAGE_SIZE = 20
+
+DIGEST_CHUNK_SIZE = 500
+DIGEST_POSTS_LIMIT = 20
+
+MAIL_SPOOL_BATCH_SIZE = 100
+MAIL_SPOOL_MAX_ATTEMPTS = 8
+# Задержка повтора удваивается с каждой попыткой до MAIL_SPOOL_MAX_DELAY.
+MAIL_SPOOL_RETRY_DELAY = 60
+MAIL_SPOOL_MAX_DELAY = 60 * 60 * 6
+MAIL_SPOOL_LEASE = 60 * 5
+
+JOBS_WORKER_THREADS = 2
+JOBS_IDLE_SLEEP = 1
+JOBS_MAX_ATTEMPTS = 5
+JOBS_RETRY_DELAY = 30
+JOBS_MAX_DELAY = 60 * 60
+# Задача, взятая раньше этого срока и не завершенная, возвращается в очередь.
+JOBS_LEASE_TIMEOUT = 60 * 10
+JOBS_KEEP_DONE = 60 * 60 * 24
+# Длинная задача выполняет столько пачек и ставит остаток новой задачей.
+JOBS_DRAIN_BATCHES = 20
+
+# Лимиты запросов по областям: 'число/период', период s, m, h или d.
+RATELIMITS = {
+    'post_create': '10/m',
+    'add_comment': '30/m',
+    'follow': '60/m',
+    'signup': '5/h',
+}
+# Области для POST-запросов к представлениям без декоратора ratelimit.
+RATELIMIT_VIEWS = {
+    'users:signup': 'signup',
+}
+RATELIMIT_TIMEOUT = 60 * 60 * 24
@@ -5,3 +5,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
 
 application = get_wsgi_application()
+
+# Индекс подсказок собирается в фоне, а не первым запросом.
+from posts.autocomplete import index  # noqa: E402
+
+index.build_in_background()